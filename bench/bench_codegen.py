@@ -0,0 +1,153 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Runtime cost of the generated code
+
+Compiles programs with different code generation pragmas, runs them
+in the SDS-C interpreter and compares the number of executed statements
+and the stack depth. The output of every variant must be the same as
+with the default pragmas, otherwise an optimization changed the behavior
+of the program and the benchmark fails.
+
+Usage:
+	bench/bench_codegen.py [sources] [--loops N] [--json FILE]
+
+By default, the programs of tests-unit are used.
+
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import compiler
+from interpreter import Interpreter
+from sdscp_errors import SdsRuntimeError
+
+
+VARIANTS = [
+	('default', {}),
+	('no_inline', {'inline_one_use_functions': False}),
+	('trampolines', {'push_pop_trampolines': True}),
+	('unsafe_stack', {'safe_stack': False}),
+	('no_simplify', {'simplify_ifs': False, 'simplify_expressions': False}),
+]
+
+PRAGMAS = {
+	'header': False,
+}
+
+
+def run_variant(source, pragmas, loops, max_steps):
+	""" Compile and run a program
+
+	Returns:
+		The interpreter after the run, None if the program does not compile
+
+	"""
+
+	p = dict(PRAGMAS)
+	p.update(pragmas)
+
+	result = compiler.compile(source, p)
+	if not result.ok:
+		return None
+
+	it = Interpreter(result.output)
+	try:
+		it.run(loops=loops, max_steps=max_steps)
+	except SdsRuntimeError as e:
+		it.output.append('ERROR: %s' % e)
+
+	return it
+
+
+def same_behavior(a, b):
+	""" Check that two runs printed the same
+
+	A run cut by the step limit stops at a different point in each
+	variant, then only the part printed by both is compared.
+
+	"""
+
+	if 'max_steps' in (a.stop_reason, b.stop_reason):
+		n = min(len(a.output), len(b.output))
+		return a.output[:n] == b.output[:n]
+
+	return a.stop_reason == b.stop_reason and a.output == b.output
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Runtime cost of the SDSCP code generation pragmas')
+	parser.add_argument('source', nargs='*', help='Programs to run (default: tests-unit)')
+	parser.add_argument('--loops', type=int, default=1, help='Passes of the main loop (default: 1)')
+	parser.add_argument('--max-steps', type=int, default=100000, help='Statement limit of a run (default: 100000)')
+	parser.add_argument('--json', metavar='FILE', help='Save the statistics as JSON')
+	args = parser.parse_args()
+
+	sources = args.source or sorted(glob.glob(os.path.join(ROOT, 'tests-unit', '*.in.c')))
+
+	names = [name for (name, pragmas) in VARIANTS]
+	print('%-28s' % 'statements' + ''.join('%14s' % n for n in names))
+
+	report = {}
+	totals = {n: 0 for n in names}
+	problems = []
+
+	for source in sources:
+		runs = {}
+		for (name, pragmas) in VARIANTS:
+			runs[name] = run_variant(source, pragmas, args.loops, args.max_steps)
+
+		base = runs['default']
+		if base is None:
+			continue
+
+		label = os.path.basename(source)
+		cells = []
+
+		for name in names:
+			it = runs[name]
+
+			if it is None:
+				cells.append('%14s' % 'error')
+				problems.append('%s: does not compile with %s' % (label, name))
+				continue
+
+			cells.append('%10d %3s' % (it.steps, 'max' if it.stop_reason == 'max_steps' else ''))
+
+			if not same_behavior(base, it):
+				problems.append('%s: output with %s differs from default' % (label, name))
+
+		# the totals only count the programs that completed in all variants
+		if all(runs[n] is not None and runs[n].stop_reason != 'max_steps' for n in names):
+			for n in names:
+				totals[n] += runs[n].steps
+
+		report[label] = {n: (runs[n].stats() if runs[n] else None) for n in names}
+		print('%-28s' % label[:28] + ''.join(cells))
+
+	print('%-28s' % 'total' + ''.join('%10d    ' % totals[n] for n in names))
+
+	if args.json is not None:
+		with open(args.json, 'w') as f:
+			json.dump(report, f, indent=2)
+			f.write('\n')
+
+	print()
+	for p in problems:
+		print('FAIL: ' + p)
+
+	if problems:
+		sys.exit(1)
+
+	print('OK')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,92 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Include cache benchmark
+
+Resolves directives of many small programs that all include
+the example library, as a build of several programs does,
+with and without the include cache.
+
+Usage:
+	bench/bench_includes.py [programs]
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import config
+import directives
+from directives import DirectiveProcessor
+
+
+PROGRAM = """
+#include "%(lib)s/sys.c"
+#include "%(lib)s/utils.c"
+#include "%(lib)s/http.c"
+#include "%(lib)s/dataflash.c"
+
+main()
+{
+	echo("Program %(n)d");
+}
+"""
+
+
+def run(paths, cache):
+	""" Process all the programs
+
+	Args:
+		paths (str[]): The program files
+		cache (IncludeCache): The include cache to use, or None
+
+	Returns:
+		Seconds elapsed
+
+	"""
+
+	t0 = time.perf_counter()
+
+	for path in paths:
+		dproc = DirectiveProcessor(path)
+		dproc.include_cache = cache
+		dproc.process()
+
+	return time.perf_counter() - t0
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Include cache benchmark')
+	parser.add_argument('programs', nargs='?', type=int, default=50, help='Programs including the library (default: 50)')
+	args = parser.parse_args()
+
+	config.QUIET = True
+
+	count = args.programs
+	lib = os.path.abspath(os.path.join(ROOT, 'example', 'library'))
+
+	with tempfile.TemporaryDirectory() as tmp:
+		paths = []
+		for n in range(count):
+			path = os.path.join(tmp, 'prog_%d.c' % n)
+			with open(path, 'w') as f:
+				f.write(PROGRAM % {'lib': lib, 'n': n})
+
+			paths.append(path)
+
+		t_plain = run(paths, None)
+		t_cached = run(paths, directives.IncludeCache())
+
+	print('%d programs including the example library\n' % count)
+	print('%-16s %10.3f s' % ('without cache', t_plain))
+	print('%-16s %10.3f s' % ('with cache', t_cached))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,113 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Lexer benchmark on the example library
+
+Resolves directives in each `example/library` source once, then
+repeatedly tokenizes the result, including all the nested composite
+tokens (code blocks, parens, expressions).
+
+Then tokenizes a deeply nested expression of growing depth; the time
+should grow linearly with the depth, not with its square.
+
+Usage:
+	bench/bench_lexer.py [rounds]
+
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import config
+from directives import DirectiveProcessor
+from tokens import Tokenizer
+
+
+def tokenize_deep(source):
+	""" Tokenize a source and all its composite tokens
+
+	Returns:
+		Number of tokens produced
+	"""
+
+	stack = list(Tokenizer(source).tokenize())
+	count = 0
+
+	while stack:
+		t = stack.pop()
+		count += 1
+
+		if t.is_composite():
+			stack.extend(t.tokenize())
+
+			# for loop parens keep their statements aside
+			for attr in ('for_init', 'for_iter'):
+				stack.extend(getattr(t, attr, []))
+
+			if hasattr(t, 'for_cond'):
+				stack.append(t.for_cond)
+
+	return count
+
+
+def nested_source(depth):
+	""" Generate a function with an expression nested `depth` levels deep """
+
+	expr = 'a'
+	for i in range(depth):
+		expr = '(%s + foo(b, c[%d]) * %d)' % (expr, i, i)
+
+	return 'main() {\n\tvar x = %s;\n}\n' % expr
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Tokenizer and macro expansion benchmark')
+	parser.add_argument('rounds', nargs='?', type=int, default=50, help='Rounds of each measurement (default: 50)')
+	args = parser.parse_args()
+
+	config.QUIET = True
+
+	rounds = args.rounds
+
+	sources = []
+	for path in sorted(glob.glob(os.path.join(ROOT, 'example', 'library', '*.c'))):
+		dproc = DirectiveProcessor(path)
+		dproc.process()
+		sources.append((os.path.basename(path), dproc.get_output()))
+
+	print('%-16s %8s %8s %12s' % ('file', 'chars', 'tokens', 'tokenize'))
+
+	total = 0
+	for (name, source) in sources:
+		count = tokenize_deep(source)
+
+		t0 = time.perf_counter()
+		for i in range(rounds):
+			tokenize_deep(source)
+		t = (time.perf_counter() - t0) / rounds
+		total += t
+
+		print('%-16s %8d %8d %9.3f ms' % (name, len(source), count, t * 1e3))
+
+	print('%-16s %8s %8s %9.3f ms' % ('total', '', '', total * 1e3))
+
+	print('\n%-16s %8s %8s %12s' % ('nesting', 'chars', 'tokens', 'tokenize'))
+
+	for depth in (50, 100, 200, 400):
+		source = nested_source(depth)
+
+		t0 = time.perf_counter()
+		count = tokenize_deep(source)
+		t = time.perf_counter() - t0
+
+		print('%-16s %8d %8d %9.3f ms' % ('depth %d' % depth, len(source), count, t * 1e3))
+
+
+if __name__ == '__main__':
+	main()
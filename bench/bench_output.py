@@ -0,0 +1,97 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Output building benchmark
+
+Runs a large generated source through the preprocessor and the
+renderers, and measures time and peak memory (tracemalloc) of the
+stages that produce output text.
+
+Usage:
+	bench/bench_output.py [size_kb]
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+import statements
+from directives import DirectiveProcessor
+from tokens import Tokenizer
+from renderers import AsmSdsRenderer
+
+from bench_readers import generate
+
+
+PRAGMAS = {
+	'header': False,
+	'main_file': '',
+}
+
+
+def measure(label, fn):
+	""" Run a function, print its time and peak memory
+
+	Returns:
+		Result of the function
+
+	"""
+
+	tracemalloc.start()
+	t0 = time.perf_counter()
+	rv = fn()
+	t = time.perf_counter() - t0
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	print('%-16s %10.3f s %10d KB' % (label, t, peak // 1024))
+	return rv
+
+
+def render(sts):
+	""" Render the statements to SDS-C """
+
+	rndr = AsmSdsRenderer(sts)
+	rndr.set_pragmas(PRAGMAS)
+	return rndr.render()
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Output building benchmark')
+	parser.add_argument('size_kb', nargs='?', type=int, default=512, help='Size of the source in kB (default: 512)')
+	args = parser.parse_args()
+
+	config.QUIET = True
+
+	size_kb = args.size_kb
+	source = generate(size_kb * 1024, call_all=True)
+
+	with tempfile.NamedTemporaryFile('w', suffix='.c', delete=False) as f:
+		f.write(source)
+		path = f.name
+
+	try:
+		print('Input: %d KB\n' % (len(source) // 1024))
+		print('%-16s %12s %13s' % ('stage', 'time', 'peak memory'))
+
+		dproc = DirectiveProcessor(path)
+		measure('process', dproc.process)
+		measure('apply_macros', dproc.apply_macros)
+
+		sts = statements.parse(Tokenizer(dproc.get_output()).tokenize())
+
+		out = measure('render', lambda: render(sts))
+		print('%-16s %10d KB' % ('  output', len(out) // 1024))
+	finally:
+		os.unlink(path)
+
+
+if __name__ == '__main__':
+	main()
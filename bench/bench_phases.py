@@ -0,0 +1,262 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Compiler phase scaling benchmark
+
+Compiles generated programs (see generator.py) of growing size and
+measures each compiler phase, including each optimization pass.
+The time of each phase is fitted with `time = c * size ^ k`; the
+exponent k is 1 for a phase that scales linearly.
+
+The benchmark fails (exit code 1) when a phase turns super-linear
+(its exponent is over --max-exponent), or, with --compare, when it got
+slower than in the saved run, or its exponent grew.
+
+Results are saved as JSON with --save, to compare runs across commits.
+
+Usage:
+	bench/bench_phases.py [options]
+
+	# keep a baseline, check a later commit against it
+	bench/bench_phases.py --save base.json
+	bench/bench_phases.py --compare base.json
+
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import compiler
+from timings import Timings
+
+from generator import Shape, write
+
+
+PRAGMAS = {
+	'header': False,
+}
+
+# phases shorter than this (in seconds) are too noisy to judge
+MIN_TIME = 0.005
+
+
+def measure(shape, repeat):
+	""" Compile a generated program
+
+	Args:
+		shape (Shape): The program to generate
+		repeat (int): Number of compilations, the fastest one is taken
+
+	Returns:
+		dict {phase name -> seconds}
+
+	"""
+
+	best = {}
+
+	with tempfile.TemporaryDirectory() as tmp:
+		path = write(shape, tmp)
+
+		for i in range(repeat):
+			timings = Timings(trace_memory=False)
+			result = compiler.compile(path, PRAGMAS, timings=timings)
+
+			if not result.ok:
+				raise Exception('Generated program failed to compile: %s' % result.error)
+
+			for p in timings.phases:
+				best[p.name] = min(best.get(p.name, p.wall), p.wall)
+
+	return best
+
+
+def fit(sizes, times):
+	""" Fit `time = c * size ^ k` by least squares in log-log space
+
+	Returns:
+		(k, c)
+
+	"""
+
+	xs = [math.log(s) for s in sizes]
+	ys = [math.log(max(t, 1e-9)) for t in times]
+	n = len(xs)
+
+	mx = sum(xs) / n
+	my = sum(ys) / n
+
+	sxx = sum((x - mx) ** 2 for x in xs)
+	sxy = sum((x - mx) * (y - my) for (x, y) in zip(xs, ys))
+
+	k = sxy / sxx if sxx > 0 else 0.0
+	c = math.exp(my - k * mx)
+
+	return (k, c)
+
+
+def git_commit():
+	""" Current commit of the tree, None if unknown """
+
+	try:
+		out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+							 capture_output=True, text=True, check=True)
+		return out.stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def run(shape, field, sizes, repeat):
+	""" Measure all the sizes, fit the phases
+
+	Returns:
+		The report, JSON-serializable
+
+	"""
+
+	rows = []
+	for size in sizes:
+		rows.append(measure(shape.scaled(field, size), repeat))
+
+	phases = {}
+	for name in rows[0].keys():
+		times = [r.get(name, 0.0) for r in rows]
+		(k, c) = fit(sizes, times)
+
+		phases[name] = {
+			'times': times,
+			'exponent': k,
+			'coefficient': c,
+		}
+
+	return {
+		'commit': git_commit(),
+		'sdscp_version': compiler.VERSION,
+		'shape': shape.to_json(),
+		'scaled': field,
+		'sizes': sizes,
+		'phases': phases,
+	}
+
+
+def show(report):
+	""" Print the measured times and exponents """
+
+	sizes = report['sizes']
+
+	print('%-20s' % ('phase / %s' % report['scaled']) +
+		  ''.join('%10d' % s for s in sizes) + '%10s' % 'exponent')
+
+	for (name, ph) in report['phases'].items():
+		print('%-20s' % name +
+			  ''.join('%8.1fms' % (t * 1000) for t in ph['times']) +
+			  '%10.2f' % ph['exponent'])
+
+	print()
+
+
+def check(report, baseline, max_exponent, tolerance):
+	""" Find regressions
+
+	Args:
+		report (dict): The current run
+		baseline (dict): A saved run to compare with, or None
+		max_exponent (float): Exponent over which a phase is super-linear
+		tolerance (float): Allowed slowdown against the baseline, 0.25 = 25 %
+
+	Returns:
+		List of problems found, as messages
+
+	"""
+
+	problems = []
+
+	for (name, ph) in report['phases'].items():
+		# the exponent of a phase taking almost no time is just noise
+		judged = max(ph['times']) >= MIN_TIME
+
+		if judged and ph['exponent'] > max_exponent:
+			problems.append('%s is super-linear: exponent %.2f > %.2f' % (name, ph['exponent'], max_exponent))
+
+		if baseline is None or name not in baseline['phases']:
+			continue
+
+		base = baseline['phases'][name]
+
+		if baseline['sizes'] != report['sizes'] or baseline['scaled'] != report['scaled']:
+			continue
+
+		t = ph['times'][-1]
+		bt = base['times'][-1]
+
+		if t >= MIN_TIME and t > bt * (1 + tolerance):
+			problems.append('%s got slower: %.1f ms, was %.1f ms' % (name, t * 1000, bt * 1000))
+
+		if judged and ph['exponent'] > base['exponent'] + 0.2:
+			problems.append('%s scales worse: exponent %.2f, was %.2f' % (name, ph['exponent'], base['exponent']))
+
+	return problems
+
+
+def main():
+	parser = argparse.ArgumentParser(description='SDSCP compiler phase scaling benchmark')
+
+	defaults = Shape()
+
+	for field in Shape.FIELDS:
+		parser.add_argument('--' + field.replace('_', '-'), type=int, default=getattr(defaults, field),
+							help='(default: %d)' % getattr(defaults, field))
+
+	parser.add_argument('--scale', default='functions', choices=Shape.FIELDS,
+						help='Parameter to grow (default: functions)')
+	parser.add_argument('--sizes', default='25,50,100,200',
+						help='Values of the grown parameter (default: 25,50,100,200)')
+	parser.add_argument('--repeat', type=int, default=3,
+						help='Compilations of each size, the fastest counts (default: 3)')
+	parser.add_argument('--max-exponent', type=float, default=1.3,
+						help='Fail if a phase scales worse than size^this (default: 1.3)')
+	parser.add_argument('--tolerance', type=float, default=0.25,
+						help='Allowed slowdown against --compare (default: 0.25)')
+	parser.add_argument('--save', metavar='FILE', help='Save the results as JSON')
+	parser.add_argument('--compare', metavar='FILE', help='Compare with results saved before')
+
+	args = parser.parse_args()
+
+	shape = Shape(**{f: getattr(args, f) for f in Shape.FIELDS})
+	sizes = [int(s) for s in args.sizes.split(',')]
+
+	report = run(shape, args.scale, sizes, args.repeat)
+	show(report)
+
+	if args.save is not None:
+		with open(args.save, 'w') as f:
+			json.dump(report, f, indent=2)
+			f.write('\n')
+
+	baseline = None
+	if args.compare is not None:
+		with open(args.compare, 'r') as f:
+			baseline = json.load(f)
+
+		print('Compared with %s (commit %s)' % (args.compare, baseline.get('commit')))
+
+	problems = check(report, baseline, args.max_exponent, args.tolerance)
+
+	for p in problems:
+		print('FAIL: ' + p)
+
+	if problems:
+		sys.exit(1)
+
+	print('OK')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,148 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Reader scaling benchmark
+
+Generates a synthetic SDS-C source of growing size (up to 1 MB)
+and measures the time of resolving directives and tokenizing it.
+
+The time per KB should stay roughly constant as the input grows;
+if it grows with the input size, some reader operation is no longer
+linear (e.g. it copies the rest of the text on every probe).
+
+Usage:
+	bench/bench_readers.py [max_kb]
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+from directives import DirectiveProcessor
+from tokens import Tokenizer
+
+
+CHUNK = """
+// Function number %(n)d
+#define LIMIT_%(n)d (%(n)d * 4 + 1)
+
+calc_%(n)d(a, b)
+{
+	var x = a * (b + %(n)d) - LIMIT_%(n)d; /* inline comment */
+	var y = 0x%(n)04x;
+
+	for (var i = 0; i < 10; i++) {
+		if (x > y && i != 3) {
+			x = x - (y >> 2);
+		} else {
+			y += x | 0b1010;
+		}
+	}
+
+	echo("Result of calc_%(n)d: ", x, ", ", y);
+	return x + ram[y & 255];
+}
+"""
+
+
+def generate(size, call_all=False):
+	""" Generate a synthetic source of approximately `size` characters
+
+	Args:
+		size (int): Requested size
+		call_all (bool, optional): Call all the generated functions
+			from main, so none of them is removed as unused.
+
+	"""
+
+	parts = []
+	total = 0
+	n = 0
+	while total < size:
+		chunk = CHUNK % {'n': n}
+		parts.append(chunk)
+		total += len(chunk)
+		n += 1
+
+	parts.append('\nmain()\n{\n')
+
+	for i in range(n if call_all else 1):
+		parts.append('\techo(calc_%d(1, 2));\n' % i)
+
+	parts.append('}\n')
+	return ''.join(parts)
+
+
+def measure(size):
+	""" Resolve directives and tokenize a generated source
+
+	Returns:
+		(chars, seconds for process(), seconds for tokenize())
+
+	"""
+
+	source = generate(size)
+
+	with tempfile.NamedTemporaryFile('w', suffix='.c', delete=False) as f:
+		f.write(source)
+		path = f.name
+
+	try:
+		t0 = time.perf_counter()
+		dproc = DirectiveProcessor(path)
+		dproc.process()
+		t1 = time.perf_counter()
+
+		tk = Tokenizer(dproc.get_output())
+		tk.tokenize()
+		t2 = time.perf_counter()
+	finally:
+		os.unlink(path)
+
+	return (len(source), t1 - t0, t2 - t1)
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Directive processing and tokenizer scaling benchmark')
+	parser.add_argument('max_kb', nargs='?', type=int, default=1024, help='Size of the largest source in kB (default: 1024)')
+	args = parser.parse_args()
+
+	config.QUIET = True
+
+	max_kb = args.max_kb
+
+	sizes = []
+	kb = max_kb
+	while kb >= 64 and len(sizes) < 5:
+		sizes.insert(0, kb)
+		kb //= 2
+
+	print('%10s %12s %12s %14s %14s' % ('size', 'process', 'tokenize', 'process/KB', 'tokenize/KB'))
+
+	results = []
+	for kb in sizes:
+		(chars, t_proc, t_tok) = measure(kb * 1024)
+		results.append((chars, t_proc, t_tok))
+
+		print('%8d K %10.3f s %10.3f s %11.1f us %11.1f us' % (
+			chars // 1024, t_proc, t_tok,
+			t_proc * 1e6 / (chars / 1024),
+			t_tok * 1e6 / (chars / 1024),
+		))
+
+	if len(results) > 1:
+		(c0, p0, k0) = results[0]
+		(c1, p1, k1) = results[-1]
+		print('\nInput grew %.1fx, process() time %.1fx, tokenize() time %.1fx' % (
+			c1 / c0, p1 / p0, k1 / k0
+		))
+
+
+if __name__ == '__main__':
+	main()
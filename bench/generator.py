@@ -0,0 +1,197 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Synthetic SDS-C program generator
+
+Generates programs of a given shape for the benchmarks. Every generated
+function is called (directly from main, or from another function), so
+none of them is removed as unused code.
+
+Usage as a script prints a program:
+	bench/generator.py [functions] [fanout] [depth] [macro_depth] [cases]
+
+"""
+
+import os
+import argparse
+
+
+class Shape:
+	""" Parameters of a generated program
+
+	Attributes:
+		functions (int): Number of functions besides main
+		fanout (int): Number of other functions each function calls
+		depth (int): Nesting depth of the if / while blocks in each function
+		macro_depth (int): Length of the chain of macros each expanding
+			the previous one; each function uses the last one.
+		includes (int): Number of files the functions are spread over;
+			0 puts everything in the main file.
+		cases (int): Number of cases of the switch in each function,
+			0 for no switch.
+
+	"""
+
+	FIELDS = ('functions', 'fanout', 'depth', 'macro_depth', 'includes', 'cases')
+
+	def __init__(self, functions=50, fanout=2, depth=3, macro_depth=3, includes=0, cases=4):
+		self.functions = functions
+		self.fanout = fanout
+		self.depth = depth
+		self.macro_depth = macro_depth
+		self.includes = includes
+		self.cases = cases
+
+
+	def scaled(self, field, value):
+		""" Get a copy with one parameter changed """
+
+		shape = Shape(**self.to_json())
+		setattr(shape, field, value)
+		return shape
+
+
+	def to_json(self):
+		return {f: getattr(self, f) for f in self.FIELDS}
+
+
+
+def _macros(shape):
+	""" Generate the chain of macros """
+
+	lines = ['#define MAC_0(x) ((x) + 1)']
+
+	for i in range(1, shape.macro_depth + 1):
+		lines.append('#define MAC_%d(x) (MAC_%d(x) * %d)' % (i, i - 1, i + 1))
+
+	return '\n'.join(lines) + '\n'
+
+
+def _body(shape, n, indent, level):
+	""" Generate the nested blocks of a function body """
+
+	ind = '\t' * indent
+
+	if level >= shape.depth:
+		return '%sx = x + %d;\n' % (ind, level)
+
+	inner = _body(shape, n, indent + 1, level + 1)
+
+	if level % 2 == 0:
+		return '%sif (x > %d) {\n%s%s} else {\n%s\tx = x - 1;\n%s}\n' % (
+			ind, level + n, inner, ind, ind, ind
+		)
+	else:
+		return '%swhile (x < %d) {\n%s%s}\n' % (ind, level * 100 + n, inner, ind)
+
+
+def _function(shape, n):
+	""" Generate function number n """
+
+	parts = ['\nfunc_%d(a, b)\n{\n' % n]
+
+	parts.append('\tvar x = MAC_%d(a) + b;\n' % shape.macro_depth)
+
+	parts.append(_body(shape, n, 1, 0))
+
+	# calls to the following functions keep the call graph acyclic
+	for k in range(1, shape.fanout + 1):
+		callee = n + k
+		if callee < shape.functions:
+			parts.append('\tx = x + func_%d(x, %d);\n' % (callee, k))
+
+	if shape.cases > 0:
+		parts.append('\tswitch (x & %d) {\n' % (shape.cases * 2 - 1))
+
+		for c in range(shape.cases):
+			parts.append('\t\tcase %d:\n\t\t\tx = x + %d;\n\t\t\tbreak;\n' % (c, c * 3 + n))
+
+		parts.append('\t\tdefault:\n\t\t\techo("func_%d: ", x);\n\t}\n' % n)
+
+	parts.append('\treturn x;\n}\n')
+
+	return ''.join(parts)
+
+
+def _main(shape):
+	""" Generate main, calling the functions not called by others """
+
+	parts = ['\nmain()\n{\n']
+
+	for n in range(shape.functions):
+		if n == 0 or shape.fanout == 0:
+			parts.append('\techo(func_%d(%d, 1));\n' % (n, n))
+
+	parts.append('}\n')
+
+	return ''.join(parts)
+
+
+def generate(shape):
+	""" Generate a program
+
+	Args:
+		shape (Shape): Parameters of the program
+
+	Returns:
+		dict {file name -> text}, the main file is "main.c"
+
+	"""
+
+	files = {}
+
+	groups = max(1, shape.includes)
+	chunks = [[] for i in range(groups)]
+
+	for n in range(shape.functions):
+		chunks[n * groups // max(1, shape.functions)].append(_function(shape, n))
+
+	main = [_macros(shape)]
+
+	if shape.includes == 0:
+		main.extend(chunks[0])
+	else:
+		for (i, chunk) in enumerate(chunks):
+			name = 'part_%d.c' % i
+			files[name] = ''.join(chunk)
+			main.append('#include "%s"\n' % name)
+
+	main.append(_main(shape))
+	files['main.c'] = ''.join(main)
+
+	return files
+
+
+def write(shape, directory):
+	""" Generate a program into a directory
+
+	Returns:
+		Path of the main file
+
+	"""
+
+	for (name, text) in generate(shape).items():
+		with open(os.path.join(directory, name), 'w') as f:
+			f.write(text)
+
+	return os.path.join(directory, 'main.c')
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Print a generated program')
+
+	defaults = Shape()
+	fields = [f for f in Shape.FIELDS if f != 'includes']
+
+	for field in fields:
+		parser.add_argument(field, nargs='?', type=int, default=getattr(defaults, field),
+							help='(default: %d)' % getattr(defaults, field))
+
+	args = parser.parse_args()
+	shape = Shape(**{f: getattr(args, f) for f in fields})
+
+	print(generate(shape)['main.c'])
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,267 @@
+#!/bin/env python3
+
+import os
+import json
+import hashlib
+import tempfile
+
+
+class BuildCache:
+	""" Content-addressed cache of rendered programs
+
+	Each rendered output is stored in a file named by the hash of
+	everything it was produced from. When the cache grows over
+	its size limit, the least recently used entries are removed.
+
+	The directory is listed only when the size is first needed and
+	when evicting; the stores in between are added up. Each process
+	keeps its own file of the hit / miss counters, so the processes
+	of a parallel build don't overwrite each other's counts.
+
+	Args:
+		directory (str): The cache directory, created if missing
+		max_size (int): Size limit in bytes
+
+	Attributes:
+		directory (str): The cache directory
+		max_size (int): Size limit in bytes
+
+	"""
+
+	# suffix of the cached outputs
+	ENTRY_SUFFIX = '.c'
+
+	# files with the hit / miss counters, one for each process
+	STATS_PREFIX = 'stats-'
+	STATS_SUFFIX = '.json'
+
+
+	def __init__(self, directory, max_size):
+		self.directory = directory
+		self.max_size = max_size
+
+		self._size = None  # size of the entries, known after listing them
+		self._counters = None  # counters of this process
+
+		os.makedirs(directory, exist_ok=True)
+
+
+	def __getstate__(self):
+		# sent to a worker process, which counts in its own file
+		state = dict(self.__dict__)
+		state['_size'] = None
+		state['_counters'] = None
+		return state
+
+
+	@staticmethod
+	def key(version, source, pragmas):
+		""" Compute the cache key of a program
+
+		Args:
+			version (str): The SDSCP version
+			source (str): The program with includes and macros resolved
+			pragmas (dict): The effective pragmas
+
+		Returns:
+			The key, as a hex string
+
+		"""
+
+		h = hashlib.sha256()
+
+		h.update(version.encode('utf-8') + b'\0')
+
+		for (name, value) in sorted(pragmas.items()):
+			h.update(('%s=%r\0' % (name, value)).encode('utf-8'))
+
+		h.update(source.encode('utf-8'))
+
+		return h.hexdigest()
+
+
+	def _path(self, key):
+		return os.path.join(self.directory, key + self.ENTRY_SUFFIX)
+
+
+	def get(self, key):
+		""" Get a cached output
+
+		Args:
+			key (str): The cache key
+
+		Returns:
+			The cached output, or None if there is none.
+
+		"""
+
+		path = self._path(key)
+
+		try:
+			with open(path, 'r', encoding='utf-8') as f:
+				text = f.read()
+
+			# mark as recently used
+			os.utime(path)
+
+		except OSError:
+			self._count('misses')
+			return None
+
+		self._count('hits')
+		return text
+
+
+	def put(self, key, text):
+		""" Store an output, evict old entries if over the limit
+
+		Args:
+			key (str): The cache key
+			text (str): The rendered output
+
+		"""
+
+		data = text.encode('utf-8')
+		self._write(self._path(key), text)
+
+		if self._size is None:
+			self._size = sum(e[1] for e in self.entries())
+		else:
+			self._size += len(data)
+
+		if self._size > self.max_size:
+			self.evict()
+
+
+	def entries(self):
+		""" Get the cached entries
+
+		Returns:
+			List of (path, size, last use time), least recently used first
+
+		"""
+
+		found = []
+
+		for name in os.listdir(self.directory):
+			if not name.endswith(self.ENTRY_SUFFIX):
+				continue
+
+			path = os.path.join(self.directory, name)
+			try:
+				st = os.stat(path)
+			except OSError:
+				continue  # removed meanwhile
+
+			found.append((path, st.st_size, st.st_mtime))
+
+		found.sort(key=lambda e: e[2])
+		return found
+
+
+	def evict(self):
+		""" Remove least recently used entries until under the size limit """
+
+		found = self.entries()
+		total = sum(e[1] for e in found)
+
+		evicted = 0
+		for (path, size, used) in found:
+			if total <= self.max_size:
+				break
+
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+			total -= size
+			evicted += 1
+
+		self._size = total
+
+		if evicted > 0:
+			self._count('evictions', evicted)
+
+
+	def stats(self):
+		""" Get statistics of the cache
+
+		Returns:
+			dict with entries, size, max_size, hits, misses and evictions
+
+		"""
+
+		found = self.entries()
+
+		stats = {
+			'entries': len(found),
+			'size': sum(e[1] for e in found),
+			'max_size': self.max_size,
+		}
+
+		stats.update(self._load_counters())
+		return stats
+
+
+	def _stats_path(self):
+		return os.path.join(self.directory, '%s%d%s' % (self.STATS_PREFIX, os.getpid(), self.STATS_SUFFIX))
+
+
+	@staticmethod
+	def _read_counters(path):
+		counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+		try:
+			with open(path, 'r') as f:
+				counters.update(json.load(f))
+		except (OSError, ValueError):
+			pass
+
+		return counters
+
+
+	def _load_counters(self):
+		""" Sum the counters of all processes """
+
+		counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+		for name in os.listdir(self.directory):
+			if name.startswith(self.STATS_PREFIX) and name.endswith(self.STATS_SUFFIX):
+				for (k, v) in self._read_counters(os.path.join(self.directory, name)).items():
+					counters[k] = counters.get(k, 0) + v
+
+		return counters
+
+
+	def _count(self, name, n=1):
+		""" Increment a persistent counter (best effort)
+
+		Only this process writes its file; it may be left from an
+		earlier process with the same pid, whose counts are kept.
+
+		"""
+
+		if self._counters is None:
+			self._counters = self._read_counters(self._stats_path())
+
+		self._counters[name] += n
+
+		try:
+			self._write(self._stats_path(), json.dumps(self._counters))
+		except OSError:
+			pass
+
+
+	def _write(self, path, text):
+		""" Write a file atomically, so parallel builds never see it half-written """
+
+		(fd, tmp) = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+		try:
+			with os.fdopen(fd, 'w', encoding='utf-8') as f:
+				f.write(text)
+
+			os.replace(tmp, path)
+		finally:
+			if os.path.exists(tmp):
+				os.remove(tmp)
@@ -0,0 +1,265 @@
+#!/bin/env python3
+
+import io
+import getpass
+import contextlib
+
+import config
+import statements
+from directives import DirectiveProcessor
+from tokens import Tokenizer
+from renderers import SimpleSdsRenderer, AsmSdsRenderer, CSyntaxRenderer
+from build_cache import BuildCache
+from timings import Phase
+
+VERSION = '1.8.11'
+
+
+class CompileResult:
+	""" Result of `compile()`
+
+	The attributes of phases that were not reached (due to an error,
+	or when taken from the cache) are None.
+
+	Attributes:
+		main_file (str): Path (or name) of the main file
+		source (str): Text of the main file
+		includes (str[]): Absolute paths of the included files (as far
+			as the compilation got)
+		missing_includes (str[]): Absolute paths where the includes were
+			looked for, but which did not exist
+		resolved (str): Code after resolving includes and # branching
+		defines (dict): The macros, {"name" -> D_Define[]}
+		pragmas (dict): The effective pragmas
+		processed (str): Code after replacing macros
+		tokens (Token[]): Tokens of the processed code
+		statements (Statement[]): The parsed statements; the renderer
+			modifies them when rendering
+		renderer (str): Name of the renderer used
+		output (str): The rendered SDS-C code
+		cached (bool): Whether the output was taken from the build cache
+		messages (str): Messages printed while compiling, None if they
+			were not captured
+		timings (Timings): The measured phases, if requested
+		size_report (SizeReport): Size of the code of each function,
+			if requested
+		error (Exception): The error that stopped the compilation
+
+	"""
+
+	def __init__(self, main_file):
+		self.main_file = main_file
+		self.source = None
+		self.includes = []
+		self.missing_includes = []
+		self.resolved = None
+		self.defines = None
+		self.pragmas = None
+		self.processed = None
+		self.tokens = None
+		self.statements = None
+		self.renderer = None
+		self.output = None
+		self.cached = False
+		self.messages = None
+		self.timings = None
+		self.size_report = None
+		self.error = None
+
+
+	@property
+	def ok(self):
+		""" Whether the compilation succeeded """
+
+		return self.error is None
+
+
+
+def compile(source, pragmas=None, renderer=None, filename=None, cache=None,
+			render=True, quiet=True, show_callgraph=False, capture=True, on_phase=None,
+			timings=None, size_report=None):
+	""" Compile a SDS-C program
+
+	Args:
+		source (str): Path of the main file; the text of the program
+			if it has more lines or `filename` is given.
+		pragmas (dict, optional): Pragmas given from outside the source
+		renderer (str, optional): Renderer to use (asm, simple or debug),
+			overrides the "renderer" pragma.
+		filename (str, optional): Name of the program given as text,
+			used in messages and to find relative includes.
+		cache (BuildCache, optional): Cache of the rendered outputs
+		render (bool): False to stop after parsing the statements
+		quiet (bool): Suppress the non-error logging
+		show_callgraph (bool): Print the call graph
+		capture (bool): Collect the printed messages in the result
+			instead of showing them
+		on_phase (callable, optional): Called as `on_phase(name, result)`
+			after each phase: 'read', 'resolved', 'processed', 'parsed'
+			and 'rendered'.
+		timings (Timings, optional): Measure the time and memory of the
+			phases (including each mutator) into this object.
+		size_report (SizeReport, optional): Collect the size of the
+			generated code of each user function into this object;
+			nothing is collected when the output is taken from the cache.
+
+	Returns:
+		CompileResult; check its `ok` or `error`, the exception is not raised.
+
+	"""
+
+	if filename is not None or '\n' in source:
+		result = CompileResult(filename or '<source>')
+		text = source
+	else:
+		result = CompileResult(source)
+		text = None
+
+	saved = (config.QUIET, config.SHOW_CALLGRAPH)
+	config.QUIET = quiet
+	config.SHOW_CALLGRAPH = show_callgraph
+
+	buf = io.StringIO()
+	out = contextlib.redirect_stdout(buf) if capture else contextlib.nullcontext()
+
+	if timings is not None:
+		result.timings = timings
+		timings.start()
+
+	result.size_report = size_report
+
+	try:
+		with out:
+			_compile(result, text, pragmas or {}, renderer, cache, render, on_phase, timings, size_report)
+
+	except Exception as e:
+		result.error = e
+
+	finally:
+		(config.QUIET, config.SHOW_CALLGRAPH) = saved
+
+		if timings is not None:
+			timings.stop()
+
+		if capture:
+			result.messages = buf.getvalue()
+
+	return result
+
+
+
+def _compile(result, text, pragmas_args, renderer, cache, render, on_phase, timings, size_report):
+	""" The phases of `compile()`, filling the result """
+
+	def phase(name):
+		if on_phase is not None:
+			on_phase(name, result)
+
+	def measure(name):
+		if timings is None:
+			return contextlib.nullcontext(Phase(name))
+
+		return timings.measure(name)
+
+	if not config.QUIET: print('Reading file:', result.main_file)
+
+	# read the file
+	with measure('read') as m:
+		dproc = DirectiveProcessor(result.main_file, pragmas_args, text)
+		m.items['chars'] = len(dproc.source)
+
+	result.source = dproc.source
+	result.includes = dproc.included_files  # filled by process()
+	result.missing_includes = dproc.missing_files
+	phase('read')
+
+	# ---------------- Resolve directives ------------------
+
+	if not config.QUIET: print('Resolving directives...')
+	# include files, resolve branching, find macros...
+	with measure('process') as m:
+		dproc.process()
+		m.items['chars'] = len(dproc.get_output())
+
+	pragmas = dproc.get_pragmas()
+
+	pragmas['main_file'] = result.main_file
+	pragmas['sdscp_version'] = VERSION
+
+	if 'name' not in pragmas.keys():
+		pragmas['name'] = result.main_file
+
+	if 'author' not in pragmas.keys():
+		try:
+			pragmas['author'] = getpass.getuser()
+		except Exception:
+			pass
+
+	result.resolved = dproc.get_output()
+	result.defines = dproc.get_defines()
+	result.pragmas = pragmas
+	phase('resolved')
+
+	# -------------------- Apply macros --------------------
+
+	if not config.QUIET: print('Applying macros...')
+	# perform macro replacements
+	with measure('apply_macros') as m:
+		dproc.apply_macros()
+		m.items['chars'] = len(dproc.get_output())
+
+	result.processed = dproc.get_output()
+	phase('processed')
+
+	rtype = renderer or pragmas.get('renderer', 'asm')
+	rtype = {'sds': 'simple', 'sds2': 'asm'}.get(rtype, rtype)  # old names
+	result.renderer = rtype
+
+	# look for the output in the cache
+	cache_key = None
+
+	if cache is not None and render:
+		# the renderer given as argument overrides the pragma, it must be in the key too
+		cache_key = BuildCache.key(VERSION, result.processed, dict(pragmas, renderer=rtype))
+		result.output = cache.get(cache_key)
+
+		if result.output is not None:
+			if not config.QUIET: print('Using cached output %s' % cache_key)
+			result.cached = True
+			return
+
+	if not config.QUIET: print('Tokenizing code...')
+	with measure('tokenize') as m:
+		tk = Tokenizer(result.processed)
+		result.tokens = tk.tokenize()
+		m.items['tokens'] = len(result.tokens)
+
+	with measure('parse') as m:
+		result.statements = statements.parse(result.tokens)
+		m.items['statements'] = len(result.statements)
+	phase('parsed')
+
+	if not render:
+		return
+
+	# perform tweaks to match some of SDS-C's broken syntax
+
+	if rtype == 'simple':
+		rndr = SimpleSdsRenderer(result.statements)
+	elif rtype == 'asm':
+		rndr = AsmSdsRenderer(result.statements)
+	elif rtype == 'debug':
+		rndr = CSyntaxRenderer(result.statements)
+	else:
+		raise Exception('Unknown renderer: "%s"' % rtype)
+
+	rndr.set_pragmas(pragmas)
+	rndr.timings = timings
+	rndr.size_report = size_report
+
+	if not config.QUIET: print('Rendering to SDS-C using "%s" renderer...' % rtype)
+	result.output = rndr.render()
+	phase('rendered')
+
+	if cache_key is not None:
+		cache.put(cache_key, result.output)
@@ -4,4 +4,8 @@ SHOW_CALLGRAPH = False
 
 # Pushing / popping two items produces less bytecode than a jump to trampoline
 # (if provided safe stack is disabled)
-PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT = 3
\ No newline at end of file
+PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT = 3
+
+# A decision tree jumping by __addr takes about log2(N) + 2 comparisons
+# (with the range check of safe stack), a chain of ifs N / 2 on average
+DISPATCH_TREE_MIN_TARGETS = 12
@@ -6,9 +6,10 @@ import time
 from collections import OrderedDict
 
 from sdscp_errors import *
-from utils import eval_expr
+from utils import eval_expr, OutputBuilder
 from readers import CodeReader
 from tokens import Token, T_Paren, ParenType
+from expressions import fold_items
 
 import config
 
@@ -20,6 +21,8 @@ class MacroReader(CodeReader):
 		filename (str, optional):
 			The name of the file it came from.
 			Defaults to None.
+		begin (int, optional): Start of the scanned part of the text
+		end (int, optional): End of the scanned part of the text
 
 	Attributes:
 		keep_macro_newlines (bool):
@@ -31,8 +34,15 @@ class MacroReader(CodeReader):
 
 	"""
 
-	def __init__(self, source, filename=None):
-		super().__init__(source, filename)
+	RE_DIRECTIVE = re.compile(r'#[a-zA-Z_][a-zA-Z0-9_]+(?:[^a-zA-Z0-9_]|$)')
+
+	RE_INLINE_WHITESPACE_RUN = re.compile(r'[ \t]+')
+
+	# code without directives, literals and comments
+	RE_PLAIN_CODE = re.compile(r'[^#"\'/\s]+')
+
+	def __init__(self, source, filename=None, begin=0, end=None):
+		super().__init__(source, filename, begin, end)
 
 		# opts
 		self.keep_macro_newlines = True
@@ -108,7 +118,7 @@ class MacroReader(CodeReader):
 				self.consume_block_comment()
 				break
 
-			if self.matches(r'[ \t]+'):
+			if self.matches(self.RE_INLINE_WHITESPACE_RUN):
 				self.consume()
 				continue
 
@@ -392,7 +402,7 @@ class MacroReader(CodeReader):
 		if self.has_end():
 			return False
 
-		return self.matches(r'^#[a-zA-Z_][a-zA-Z0-9_]+(?:[^a-zA-Z0-9_]|$)')
+		return self.matches(self.RE_DIRECTIVE)
 
 
 	def has_ifdef_directive(self):
@@ -512,7 +522,11 @@ class MacroReader(CodeReader):
 
 			if not self.has_directive():
 
-				if self.has_string():
+				m = self.matches(self.RE_PLAIN_CODE)
+				if m:
+					self.pos = m.end()
+
+				elif self.has_string():
 					self.consume_string()
 
 				elif self.has_char():
@@ -1180,6 +1194,262 @@ class D_Pragma(Token):
 
 
 
+class MacroExpander:
+	""" Applies macros to a source code, in a single pass
+
+	A macro is expanded where it's used: its replacement is read
+	as a nested input (a frame) before the rest of the text, so macros
+	in macros are expanded right away, without going over the whole
+	text again.
+
+	Each frame carries the macros it came from (hide-set); overloaded
+	variants of a macro are distinct. A macro expanded again in its own
+	replacement would never stop expanding, so that is reported
+	as an error. Macro arguments are
+	expanded before they are substituted, so a macro can be used in
+	arguments of the same macro.
+
+	Args:
+		defines (dict): The macros, {"name" -> D_Define[]}
+
+	Attributes:
+		defines (dict): The macros
+		frames (tuple[]): Stack of (reader, hide-set) being read.
+			The bottom frame is the source, the top one the
+			innermost replacement.
+		out (OutputBuilder): The output
+		strings (str[]): Adjacent string literals (without quotes)
+			waiting to be joined, None if there are none.
+
+	"""
+
+	RE_LEX = re.compile(
+		r''' # what follows after whitespace
+		(?P<identifier>[a-zA-Z_]\w*)
+		| (?P<string>")
+		| (?P<verbatim>[^a-zA-Z_"/\s]+)	# nothing to expand in here
+		''', re.A|re.X
+	)
+
+	def __init__(self, defines):
+		self.defines = defines
+		self.frames = []
+		self.out = None
+		self.strings = None
+
+
+	def expand(self, source, hidden=frozenset()):
+		""" Apply the macros
+
+		Args:
+			source (str): The source code
+			hidden (frozenset, optional): Hide-set of the source,
+				used when expanding macro arguments.
+
+		Returns:
+			The source code with all macros expanded
+
+		"""
+
+		self.frames = [(CodeReader(source), hidden)]
+		self.out = OutputBuilder()
+		self.strings = None
+
+		while True:
+
+			self._handle_whitespace()
+			if not self.frames:
+				break
+
+			(rd, hidden) = self.frames[-1]
+
+			m = rd.matches(self.RE_LEX)
+			kind = m.lastgroup if m else None
+
+			if kind == 'identifier':
+				rd.pos = m.end()
+				self._handle_identifier(m.group(), rd, hidden)
+
+			# "...", and "sdgfsd""JOINED"  "This too"
+			elif kind == 'string':
+				if self.strings is None:
+					self.strings = []
+
+				self.strings.append(rd.consume_string()[1:-1])  # drop quotes
+
+			elif kind == 'verbatim':
+				rd.pos = m.end()
+				self._emit(m.group())
+
+			# any char...
+			else:
+				self._emit(rd.consume())
+
+		self._flush_strings()
+
+		return self.out.get()
+
+
+	def _emit(self, text):
+		""" Add text to the output """
+
+		self._flush_strings()
+		self.out.add(text)
+
+
+	def _flush_strings(self):
+		""" Output the collected string literals, joined """
+
+		if self.strings is not None:
+			self.out.add('"%s"' % ''.join(self.strings))
+			self.strings = None
+
+
+	def _handle_whitespace(self):
+		""" Handle whitespace and comments
+
+		Keeps comments, indentation and up to two newlines (at once).
+		Whitespace after a string literal is discarded, so that it
+		can be joined with a string that follows.
+
+		Frames are left when their end is reached.
+
+		"""
+
+		j = ''
+
+		while self.frames:
+			rd = self.frames[-1][0]
+			j += rd.sweep()
+
+			if not rd.has_end():
+				break
+
+			self.frames.pop()
+
+		if len(j) > 0 and self.strings is None:
+			if '\n\n\n' in j:
+				j = re.sub(r'\n{2,}', '\n\n', j)
+
+			self.out.add(j)
+
+
+	def _handle_identifier(self, ident, rd, hidden):
+		""" Handle an identifier, expanding it if it's a macro
+
+		Args:
+			ident (str): The identifier, already consumed
+			rd (CodeReader): The reader after the identifier
+			hidden (frozenset): Hide-set of the reader's frame
+
+		"""
+
+		if ident not in self.defines:
+			self._emit(ident + rd.consume_inline_whitespace())  # give it back
+			return
+
+		macros = self.defines[ident]
+
+		# arguments of a macro at the end of a replacement follow
+		# in the enclosing frame
+		ident_whitesp = rd.consume_inline_whitespace()
+		while rd.has_end() and len(self.frames) > 1:
+			self.frames.pop()
+			rd = self.frames[-1][0]
+			ident_whitesp += rd.consume_inline_whitespace()
+
+		replacement = None
+
+		if rd.has_bracket():
+			# array macro
+
+			bracket = rd.consume_block()[1:-1]
+
+			for mm in macros:
+				if mm.is_arraylike():
+					if mm.can_use_args([bracket]):
+						replacement = mm.generate(self._expand_args([bracket], hidden))
+						break
+
+			if replacement is None:
+				self._emit(ident + ident_whitesp + '[%s]' % bracket)
+			else:
+				self._push(mm, replacement, hidden)
+
+		elif rd.has_paren():
+			# func macro
+
+			paren = rd.consume_block()
+
+			t = T_Paren(paren)
+			t.set_type(ParenType.ARGVALS)
+			t.tokenize()
+
+			args = []
+			for a in t.tokens:
+				args.append(a.value)
+
+			for mm in macros:
+				if mm.is_functionlike():
+					if mm.can_use_args(args):
+						replacement = mm.generate(self._expand_args(args, hidden))
+						break
+
+			if replacement is None:
+				raise SdscpSyntaxError(
+					'"%s" is a macro, but can\'t be used with arguments (%s)'
+					% (ident, ', '.join(args) ))
+			else:
+				self._push(mm, replacement, hidden)
+
+		else:
+			# const macro
+
+			for mm in macros:
+				if mm.can_use_args(None):
+					replacement = mm.generate(None)
+					break
+
+			if replacement is None:
+				self._emit(ident + ident_whitesp)
+			else:
+				self._push(mm, replacement + ident_whitesp, hidden)
+
+
+	def _expand_args(self, args, hidden):
+		""" Expand macros in macro arguments
+
+		Args:
+			args (str[]): The arguments
+			hidden (frozenset): Hide-set of the frame where
+				the macro was used
+
+		Returns:
+			List of the expanded arguments
+
+		"""
+
+		return [MacroExpander(self.defines).expand(a, hidden) for a in args]
+
+
+	def _push(self, macro, replacement, hidden):
+		""" Start reading a macro replacement
+
+		Args:
+			macro (D_Define): The expanded macro
+			replacement (str): Its replacement
+			hidden (frozenset): Hide-set of the frame where
+				the macro was used
+
+		"""
+
+		if macro in hidden:
+			raise SdscpSyntaxError('Recursion in macro definitions detected')
+
+		self.frames.append((CodeReader(replacement), hidden | {macro}))
+
+
+
 def _load_file(filename):
 	""" Load a file to string
 
@@ -1194,6 +1464,515 @@ def _load_file(filename):
 
 
 
+def _file_stamp(filename):
+	""" Get a stamp telling if a file has changed
+
+	Args:
+		filename (str): The file path
+
+	Returns:
+		(mtime in ns, size) of the file
+
+	"""
+
+	st = os.stat(filename)
+	return (st.st_mtime_ns, st.st_size)
+
+
+
+def _define_signature(macros):
+	""" Get a comparable signature of a macro's variants
+
+	Args:
+		macros (D_Define[]): Variants of the macro, None if it's not defined
+
+	Returns:
+		Tuple of the variants' #define texts, or None.
+
+	"""
+
+	if macros is None:
+		return None
+
+	return tuple(m.value for m in macros)
+
+
+
+class IncludeRecord:
+	""" The result of processing an included file, and what it depends on
+
+	Filled while the file is being processed; every read of the
+	processor state that isn't preceded by a write from the same
+	file remembers the state as it was when the file was included.
+
+	Args:
+		filename (str): Path of the included file
+
+	Attributes:
+		path (str): Absolute path of the file
+		cwd (str): The current directory, the includes are resolved
+			against it first
+		stamps (dict): {absolute path -> stamp} of the file and all it included
+		consulted (dict): {macro name -> signature} of macros tested
+			or expanded in conditions, as they were at the include
+		once_consulted (dict): {absolute path -> bool} whether the files
+			the file tried to include were marked with #pragma once
+		files_consulted (dict): {absolute path -> bool} whether the paths
+			tried when resolving the file's includes existed
+		depth (int): How deep the includes nested below the file
+		effects (tuple[]): Changes of the processor state made by the
+			file, in order: ('define', D_Define), ('pragma', name, value),
+			('once', absolute path), ('warning', message)
+		output (str): The directive-resolved output of the file
+
+	"""
+
+	def __init__(self, filename):
+		self.path = os.path.abspath(filename)
+		self.cwd = os.getcwd()
+		self.stamps = {self.path: _file_stamp(filename)}
+		self.consulted = {}
+		self.once_consulted = {}
+		self.files_consulted = {}
+		self.depth = 0
+		self.effects = []
+		self.output = None
+
+		self._written = set()
+		self._once_written = set()
+
+
+	def consult(self, name, defines):
+		""" Record a read of a macro """
+
+		if name not in self._written and name not in self.consulted:
+			self.consulted[name] = _define_signature(defines.get(name))
+
+
+	def consult_once(self, path, files_once):
+		""" Record a test of a #pragma once file """
+
+		if path not in self._once_written and path not in self.once_consulted:
+			self.once_consulted[path] = path in files_once
+
+
+	def consult_file(self, path, exists):
+		""" Record a test of a path an include could resolve to """
+
+		if path not in self.files_consulted:
+			self.files_consulted[path] = exists
+
+
+	def add_effect(self, effect):
+		""" Record a change of the processor state """
+
+		self.effects.append(effect)
+
+		if effect[0] == 'define':
+			self._written.add(effect[1].name)
+
+		elif effect[0] == 'pragma':
+			self._written.add('__%s__' % effect[1].upper())
+
+		elif effect[0] == 'once':
+			self._once_written.add(effect[1])
+
+
+	def add_nested(self, record, depth):
+		""" Merge dependencies of a nested include
+
+		Args:
+			record (IncludeRecord): Record of the nested include
+			depth (int): Depth of the nested include relative to this one
+
+		"""
+
+		self.stamps.update(record.stamps)
+		self.depth = max(self.depth, depth + record.depth)
+
+
+	def matches(self, defines, files_once):
+		""" Check if the record can be reused in the given state
+
+		Args:
+			defines (dict): The current macros
+			files_once (str[]): Files marked with #pragma once
+
+		Returns:
+			True if processing the file again would give the same result
+
+		"""
+
+		if os.getcwd() != self.cwd:
+			return False
+
+		for (name, sig) in self.consulted.items():
+			if _define_signature(defines.get(name)) != sig:
+				return False
+
+		for (path, once) in self.once_consulted.items():
+			if (path in files_once) != once:
+				return False
+
+		for (path, exists) in self.files_consulted.items():
+			if os.path.isfile(path) != exists:
+				return False
+
+		for (path, stamp) in self.stamps.items():
+			try:
+				if _file_stamp(path) != stamp:
+					return False
+			except OSError:
+				return False
+
+		return True
+
+
+
+class IncludeCache:
+	""" Cache of directive-resolved included files
+
+	A file included many times (also from different programs
+	processed in one run) is loaded and processed only once for
+	each combination of the macros its conditions consult.
+
+	The number of records is limited (a compile server lives long),
+	the files not used for the longest time are dropped first.
+
+	Args:
+		max_records (int): Limit of the number of records
+
+	Attributes:
+		records (dict): {absolute path -> IncludeRecord[]}, the least
+			recently used file first
+
+	"""
+
+	def __init__(self, max_records=512):
+		self.records = {}
+		self.max_records = max_records
+
+
+	def lookup(self, filename, defines, files_once, depth_left):
+		""" Find a record reusable in the given state
+
+		Args:
+			filename (str): Path of the included file
+			defines (dict): The current macros
+			files_once (str[]): Files marked with #pragma once
+			depth_left (int): How deep the includes can still nest
+
+		Returns:
+			The matching IncludeRecord, or None.
+
+		"""
+
+		path = os.path.abspath(filename)
+
+		for record in self.records.get(path, []):
+			if record.depth <= depth_left and record.matches(defines, files_once):
+				# mark as recently used
+				self.records[path] = self.records.pop(path)
+				return record
+
+		return None
+
+
+	def store(self, record):
+		""" Add a record, drop the outdated ones
+
+		Args:
+			record (IncludeRecord): The record
+
+		"""
+
+		stamp = record.stamps[record.path]
+
+		records = [
+			r for r in self.records.pop(record.path, [])
+			if r.stamps[r.path] == stamp
+		] + [record]
+
+		self.records[record.path] = records[-self.max_records:]
+
+		count = sum(len(rs) for rs in self.records.values())
+
+		while count > self.max_records:
+			oldest = next(iter(self.records))
+			count -= len(self.records.pop(oldest))
+
+
+	def clear(self):
+		""" Forget all records """
+
+		self.records.clear()
+
+
+
+# cache shared by all processors
+include_cache = IncludeCache()
+
+
+
+class _NotFoldable(Exception):
+	""" The #if condition can't be evaluated without expanding the macros """
+
+
+
+class IfCondition:
+	""" A #if condition, parsed once and evaluated against the macros
+
+	The condition is kept as a list of values (int), operators (str),
+	nested lists (parentheses) and references to macros: ("defined", name)
+	and ("macro", name). A referenced constant macro is evaluated from its
+	own parsed body, so the condition doesn't have to be expanded as text.
+
+	Conditions this can't handle (function-like macros, strings, a body
+	that isn't a single operand) are left to the macro expander.
+
+	Args:
+		text (str): The condition
+
+	Attributes:
+		text (str): The condition
+		tree (list): The parsed condition, None if it can't be parsed
+		results (tuple[]): Recent results, (deps, value), where deps is
+			a tuple of (macro name, signature) the value depends on
+
+	"""
+
+	RE_TOKEN = re.compile(r'''\s*(?:
+		(?P<number>0[xX][0-9A-Fa-f_]+|0[bB][01_]+|[0-9][0-9_]*)(?![\w])
+		| (?P<name>[A-Za-z_]\w*)
+		| (?P<op>&&|\|\||<<|>>|<=|>=|==|!=|[-+*/%&|^~!<>()])
+		)''', re.A|re.X
+	)
+
+	# results kept for each condition
+	MAX_RESULTS = 8
+
+	def __init__(self, text):
+		self.text = text
+		self.results = []
+
+		try:
+			self.tree = self._parse(text)
+		except _NotFoldable:
+			self.tree = None
+
+
+	def _parse(self, text):
+		tokens = []
+		pos = 0
+		text = text.strip()
+
+		while pos < len(text):
+			m = self.RE_TOKEN.match(text, pos)
+			if m is None:
+				raise _NotFoldable()
+
+			tokens.append((m.lastgroup, m.group(m.lastgroup)))
+			pos = m.end()
+
+		stack = [[]]
+		i = 0
+
+		while i < len(tokens):
+			(kind, value) = tokens[i]
+			i += 1
+
+			group = stack[-1]
+
+			if kind == 'number':
+				group.append(int(value.replace('_', ''), 0))
+
+			elif kind == 'name':
+				nxt = tokens[i][1] if i < len(tokens) else None
+
+				if value == 'defined':
+					if nxt == '(' and i + 2 < len(tokens) and tokens[i + 1][0] == 'name' and tokens[i + 2][1] == ')':
+						group.append(('defined', tokens[i + 1][1]))
+						i += 3
+					elif i < len(tokens) and tokens[i][0] == 'name':
+						group.append(('defined', nxt))
+						i += 1
+					else:
+						raise _NotFoldable()
+
+				elif nxt == '(':
+					raise _NotFoldable()  # function-like macro
+
+				else:
+					group.append(('macro', value))
+
+			elif value == '(':
+				stack.append([])
+
+			elif value == ')':
+				if len(stack) == 1:
+					raise _NotFoldable()
+
+				inner = stack.pop()
+				stack[-1].append(inner)
+
+			elif value in ('-', '+') and (not group or type(group[-1]) is str):
+				group.append('@' + value)  # unary
+
+			else:
+				group.append(value)
+
+		if len(stack) != 1:
+			raise _NotFoldable()
+
+		return stack[0]
+
+
+	def is_operand(self):
+		""" Check if the condition is a single operand, with unary operators
+
+		Only such a macro body can be evaluated separately from
+		the expression it is used in.
+
+		"""
+
+		if not self.tree:
+			return False
+
+		return all(type(item) is str for item in self.tree[:-1]) and type(self.tree[-1]) is not str
+
+
+	def evaluate(self, defines, consult):
+		""" Evaluate the condition
+
+		Args:
+			defines (dict): The current macros
+			consult (callable): Called with the name of each macro
+				the result depends on
+
+		Returns:
+			The value (int), or None if the condition has to be
+			evaluated by expanding the macros.
+
+		"""
+
+		if self.tree is None:
+			return None
+
+		for (deps, value) in self.results:
+			if all(_define_signature(defines.get(name)) == sig for (name, sig) in deps):
+				for (name, sig) in deps:
+					consult(name)
+
+				return value
+
+		deps = OrderedDict()
+
+		def lookup(name):
+			consult(name)
+			deps[name] = _define_signature(defines.get(name))
+			return defines.get(name)
+
+		try:
+			value = self._eval(self.tree, lookup, frozenset())
+		except _NotFoldable:
+			return None
+
+		self.results.insert(0, (tuple(deps.items()), value))
+		del self.results[self.MAX_RESULTS:]
+
+		return value
+
+
+	def _eval(self, group, lookup, hidden):
+		items = []
+
+		for item in group:
+			if type(item) is list:
+				item = self._eval(item, lookup, hidden)
+
+			elif type(item) is tuple:
+				(kind, name) = item
+
+				if kind == 'defined':
+					item = 1 if lookup(name) is not None else 0
+				else:
+					item = self._eval_macro(name, lookup, hidden)
+
+			items.append(item)
+
+		value = fold_items(items)
+		if value is None:
+			raise _NotFoldable()
+
+		return value
+
+
+	def _eval_macro(self, name, lookup, hidden):
+		macros = lookup(name)
+
+		if macros is None or name in hidden:
+			raise _NotFoldable()
+
+		for mm in macros:
+			if mm.can_use_args(None):
+				body = if_condition(mm.generate(None))
+
+				if not body.is_operand():
+					raise _NotFoldable()
+
+				return self._eval(body.tree, lookup, hidden | {name})
+
+		raise _NotFoldable()
+
+
+
+# parsed conditions, by their text
+_if_conditions = {}
+
+# limit of the parsed conditions kept, when reached they are all dropped
+MAX_IF_CONDITIONS = 4096
+
+
+def if_condition(text):
+	""" Get a parsed #if condition (IfCondition), parsing each text only once """
+
+	cond = _if_conditions.get(text)
+
+	if cond is None:
+		if len(_if_conditions) >= MAX_IF_CONDITIONS:
+			_if_conditions.clear()
+
+		cond = IfCondition(text)
+		_if_conditions[text] = cond
+
+	return cond
+
+
+
+class _ObservedDefines:
+	""" View of the macros reporting every lookup to include records,
+	used to expand #if conditions while recording an include """
+
+	def __init__(self, defines, recorders):
+		self.defines = defines
+		self.recorders = recorders
+
+
+	def __contains__(self, name):
+		for r in self.recorders:
+			r.consult(name, self.defines)
+
+		return name in self.defines
+
+
+	def __getitem__(self, name):
+		for r in self.recorders:
+			r.consult(name, self.defines)
+
+		return self.defines[name]
+
+
+
 class DirectiveProcessor:
 	""" Macro processor
 
@@ -1203,6 +1982,8 @@ class DirectiveProcessor:
 	Args:
 		main_file (str): The main source file to load
 		injected_pragmas (dict): Injected pragmas via command line (name: value)
+		source (str, optional): Text of the main file, if it's not to be
+			loaded from `main_file`
 
 	Attributes:
 		main_file (str): The main file path
@@ -1220,11 +2001,25 @@ class DirectiveProcessor:
 		keep_comments:
 			Config option, whether to keep comments in the source code.
 
+		include_cache (IncludeCache):
+			Cache of included files, None to always process them.
+
+		included_files (str[]):
+			Absolute paths of all the files included, also indirectly.
+
+		missing_files (str[]):
+			Absolute paths where the includes were looked for,
+			but which did not exist.
+
 	"""
 
-	def __init__(self, main_file, injected_pragmas = None):
+	# text that can go to the output as is - a piece of a line
+	# without directives, strings and comments, not ending with whitespace
+	RE_VERBATIM = re.compile(r'[^#"/\s]+(?:[ \t]+[^#"/\s]+)*')
+
+	def __init__(self, main_file, injected_pragmas = None, source = None):
 		self.main_file = main_file
-		self.source = _load_file(main_file)
+		self.source = source if source is not None else _load_file(main_file)
 		self.output = ''
 		self.defines = OrderedDict()
 		self.keep_comments = True
@@ -1235,7 +2030,12 @@ class DirectiveProcessor:
 			self.pragmas.update(injected_pragmas)
 			self.add_defines_for_pragmas(injected_pragmas)
 
-		self.files_once = []  # list of files included with pragma once
+		self.files_once = []  # absolute paths of the files included with pragma once
+
+		self.include_cache = include_cache
+		self.recorders = []  # records of the includes being processed
+		self.included_files = []
+		self.missing_files = []
 
 		self.defines['__TIME__'] = [D_Define('#define __TIME__ "%s"' % time.strftime("%H:%M:%S"))]
 		self.defines['__DATE__'] = [D_Define('#define __DATE__ "%s"' % time.strftime("%b %d %Y"))]
@@ -1310,32 +2110,244 @@ class DirectiveProcessor:
 		return self.output
 
 
-	def _handle_whitespace(self, rd):
-		out = ''
+	def _consult(self, name):
+		""" Note that a macro was tested, for the include records """
+
+		for r in self.recorders:
+			r.consult(name, self.defines)
+
+
+	def _expand_if_condition(self, d, rd):
+		""" Evaluate a #if condition by expanding the macros in it as text
+
+		Used for the conditions IfCondition can't evaluate.
+
+		Args:
+			d (D_If): The directive
+			rd (MacroReader): The reader, for errors
+
+		Returns:
+			The value of the condition
+
+		"""
+
+		def replace_defined(m):
+			name = m.group(1) or m.group(2)
+			self._consult(name)
+			return '1' if name in self.defines else '0'
+
+		# defined() is resolved first, the tested macro is not expanded
+		expr = re.sub(r'\bdefined\s*(?:\(\s*(\w+)\s*\)|\s(\w+))', replace_defined, d.expr)
+
+		# FIXME stupid hacks
+		old_output = self.output
+		old_defines = self.defines
+		self.output = expr
+		if self.recorders:
+			# note which macros the condition depends on
+			self.defines = _ObservedDefines(old_defines, self.recorders)
+
+		try:
+			self.apply_macros()
+		finally:
+			self.defines = old_defines
+
+		processed = self.output
+		self.output = old_output
+
+		# the same 32-bit arithmetic as the conditions evaluated directly
+		value = IfCondition(processed).evaluate({}, lambda name: None)
+		if value is not None:
+			return value
+
+		try:
+			return eval_expr(processed)
+		except Exception:
+			raise rd.error('ERROR parsing #if condition: %s' % d.expr)
+
+
+	def _apply_effect(self, effect):
+		""" Change the processor state, note it in the include records
+
+		Args:
+			effect (tuple): The change, see IncludeRecord.effects
+
+		"""
+
+		for r in self.recorders:
+			r.add_effect(effect)
+
+		kind = effect[0]
+
+		if kind == 'define':
+			d = effect[1]
+			if not d.name in self.defines:
+				self.defines[d.name] = []
+
+			self.defines[d.name].append(d)
+
+		elif kind == 'pragma':
+			(name, value) = effect[1:]
+
+			if name in self.pragmas.keys():
+				if not self.pragmas[name] == value:
+					if not config.QUIET:
+						print('!! Pragma %s overwritten from %s to %s!' % (
+							name,
+							self.pragmas[name],
+							value
+						))
+
+			self.pragmas[name] = value
+
+			self.add_defines_for_pragmas({name: value})
+
+		elif kind == 'once':
+			self.files_once.append(effect[1])
+
+		elif kind == 'warning':
+			print('\x1b[33mWARNING: %s\x1b[m' % effect[1])
+
+
+	def _is_file(self, filename):
+		""" Test a path an include could resolve to
+
+		The includes are resolved against the current directory
+		first, so the result is remembered by absolute path.
+
+		Args:
+			filename (str): The path
+
+		Returns:
+			True if the file exists
+
+		"""
+
+		exists = os.path.isfile(filename)
+
+		path = os.path.abspath(filename)
+		for r in self.recorders:
+			r.consult_file(path, exists)
+
+		if not exists:
+			self.missing_files.append(path)
+
+		return exists
+
+
+	def _include(self, filename, recursion_depth):
+		""" Process an included file, or reuse the cached result
+
+		Args:
+			filename (str): Path of the included file
+			recursion_depth (int): Include depth of this processor
+
+		Returns:
+			The directive-resolved output of the file
+
+		"""
+
+		cache = self.include_cache
+
+		if cache is not None:
+			record = cache.lookup(filename, self.defines, self.files_once, 15 - recursion_depth - 1)
+
+			if record is not None:
+				if not config.QUIET:
+					print('including %s (cached)' % filename)
+
+				for r in self.recorders:
+					for name in record.consulted.keys():
+						r.consult(name, self.defines)
+
+					for path in record.once_consulted.keys():
+						r.consult_once(path, self.files_once)
+
+					for (path, exists) in record.files_consulted.items():
+						r.consult_file(path, exists)
+
+					r.add_nested(record, 1)
+
+				for effect in record.effects:
+					self._apply_effect(effect)
+
+				self.included_files.extend(record.stamps.keys())
+				self.missing_files.extend(p for (p, e) in record.files_consulted.items() if not e)
+
+				return record.output
+
+		if not config.QUIET:
+			print('including %s' % filename)
+
+		# create a nested macro processor
+		mp = DirectiveProcessor(filename)
+
+		mp.files_once = self.files_once
+		mp.pragmas = self.pragmas
+		mp.defines = self.defines  # reference
+		mp.include_cache = cache
+		mp.recorders = self.recorders
+		mp.included_files = self.included_files
+		mp.missing_files = self.missing_files
+
+		self.included_files.append(os.path.abspath(filename))
+
+		if cache is None:
+			mp.process(recursion_depth + 1)
+			return mp.get_output()
+
+		record = IncludeRecord(filename)
+		self.recorders.append(record)
+		try:
+			# process the external file
+			mp.process(recursion_depth + 1)
+		finally:
+			self.recorders.pop()
+
+		record.output = mp.get_output()
+		cache.store(record)
+
+		for r in self.recorders:
+			r.add_nested(record, 1)
+
+		return record.output
+
+
+	def _handle_whitespace(self, rd, out):
+		""" Consume whitespace and comments, add what's kept
+		of them to the output
+
+		Args:
+			rd (MacroReader): The reader
+			out (OutputBuilder): The output
+
+		"""
+
 		# handle whitespace
 		if self.keep_comments:
 			# keep comments, indentation and up to two newlines (at once)
 			j = rd.sweep()
 			if len(j) > 0:
-				out += re.sub(r'\n{2,}', '\n\n', j)
+				if '\n\n\n' in j:
+					j = re.sub(r'\n{2,}', '\n\n', j)
+
+				out.add(j)
 
 		else:
 			# keep up to two newlines and indentation
 			j = rd.sweep()
 			if len(j) > 0:
 				if j.count('\n') >= 2:
-					out += '\n\n'
+					out.add('\n\n')
 
 				elif j.count('\n') == 1:
-					out += '\n'
+					out.add('\n')
 
 				c = len(j)-1
 				while c >= 0 and j[c] in ['\t', ' ']:
-					out += j[c]
+					out.add(j[c])
 					c -= 1
 
-		return out
-
 
 	def process(self, recursion_depth=0):
 		""" Extract all directives and resolve the # branching.
@@ -1358,11 +2370,11 @@ class DirectiveProcessor:
 		# used in conditional branching (#ifdef)
 		skip_dict = {}
 
-		out = ''
+		out = OutputBuilder()
 
 		while not rd.has_end():
 
-			out += self._handle_whitespace(rd)
+			self._handle_whitespace(rd, out)
 			if rd.has_end():
 				break
 
@@ -1383,15 +2395,20 @@ class DirectiveProcessor:
 				rd.pos =  skip_dict[rd.pos]
 				continue
 
+			# code without directives, strings and comments
+			m = rd.matches(self.RE_VERBATIM)
+			if m:
+				out.add(m.group())
+				rd.pos = m.end()
+				continue
+
 			# #define - add a new macro
 			if rd.has_define_directive():
 
 				s = rd.consume_define_directive()
 				d = D_Define(s)
-				if not d.name in self.defines:
-					self.defines[d.name] = []
 
-				self.defines[d.name].append(d)
+				self._apply_effect(('define', d))
 
 			# #define - add a new macro
 			elif rd.has_pragma_directive():
@@ -1400,20 +2417,9 @@ class DirectiveProcessor:
 				d = D_Pragma(s)
 
 				if d.name == 'once':
-					self.files_once.append(self.main_file)
+					self._apply_effect(('once', os.path.abspath(self.main_file)))
 				else:
-					if d.name in self.pragmas.keys():
-						if not self.pragmas[d.name] == d.value:
-							if not config.QUIET:
-								print('!! Pragma %s overwritten from %s to %s!' % (
-									d.name,
-									self.pragmas[d.name],
-									d.value
-								))
-
-					self.pragmas[d.name] = d.value
-					
-					self.add_defines_for_pragmas({d.name: d.value})
+					self._apply_effect(('pragma', d.name, d.value))
 
 
 			# #include - include external file
@@ -1422,43 +2428,30 @@ class DirectiveProcessor:
 				s = rd.consume_include_directive()
 				d = D_Include(s)
 
-				if not os.path.isfile(d.file):
+				if not self._is_file(d.file):
 					ff = os.path.join(os.path.dirname(self.main_file), d.file)
-					if not os.path.isfile(ff):
+					if not self._is_file(ff):
 						raise SdscpSyntaxError('Could not find included file: %s (nor %s)' % (d.file, ff))
 					else:
 						d.file = ff
 
-				if d.file in self.files_once:
-					# print('skipping %s (#pragma once)' % d.file)
-					continue  # end this cycle
-
-				if not config.QUIET: 
-					print('including %s' % d.file)
-
-				# create a nested macro processor
-				mp = DirectiveProcessor(d.file)
-
-				mp.files_once = self.files_once
-				mp.pragmas = self.pragmas
-				mp.defines = self.defines  # reference
+				# one file can be reached by different relative paths
+				path = os.path.abspath(d.file)
 
-				# # inject current defines
-				# mp.add_defines(self.defines)
+				for r in self.recorders:
+					r.consult_once(path, self.files_once)
 
-				# process the external file
-				mp.process(recursion_depth + 1)
-
-				out += mp.get_output()
+				if path in self.files_once:
+					# print('skipping %s (#pragma once)' % d.file)
+					continue  # end this cycle
 
-				# # add back defines collected from the external file
-				# self.add_defines( mp.get_defines() )
+				out.add(self._include(d.file, recursion_depth))
 
 			elif rd.has_warning_directive():
 				s = rd.consume_warning_directive()
 				d = D_Warning(s)
-				
-				print('\x1b[33mWARNING: %s\x1b[m' % d.msg.strip())
+
+				self._apply_effect(('warning', d.msg.strip()))
 
 			elif rd.has_error_directive():
 				pos = rd.pos;
@@ -1488,29 +2481,16 @@ class DirectiveProcessor:
 
 				test_passed = False
 				if ifX:
-					# FIXME stupid hacks
-					old_output = self.output
-					self.output = d.expr
-					#print("Expr to process = %s" % d.expr)
-					self.apply_macros()
-					processed = self.output
-					self.output = old_output
-					#print("Expr processed = %s" % processed)
-
-					# Replace defined(XYZ)
-					for name in self.defines.keys():
-						processed = processed.replace("defined(%s)" % name, "1")
-					processed = re.sub(r'defined\(.*?\)', '0', processed)
+					evaled = if_condition(d.expr).evaluate(self.defines, self._consult)
 
-					try:
-						evaled = eval_expr(processed)
-					except Exception:
-						raise rd.error('ERROR parsing #if condition: %s' % d.expr)
+					if evaled is None:
+						evaled = self._expand_if_condition(d, rd)
 
-					#print("Eval result = %s" % evaled)
 					test_passed = evaled != False and evaled != 0
 
 				else:
+					self._consult(d.name)
+
 					defined = (d.name in self.defines)
 					if defined:
 						# Warn about a possible bug after 1.8.0
@@ -1574,7 +2554,7 @@ class DirectiveProcessor:
 
 			# "..."
 			elif rd.has_string():
-				out += rd.consume_string()
+				out.add(rd.consume_string())
 
 			# //...
 			elif rd.has_inline_comment():
@@ -1586,17 +2566,15 @@ class DirectiveProcessor:
 
 			# any char...
 			else:
-				out += rd.consume()
-
-		out = out.strip()
+				out.add(rd.consume())
 
-		self.output = out
+		self.output = out.get().strip()
 
-		return out
+		return self.output
 
 
-	def apply_macros(self, recursion_depth=0):
-		""" Recursively apply macros to the output of `process()`
+	def apply_macros(self):
+		""" Apply macros to the output of `process()`
 
 		To be called after `process()`.
 		The `output` variable is overwritten by this.
@@ -1607,128 +2585,13 @@ class DirectiveProcessor:
 
 		"""
 
-		if recursion_depth > 10:
-			raise SdscpSyntaxError('Recursion in macro definitions detected')
-
 		if len(self.output) == 0:
 			print('There is no source code.')
 			return
 
-		rd = CodeReader(self.output)
-
-		applied_count = 0
-		out = ''
-		while not rd.has_end():
-
-			out += self._handle_whitespace(rd)
-			if rd.has_end():
-				break
-
-			if rd.has_identifier():
-
-				ident = rd.consume_identifier()
-				ident_whitesp = rd.consume_inline_whitespace()
-
-				if ident in self.defines:
-
-					macros = self.defines[ident]
-
-					replacement = None
-
-					if rd.has_bracket():
-						# array macro
-
-						bracket = rd.consume_block()[1:-1]
-
-						for mm in macros:
-							if mm.is_arraylike():
-								if mm.can_use_args([bracket]):
-									replacement = mm.generate([bracket])
-									break
-
-						if replacement is None:
-							out += ident + ident_whitesp
-							out += '[%s]' % bracket
-						else:
-							out += replacement
-							applied_count += 1
-
-					elif rd.has_paren():
-						# func macro
-
-						paren = rd.consume_block()
-
-						t = T_Paren(paren)
-						t.set_type(ParenType.ARGVALS)
-						t.tokenize()
-
-						args = []
-						for a in t.tokens:
-							args.append(a.value)
+		self.output = MacroExpander(self.defines).expand(self.output)
 
-						# print(args)
-
-						for mm in macros:
-							if mm.is_functionlike():
-								if mm.can_use_args(args):
-									replacement = mm.generate(args)
-									break
-
-						if replacement is None:
-							out += ident + ident_whitesp + paren
-							raise SdscpSyntaxError(
-								'"%s" is a macro, but can\'t be used with arguments (%s)'
-								% (ident, ', '.join(args) ))
-						else:
-							out += replacement
-							applied_count += 1
-
-					else:
-						# const macro
-
-						for mm in macros:
-							if mm.can_use_args(None):
-								replacement = mm.generate(None)
-								break
-
-						if replacement is None:
-							out += ident + ident_whitesp
-						else:
-							out += replacement + ident_whitesp
-							applied_count += 1
-
-				else:
-					out += ident + ident_whitesp  # give it back
-
-			# "...", and "sdgfsd""JOINED"  "This too"
-			elif rd.has_string():
-				# handle string concatenation
-				s = ''
-				while rd.has_string():
-					s += rd.consume_string()[1:-1]  # drop quotes
-					rd.sweep()
-
-				out += '"%s"' % s
-
-			# //...
-			elif rd.has_inline_comment():
-				rd.consume_line()
-
-			# /* ... */
-			elif rd.has_block_comment():
-				rd.consume_block_comment()
-
-			# any char...
-			else:
-				out += rd.consume()
-
-		self.output = out
-
-		# take care of macros in macros
-		if applied_count > 0:
-			return self.apply_macros(recursion_depth + 1)
-		else:
-			return out
+		return self.output
 
 
 	def get_pragmas(self):
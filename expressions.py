@@ -90,6 +90,8 @@ class Expression(SyntaxNode):
 
 	"""
 
+	__slots__ = ()
+
 	def update_callgraph(self, func: str, callgraph: dict):
 		""" func - the calling function, callgraph-dict to update """
 		pass
@@ -111,6 +113,8 @@ class E_Group(Expression):
 
 	"""
 
+	__slots__ = ('children',)
+
 	def __init__(self, children=None):
 		super().__init__()
 
@@ -156,6 +160,8 @@ class E_Literal(Expression):
 
 	"""
 
+	__slots__ = ('token', 'value')
+
 	def __init__(self, token):
 		super().__init__()
 
@@ -191,6 +197,8 @@ class E_Operator(Expression):
 
 	"""
 
+	__slots__ = ('value',)
+
 	def __init__(self, value):
 		super().__init__()
 
@@ -218,6 +226,8 @@ class E_Variable(Expression):
 
 	"""
 
+	__slots__ = ('name', 'index')
+
 	def __init__(self, name, index=None):
 		super().__init__()
 
@@ -265,6 +275,8 @@ class E_Call(Expression):
 
 	"""
 
+	__slots__ = ('name', 'args')
+
 	def __init__(self, name, args=None):
 		super().__init__()
 		if args is None:
@@ -289,3 +301,174 @@ class E_Call(Expression):
 	def __str__(self):
 		s = self.name + '(%s)' % ', '.join( [str(a) for a in self.args] )
 		return s
+
+
+
+### CONSTANT FOLDING ###
+# Evaluates constant expressions directly on the expression tree,
+# with the 32-bit integer arithmetic of SDS-C. The interpreter uses
+# the same arithmetic.
+
+def _wrap(value):
+	""" Wrap a number to the 32-bit signed range of SDS-C variables """
+
+	return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _div(a, b):
+	""" Integer division rounding towards zero, like in C """
+
+	if b == 0:
+		raise SdsRuntimeError('Division by zero')
+
+	q = abs(a) // abs(b)
+	return q if (a < 0) == (b < 0) else -q
+
+
+def _mod(a, b):
+	""" Remainder with the sign of the dividend, like in C """
+
+	return a - b * _div(a, b)
+
+
+# the results are wrapped to 32 bits by fold_items()
+_UNARY_OPS = {
+	'@+': lambda a: a,
+	'@-': lambda a: -a,
+	'!': lambda a: int(a == 0),
+	'~': lambda a: ~a,
+}
+
+# binary operators by precedence, highest first
+_BINARY_OPS = [
+	{
+		'*': lambda a, b: a * b,
+		'/': lambda a, b: _div(a, b) if b != 0 else None,
+		'%': lambda a, b: _mod(a, b) if b != 0 else None,
+	},
+	{'+': lambda a, b: a + b, '-': lambda a, b: a - b},
+	{'<<': lambda a, b: a << (b & 31), '>>': lambda a, b: a >> (b & 31)},
+	{
+		'<': lambda a, b: int(a < b), '<=': lambda a, b: int(a <= b),
+		'>': lambda a, b: int(a > b), '>=': lambda a, b: int(a >= b),
+	},
+	{'==': lambda a, b: int(a == b), '!=': lambda a, b: int(a != b)},
+	{'&': lambda a, b: a & b},
+	{'^': lambda a, b: a ^ b},
+	{'|': lambda a, b: a | b},
+	{'&&': lambda a, b: int(a != 0 and b != 0)},
+	{'||': lambda a, b: int(a != 0 or b != 0)},
+]
+
+
+def fold_expr(e, wrap=True):
+	""" Evaluate a constant expression
+
+	Works on groups, number literals and operators; anything else
+	(a variable, a call, a string) makes the expression non-constant.
+
+	Args:
+		e (Expression): The expression to evaluate
+		wrap (bool): Wrap the values to 32 bits like SDS-C does;
+			False to get the exact value, e.g. to check it fits
+
+	Returns:
+		The value (int), or None if the expression is not constant
+		(or it can't be evaluated at compile time, eg. division by zero)
+
+	"""
+
+	if isinstance(e, E_Literal):
+		if not e.is_number():
+			return None
+
+		try:
+			val = int(e.value.replace('_', ''), 0)
+		except ValueError:
+			return None
+
+		return _wrap(val) if wrap else val
+
+	if not isinstance(e, E_Group):
+		return None
+
+	items = []
+	for c in e.children:
+		if isinstance(c, E_Operator):
+			items.append(c.value)
+			continue
+
+		val = fold_expr(c, wrap)
+		if val is None:
+			return None
+
+		items.append(val)
+
+	return fold_items(items, wrap)
+
+
+def fold_items(items, wrap=True):
+	""" Evaluate a flat list of values (int) and operators (str)
+
+	Unary operators are "@+", "@-", "!" and "~", binary operators
+	have the precedence they have in C.
+
+	Args:
+		items (list): The values and operators
+		wrap (bool): Wrap the results to 32 bits (see fold_expr)
+
+	Returns:
+		The value (int), or None if it's not a valid expression
+		or it can't be evaluated.
+
+	"""
+
+	# unary operators, right to left
+	out = []
+	for item in reversed(items):
+		if item in _UNARY_OPS:
+			if not out or type(out[-1]) is not int:
+				return None
+
+			out[-1] = _UNARY_OPS[item](out[-1])
+
+			if wrap:
+				out[-1] = _wrap(out[-1])
+		else:
+			out.append(item)
+
+	out.reverse()
+
+	if not out:
+		return None
+
+	# binary operators, by precedence, left to right
+	for ops in _BINARY_OPS:
+		if len(out) == 1:
+			break
+
+		items = out
+		out = [items[0]]
+
+		for i in range(1, len(items), 2):
+			oper = items[i]
+			if i + 1 >= len(items) or type(oper) is not str:
+				return None
+
+			if oper in ops:
+				if type(out[-1]) is not int or type(items[i + 1]) is not int:
+					return None
+
+				val = ops[oper](out[-1], items[i + 1])
+				if val is None:
+					return None
+
+				out[-1] = _wrap(val) if wrap else val
+			else:
+				out.append(oper)
+				out.append(items[i + 1])
+
+	if len(out) != 1 or type(out[0]) is not int:
+		return None
+
+	return out[0]
@@ -0,0 +1,731 @@
+#!/bin/env python3
+
+import re
+
+from sdscp_errors import *
+from expressions import _wrap, _div, _mod
+
+
+def _unescape(literal):
+	""" Get the text of a quoted string literal """
+
+	escapes = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0'}
+
+	return re.sub(r'\\(.)', lambda m: escapes.get(m.group(1), m.group(1)), literal[1:-1])
+
+
+
+class _Stop(Exception):
+	""" Raised to stop the execution """
+
+	def __init__(self, reason):
+		super().__init__(reason)
+		self.reason = reason
+
+
+
+class Interpreter:
+	""" Interpreter of the SDS-C code the renderers produce
+
+	Runs a rendered program without the hardware, to count the statements
+	it executes and to compare the behavior of differently compiled programs.
+
+	Supports the subset SDSCP generates: global `var`s, the `main` block
+	(and other argument-less routines of the simple renderer), `label`,
+	`goto`, `if` / `else`, assignments (with compound operators), the
+	ram / sys / text / share arrays and calls of builtin functions.
+
+	Builtin functions are stubbed: `echo()` collects its arguments as a line
+	of output, `wait()` adds to the waited time, others return 0.
+
+	Numbers are 32-bit signed integers, operators have the C precedence.
+
+	Args:
+		source (str): The rendered SDS-C program
+		builtins (dict, optional): {name -> function(interpreter, args)}
+			overriding or adding the builtin stubs; the function returns
+			the value of the call.
+
+	Attributes:
+		variables (dict): Values of the global variables
+		arrays (dict): {"ram"/"sys"/"text"/"share" -> {index -> value}}
+		output (str[]): The lines printed by echo()
+		wait_time (int): Sum of the wait() times
+		steps (int): Number of executed statements
+		statements (dict): Executed statements by kind
+			("assign", "if", "goto", "label", "call", "return")
+		label_hits (dict): How many times each label was reached
+		builtin_calls (dict): How many times each builtin was called
+		max_stack_depth (int): The deepest the stack got, in values
+		stop_reason (str): Why the last `run()` stopped
+
+	"""
+
+	# names of the builtin arrays
+	ARRAYS = ('ram', 'sys', 'text', 'share')
+
+	# stack pointer variable of the asm renderer, followed for the stack depth
+	STACK_POINTER = '__sp'
+
+	# labels the asm renderer puts at the start of the main loop, to the
+	# reset after an error, and to the idle loop of a halted program (end())
+	LABEL_MAIN_LOOP = '__main_loop'
+	LABEL_RESET = '__reset'
+	LABEL_HALT = '__halt_loop'
+
+	KINDS = ('assign', 'if', 'goto', 'label', 'call', 'return')
+
+	RE_TOKEN = re.compile(r'''
+		(?P<space>\s+|//[^\n]*|/\*.*?\*/)
+		| (?P<string>'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*")
+		| (?P<number>0x[0-9A-Fa-f_]+|0b[01_]+|[0-9][0-9_]*)
+		| (?P<name>[A-Za-z_]\w*)
+		| (?P<op><<=|>>=|&&|\|\||<<|>>|<=|>=|==|!=|\+=|-=|\*=|/=|%=|&=|\|=|\^=|\+\+|--|[-+*/%&|^~!<>=(){}\[\];:,])
+	''', re.X | re.S)
+
+	# binary operators by precedence, lowest first
+	BINARY = [
+		{'||': None},
+		{'&&': None},
+		{'|': lambda a, b: a | b},
+		{'^': lambda a, b: a ^ b},
+		{'&': lambda a, b: a & b},
+		{'==': lambda a, b: int(a == b), '!=': lambda a, b: int(a != b)},
+		{
+			'<': lambda a, b: int(a < b), '<=': lambda a, b: int(a <= b),
+			'>': lambda a, b: int(a > b), '>=': lambda a, b: int(a >= b),
+		},
+		{'<<': lambda a, b: _wrap(a << (b & 31)), '>>': lambda a, b: a >> (b & 31)},
+		{'+': lambda a, b: _wrap(a + b), '-': lambda a, b: _wrap(a - b)},
+		{'*': lambda a, b: _wrap(a * b), '/': lambda a, b: _wrap(_div(a, b)), '%': _mod},
+	]
+
+	ASSIGN_OPS = {
+		'=': None,
+		'+=': '+', '-=': '-', '*=': '*', '/=': '/', '%=': '%',
+		'&=': '&', '|=': '|', '^=': '^', '<<=': '<<', '>>=': '>>',
+	}
+
+
+	def __init__(self, source, builtins=None):
+		self.variables = {}
+		self.arrays = {name: {} for name in self.ARRAYS}
+
+		self.builtins = {
+			'echo': Interpreter._echo,
+			'wait': Interpreter._wait,
+		}
+
+		if builtins is not None:
+			self.builtins.update(builtins)
+
+		self._binary = {}
+		for level in self.BINARY:
+			self._binary.update(level)
+
+		# instructions: (kind, function(pc) -> next pc)
+		self._code = []
+		self._routines = {}
+		self._labels = {}
+		self._used = set()
+		self._initial = {}
+
+		self._parse(source)
+		self.reset()
+
+
+	def reset(self):
+		""" Clear the state and the statistics, keep the program """
+
+		for name in self.variables.keys():
+			self.variables[name] = self._initial.get(name, 0)
+
+		for arr in self.arrays.values():
+			arr.clear()
+
+		self.output = []
+		self.wait_time = 0
+		self.steps = 0
+		self.statements = {k: 0 for k in self.KINDS}
+		self.label_hits = {}
+		self.builtin_calls = {}
+		self.max_stack_depth = 0
+		self.stop_reason = None
+
+		self._call_stack = []
+		self._stack_base = None
+		self._loops = 0
+
+
+	# ------------------------- execution -------------------------
+
+	def run(self, loops=1, max_steps=10000000):
+		""" Run the program from the start of main
+
+		Args:
+			loops (int): Number of passes of the main loop to run
+			max_steps (int): Limit of executed statements
+
+		Returns:
+			Why it stopped: "loops" (the passes were done), "halt" (the
+			program called end()), "reset" (an error jumped to the reset),
+			"end" (main returned) or "max_steps".
+
+		Raises:
+			SdsRuntimeError: on an error like division by zero; the stop
+				reason is then "error".
+
+		"""
+
+		if 'main' not in self._routines:
+			raise SdsRuntimeError('The program has no main')
+
+		self._max_loops = loops
+
+		code = self._code
+		kinds = [self.KINDS.index(k) if k is not None else None for (k, fn) in code]
+		fns = [fn for (k, fn) in code]
+		counts = [0] * len(self.KINDS)
+
+		pc = self._routines['main']
+		steps = 0
+
+		try:
+			while steps < max_steps:
+				k = kinds[pc]
+				if k is not None:
+					counts[k] += 1
+					steps += 1
+
+				pc = fns[pc](pc)
+
+			self.stop_reason = 'max_steps'
+
+		except _Stop as e:
+			self.stop_reason = e.reason
+
+		except SdsRuntimeError:
+			self.stop_reason = 'error'
+			raise
+
+		finally:
+			self.steps += steps
+			for (i, k) in enumerate(self.KINDS):
+				self.statements[k] += counts[i]
+
+		return self.stop_reason
+
+
+	def _hit_label(self, name):
+		self.label_hits[name] = self.label_hits.get(name, 0) + 1
+
+		if name == self.LABEL_MAIN_LOOP:
+			# the main loop is entered once before the first pass
+			self._loops = self.label_hits[name] - 1
+			if self._loops >= self._max_loops:
+				raise _Stop('loops')
+
+		elif name == self.LABEL_HALT:
+			raise _Stop('halt')
+
+		elif name == self.LABEL_RESET and self.label_hits[name] > 1:
+			raise _Stop('reset')
+
+
+	def _end_of_main(self):
+		self._loops += 1
+		if self._loops >= self._max_loops:
+			raise _Stop('end')
+
+		return self._routines['main']
+
+
+	def _call(self, name, args):
+		""" Call a builtin """
+
+		self.builtin_calls[name] = self.builtin_calls.get(name, 0) + 1
+
+		fn = self.builtins.get(name)
+		if fn is None:
+			return 0
+
+		rv = fn(self, args)
+		return 0 if rv is None else rv
+
+
+	def _echo(self, args):
+		self.output.append(''.join(str(a) for a in args))
+
+
+	def _wait(self, args):
+		if len(args) > 0:
+			self.wait_time += args[0]
+
+
+	def _set_stack_pointer(self, value):
+		self.variables[self.STACK_POINTER] = value
+
+		if self._stack_base is None:
+			self._stack_base = value
+		else:
+			self.max_stack_depth = max(self.max_stack_depth, self._stack_base - value)
+
+
+	# ------------------------- statistics -------------------------
+
+	def stats(self):
+		""" Get the statistics of the execution
+
+		Returns:
+			dict, JSON-serializable
+
+		"""
+
+		return {
+			'stop_reason': self.stop_reason,
+			'steps': self.steps,
+			'statements': dict(self.statements),
+			'labels': dict(self.label_hits),
+			'builtins': dict(self.builtin_calls),
+			'max_stack_depth': self.max_stack_depth,
+			'wait_time': self.wait_time,
+			'output_lines': len(self.output),
+		}
+
+
+	def report(self, labels=False):
+		""" Format the statistics as text
+
+		Args:
+			labels (bool): Include the hits of each label
+
+		"""
+
+		lines = [
+			'Stopped by:       %s' % self.stop_reason,
+			'Statements:       %d' % self.steps,
+		]
+
+		for k in self.KINDS:
+			lines.append('  %-16s%d' % (k, self.statements[k]))
+
+		lines.append('Max stack depth:  %d' % self.max_stack_depth)
+		lines.append('Waited:           %d ms' % self.wait_time)
+
+		if self.builtin_calls:
+			lines.append('Builtin calls:    ' + ', '.join(
+				'%s %d' % (n, c) for (n, c) in sorted(self.builtin_calls.items())))
+
+		if labels:
+			lines.append('Label hits:')
+			for (name, hits) in sorted(self.label_hits.items(), key=lambda x: -x[1]):
+				lines.append('  %-30s%d' % (name, hits))
+
+		return '\n'.join(lines)
+
+
+	# ------------------------- parsing -------------------------
+
+	def _parse(self, source):
+		""" Parse the program into instructions """
+
+		self._tokens = self._lex(source)
+		self._pos = 0
+
+		pending = []  # gotos to link: (instruction index, routine, label)
+
+		while not self._at_end():
+			if self._accept('var'):
+				self._parse_var(None)
+				continue
+
+			name = self._expect_kind('name')
+			if self._accept('('):
+				self._expect(')')
+
+			self._routine = name
+			self._pending = pending
+			self._routines[name] = len(self._code)
+			self._labels[name] = {}
+
+			self._parse_block()
+
+			# falling off the end of a routine returns
+			if name == 'main':
+				self._emit(None, lambda pc: self._end_of_main())
+			else:
+				self._emit(None, self._make_return())
+
+		for (index, routine, label) in pending:
+			if label not in self._labels[routine]:
+				raise SdscpSyntaxError('Undefined label "%s" in %s' % (label, routine))
+
+			target = self._labels[routine][label]
+			self._code[index] = ('goto', lambda pc, t=target: t)
+
+		undeclared = self._used - set(self.variables.keys())
+		if undeclared:
+			raise SdscpSyntaxError('Undeclared variables: %s' % ', '.join(sorted(undeclared)))
+
+
+	def _lex(self, source):
+		tokens = []
+		pos = 0
+		line = 1
+
+		while pos < len(source):
+			m = self.RE_TOKEN.match(source, pos)
+			if m is None:
+				raise SdscpSyntaxError('Unexpected "%s" on line %d' % (source[pos:pos + 10], line))
+
+			kind = m.lastgroup
+			text = m.group()
+
+			if kind != 'space':
+				tokens.append((kind, text, line))
+
+			line += text.count('\n')
+			pos = m.end()
+
+		return tokens
+
+
+	def _at_end(self):
+		return self._pos >= len(self._tokens)
+
+
+	def _peek(self, offset=0):
+		if self._pos + offset >= len(self._tokens):
+			return (None, None, None)
+
+		return self._tokens[self._pos + offset]
+
+
+	def _error(self, message):
+		(kind, text, line) = self._peek()
+		if line is None:
+			raise SdscpSyntaxError('%s at the end of the program' % message)
+
+		raise SdscpSyntaxError('%s, found "%s" on line %d' % (message, text, line))
+
+
+	def _accept(self, text):
+		(kind, t, line) = self._peek()
+		if t == text and kind != 'string':
+			self._pos += 1
+			return True
+
+		return False
+
+
+	def _expect(self, text):
+		if not self._accept(text):
+			self._error('Expected "%s"' % text)
+
+
+	def _expect_kind(self, kind):
+		(k, text, line) = self._peek()
+		if k != kind:
+			self._error('Expected %s' % kind)
+
+		self._pos += 1
+		return text
+
+
+	def _emit(self, kind, fn):
+		self._code.append((kind, fn))
+		return len(self._code) - 1
+
+
+	def _parse_var(self, routine):
+		""" Parse a declaration, after "var" """
+
+		while True:
+			name = self._expect_kind('name')
+			self.variables.setdefault(name, 0)
+
+			if self._accept('='):
+				value = self._parse_expr()
+
+				if routine is None:
+					# a global initializer, evaluated now
+					self._initial[name] = _wrap(value())
+				else:
+					self._emit('assign', self._make_assign(name, None, '=', value))
+
+			if not self._accept(','):
+				break
+
+		self._expect(';')
+
+
+	def _parse_block(self):
+		self._expect('{')
+
+		while not self._accept('}'):
+			if self._at_end():
+				self._error('Expected "}"')
+
+			self._parse_statement()
+
+
+	def _parse_statement(self):
+		(kind, text, line) = self._peek()
+
+		if text == '{' and kind == 'op':
+			self._parse_block()
+
+		elif text == ';' and kind == 'op':
+			self._pos += 1
+
+		elif kind != 'name':
+			self._error('Expected a statement')
+
+		elif text == 'var':
+			self._pos += 1
+			self._parse_var(self._routine)
+
+		elif text == 'label':
+			self._pos += 1
+			name = self._expect_kind('name')
+			self._expect(':')
+
+			if name in self._labels[self._routine]:
+				raise SdscpSyntaxError('Duplicate label "%s" on line %d' % (name, line))
+
+			self._labels[self._routine][name] = len(self._code)
+			self._emit('label', lambda pc, n=name: self._hit_label(n) or pc + 1)
+
+		elif text == 'goto':
+			self._pos += 1
+			name = self._expect_kind('name')
+			self._expect(';')
+
+			index = self._emit('goto', None)
+			self._pending.append((index, self._routine, name))
+
+		elif text == 'if':
+			self._pos += 1
+			self._parse_if()
+
+		elif text == 'return':
+			self._pos += 1
+			self._expect(';')
+			self._emit('return', self._make_return())
+
+		elif self._peek(1)[1] == '(':
+			self._pos += 1
+			self._parse_call_statement(text)
+
+		else:
+			self._parse_assign()
+
+
+	def _parse_if(self):
+		self._expect('(')
+		cond = self._parse_expr()
+		self._expect(')')
+
+		branch = self._emit('if', None)
+		self._parse_statement()
+
+		if self._accept('else'):
+			skip = self._emit(None, None)
+			else_start = len(self._code)
+
+			self._parse_statement()
+
+			end = len(self._code)
+			self._code[skip] = (None, lambda pc, t=end: t)
+		else:
+			else_start = len(self._code)
+
+		self._code[branch] = ('if', lambda pc, t=else_start: pc + 1 if cond() else t)
+
+
+	def _parse_call_statement(self, name):
+		args = self._parse_args()
+		self._expect(';')
+
+		self._emit('call', lambda pc: self._call_statement(name, args, pc))
+
+
+	def _call_statement(self, name, args, pc):
+		if name in self._routines:
+			self._call_stack.append(pc + 1)
+			return self._routines[name]
+
+		self._call(name, [a() for a in args])
+		return pc + 1
+
+
+	def _make_return(self):
+		def ret(pc):
+			if len(self._call_stack) == 0:
+				return self._end_of_main()
+
+			return self._call_stack.pop()
+
+		return ret
+
+
+	def _parse_assign(self):
+		name = self._expect_kind('name')
+
+		index = None
+		if self._accept('['):
+			index = self._parse_expr()
+			self._expect(']')
+
+		(kind, op, line) = self._peek()
+
+		if op in ('++', '--'):
+			self._pos += 1
+			value = lambda: 1
+			op = '+=' if op == '++' else '-='
+
+		elif op in self.ASSIGN_OPS and kind == 'op':
+			self._pos += 1
+			value = self._parse_expr()
+
+		else:
+			self._error('Expected an assignment')
+
+		self._expect(';')
+		self._emit('assign', self._make_assign(name, index, op, value))
+
+
+	def _make_assign(self, name, index, op, value):
+		""" Make an assignment instruction """
+
+		binop = self._binary.get(self.ASSIGN_OPS[op])
+
+		if index is not None:
+			if name not in self.ARRAYS:
+				raise SdscpSyntaxError('Unknown array "%s"' % name)
+
+			arr = self.arrays[name]
+
+			if binop is None:
+				def assign(pc):
+					arr[index()] = _wrap(value())
+					return pc + 1
+			else:
+				def assign(pc):
+					i = index()
+					arr[i] = _wrap(binop(arr.get(i, 0), value()))
+					return pc + 1
+
+			return assign
+
+		self._used.add(name)
+		variables = self.variables
+
+		if name == self.STACK_POINTER:
+			setter = self._set_stack_pointer
+		else:
+			setter = lambda v: variables.__setitem__(name, v)
+
+		if binop is None:
+			def assign(pc):
+				setter(_wrap(value()))
+				return pc + 1
+		else:
+			def assign(pc):
+				setter(_wrap(binop(variables[name], value())))
+				return pc + 1
+
+		return assign
+
+
+	def _parse_args(self):
+		self._expect('(')
+
+		args = []
+		if not self._accept(')'):
+			while True:
+				args.append(self._parse_expr(allow_string=True))
+				if self._accept(')'):
+					break
+				self._expect(',')
+
+		return args
+
+
+	def _parse_expr(self, level=0, allow_string=False):
+		""" Parse an expression into a function computing its value """
+
+		if allow_string and self._peek()[0] == 'string' and self._peek(1)[1] in (',', ')'):
+			s = _unescape(self._expect_kind('string'))
+			return lambda: s
+
+		if level == len(self.BINARY):
+			return self._parse_unary()
+
+		left = self._parse_expr(level + 1)
+
+		while True:
+			(kind, op, line) = self._peek()
+			if kind != 'op' or op not in self.BINARY[level]:
+				return left
+
+			self._pos += 1
+			right = self._parse_expr(level + 1)
+
+			if op == '&&':
+				left = lambda a=left, b=right: int(bool(a()) and bool(b()))
+			elif op == '||':
+				left = lambda a=left, b=right: int(bool(a()) or bool(b()))
+			else:
+				fn = self.BINARY[level][op]
+				left = lambda a=left, b=right, fn=fn: fn(a(), b())
+
+
+	def _parse_unary(self):
+		(kind, text, line) = self._peek()
+
+		if kind == 'op' and text in ('-', '+', '!', '~'):
+			self._pos += 1
+			inner = self._parse_unary()
+
+			if text == '-':
+				return lambda: _wrap(-inner())
+			if text == '!':
+				return lambda: int(inner() == 0)
+			if text == '~':
+				return lambda: ~inner()
+			return inner
+
+		if kind == 'number':
+			self._pos += 1
+			value = _wrap(int(text.replace('_', ''), 0))
+			return lambda: value
+
+		if kind == 'op' and text == '(':
+			self._pos += 1
+			inner = self._parse_expr()
+			self._expect(')')
+			return inner
+
+		if kind == 'name':
+			self._pos += 1
+
+			if self._peek()[1] == '(':
+				args = self._parse_args()
+				return lambda: self._call(text, [a() for a in args])
+
+			if self._accept('['):
+				index = self._parse_expr()
+				self._expect(']')
+
+				if text not in self.ARRAYS:
+					raise SdscpSyntaxError('Unknown array "%s" on line %d' % (text, line))
+
+				arr = self.arrays[text]
+				return lambda: arr.get(index(), 0)
+
+			self._used.add(text)
+			variables = self.variables
+			return lambda: variables[text]
+
+		self._error('Expected a value')
@@ -30,8 +30,14 @@ class Mutator:
 	Takes source code and generates some other code,
 	applying transformations.
 
+	Attributes:
+		tag_origins (bool): Mark the generated statements with the user
+			function they come from, for the size report (set by the renderer)
+
 	"""
 
+	tag_origins = False
+
 
 	def read_pragmas(self, pragmas):
 		""" The mutator here can configure itself based on pragmas """
@@ -308,6 +314,78 @@ class M_CollectVars(Mutator):
 
 
 
+class FunctionMeta:
+	""" What M_Grande collects about a user function
+
+	Attributes:
+		labels (set): Labels inside the function
+		gotos (set): Labels the gotos inside the function jump to
+		calls (set): Names of the called functions
+		changed_tmps (str[]): Temporary variables modified within the
+			scope of the function, to be pushed / popped at the
+			beginning / end of the function
+		local_tmp_dict (dict): Translations of "local" variable names
+			to the temporary variables used instead
+		tail_calls (tuple[]): (label, callee) of the tail calls to other
+			functions; the label starts the code leaving the function
+		tail_recursive (bool): The function tail-calls itself
+
+	"""
+
+	__slots__ = ('labels', 'gotos', 'calls', 'changed_tmps', 'local_tmp_dict', 'tail_calls', 'tail_recursive')
+
+	def __init__(self):
+		self.labels = set()
+		self.gotos = set()
+		self.calls = set()
+		self.changed_tmps = []
+		self.local_tmp_dict = {}
+		self.tail_calls = []
+		self.tail_recursive = False
+
+
+
+class LoopMeta:
+	""" Labels of a loop or switch, for break and continue
+
+	Args:
+		l_break (str): Label after the loop
+		l_continue (str, optional): Label of the next iteration,
+			None for switch
+
+	"""
+
+	__slots__ = ('l_break', 'l_continue')
+
+	def __init__(self, l_break, l_continue=None):
+		self.l_break = l_break
+		self.l_continue = l_continue
+
+
+
+class ProcessedFunc:
+	""" A user function transformed by M_Grande
+
+	Attributes:
+		name (str): Name of the function
+		code (Statement[]): The transformed function
+		labels (set): Labels inside the function
+		gotos (set): Labels the gotos inside the function jump to
+		calls (set): Names of the called functions
+
+	"""
+
+	__slots__ = ('name', 'code', 'labels', 'gotos', 'calls')
+
+	def __init__(self, name, code, meta):
+		self.name = name
+		self.code = code
+		self.labels = meta.labels
+		self.gotos = meta.gotos
+		self.calls = meta.calls
+
+
+
 class TmpVarPool:
 	""" Pool of temporary variables """
 
@@ -471,6 +549,16 @@ class FnRegistry:
 		# call index 2 origin func name
 		self.callindex2origin = {}
 
+		# call index 2 the statement storing the return address
+		self.callindex2push = {}
+
+		# calls that don't push the return address, their function
+		# has no other caller and returns straight to them
+		self.direct_calls = set()
+
+		# function name -> names of the functions tail-calling it
+		self.tail_callers = {}
+
 		self.call_counter = 1
 
 		self.function_labels = {}
@@ -497,6 +585,7 @@ class FnRegistry:
 
 		self.label_pool.register(begin)
 		self.label_pool.register(end)
+		self.label_pool.register(self.get_body(i))
 
 		self.function_labels[i] = [begin, end]
 
@@ -511,6 +600,35 @@ class FnRegistry:
 		i = self.fnname2fnindex[name]
 		return self.fnindex2statement[i]
 
+	def register_tail_call(self, called, from_):
+		""" Register a tail call, the called function returns to the callers of from_ """
+
+		if called not in self.tail_callers:
+			self.tail_callers[called] = set()
+
+		self.tail_callers[called].add(from_)
+
+
+	def get_returning(self, name):
+		""" Get the functions whose callers a function may return to
+
+		That is the function itself and all functions tail-calling it,
+		directly or through other tail calls.
+
+		"""
+
+		found = {name}
+		to_process = [name]
+
+		while len(to_process) > 0:
+			for caller in self.tail_callers.get(to_process.pop(), ()):
+				if caller not in found:
+					found.add(caller)
+					to_process.append(caller)
+
+		return found
+
+
 	def register_call(self, called, from_):
 		""" Register a call. Returns index. """
 
@@ -591,6 +709,23 @@ class FnRegistry:
 		return "__fn%d_end" % index
 
 
+	def get_body(self, index):
+		""" Get label of a function body, after the push of used tmp vars
+
+		Args:
+			index: name or function index
+
+		Returns:
+			label name
+
+		"""
+
+		if type(index) == str:
+			index = self.fnname2fnindex[index]
+
+		return "__fn%d_body" % index
+
+
 	def get_ns_label(self, index, label):
 		""" Get namespaced label in function
 
@@ -747,14 +882,18 @@ class M_Grande(Mutator):
 		self.do_simplify_ifs         = pragmas.get('simplify_ifs', True)
 		self.do_simplify_expressions = pragmas.get('simplify_expressions', True)
 		self.do_use_push_pop_trampolines = pragmas.get('push_pop_trampolines', False)
+		self.pushpop_trampoline_min_tmp_count = config.PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT
 
 		if self.do_check_stack_bounds:
 			# Push-pop gets larger in this case, so pushpop trampolines are
 			# worthwhile even with only 2 tmps
-			config.PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT = 2
+			self.pushpop_trampoline_min_tmp_count = 2
 
 		if 'push_pop_trampoline_limit' in pragmas:
-			config.PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT = pragmas.get('push_pop_trampoline_limit')
+			self.pushpop_trampoline_min_tmp_count = pragmas.get('push_pop_trampoline_limit')
+
+		self.dispatch_tree_min_targets = pragmas.get('dispatch_tree_limit', config.DISPATCH_TREE_MIN_TARGETS)
+		self.do_tail_calls = pragmas.get('tail_calls', True)
 
 	def _transform(self, code):
 
@@ -778,6 +917,9 @@ class M_Grande(Mutator):
 
 		self.functions_called = set()
 
+		# number of places each function is called from
+		self.call_sites = {}
+
 		self.labels_used = set()
 
 		init_userfn = None
@@ -849,6 +991,8 @@ class M_Grande(Mutator):
 				if st is not None and self.do_inline_one_use_functions:
 					st.inline = len(callers) <= 1
 
+			self.call_sites[callee] = len(callers)
+
 		# process init()
 		pr_init = None
 		if init_userfn is not None:
@@ -994,7 +1138,7 @@ class M_Grande(Mutator):
 			if not fns.inline:
 				func = pr_userfuncs[name]
 				append(sts, func.code)
-				append(sts, self._build_trampoline_for_func(func.name))
+				append(sts, self._tag(self._build_trampoline_for_func(func.name), func.name, 'return'))
 
 		# ERRORS
 		append(sts, self._build_error_handlers())
@@ -1004,7 +1148,7 @@ class M_Grande(Mutator):
 			append(sts, self._build_shutdown_trap())
 
 		if self.do_use_push_pop_trampolines:
-			append(sts, self._build_pushpop_trampolines(funcs_to_render))
+			append(sts, self._tag(self._build_pushpop_trampolines(funcs_to_render), '<push/pop trampolines>', 'push/pop'))
 
 		# compose main function with all the code
 		main = S_Function()
@@ -1028,33 +1172,26 @@ class M_Grande(Mutator):
 		funcs_using_pushpop_trp = list()
 		for name in function_names:
 			st = self.fn_pool.get_statement(name)
-			if st is None or st.inline or len(st.meta.changed_tmps) < config.PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT:
+			if st is None or st.inline or not self._uses_pushpop_trampoline(st):
 				continue
 			a = self.fn_pool.get_fn_addr(name)
 			funcs_using_pushpop_trp.append(a)
 		funcs_using_pushpop_trp.sort()
 
 		if len(funcs_using_pushpop_trp) > 0:
+			# The stack bounds are checked by the functions, once for all the tmps
 			append(sts, self._banner('Tmp push trampoline'))
 			for (i, name) in enumerate(used_tmps):
 				append(sts, self._mk_label('__push_tmps_%s' % (used_tmps_count - i)))
-				append(sts, self._mk_push(name))
-			for a in funcs_using_pushpop_trp:
-				append(sts, synth("""
-								if (__addr == %d) goto %s;
-							""" % (a, "__fn%d_push_tmps_end" % a)))
-			append(sts, self._mk_goto('__err_bad_addr'))
+				append(sts, self._mk_push(name, check=False))
+			append(sts, self._mk_dispatch([(a, "__fn%d_push_tmps_end" % a) for a in funcs_using_pushpop_trp]))
 
 			# Using reverse pop, so SP must be rewinded before calling this!
 			append(sts, self._banner('Tmp pop trampoline'))
 			for (i, name) in enumerate(used_tmps):
 				append(sts, self._mk_label('__pop_tmps_%s' % (used_tmps_count - i)))
 				append(sts, self._mk_reverse_pop(name))
-			for a in funcs_using_pushpop_trp:
-				append(sts, synth("""
-								if (__addr == %d) goto %s;
-							""" % (a, "__fn%d_pop_tmps_end" % a)))
-			append(sts, self._mk_goto('__err_bad_addr'))
+			append(sts, self._mk_dispatch([(a, "__fn%d_pop_tmps_end" % a) for a in funcs_using_pushpop_trp]))
 		return sts
 
 	def _build_trampoline_for_func(self, name):
@@ -1064,21 +1201,34 @@ class M_Grande(Mutator):
 
 		rpvm = self.fn_pool.callindex2calllabel
 
+		# with tail calls, the function also returns to the callers of the
+		# functions tail-calling it
+		returning = self.fn_pool.get_returning(name)
+
 		my_callers = []
 		for (i, called_name) in self.fn_pool.callindex2fnname.items():
-			if called_name == name:
+			if called_name in returning:
 				append(my_callers, i)
 
+		direct = [i for i in my_callers if i in self.fn_pool.direct_calls]
+
+		if direct and len(my_callers) > 1:
+			raise SdscpInternalError('Function %s has more callers, but its return address is not pushed' % name)
+
+		fn = self.fn_pool.get_statement(name)
+
 		if len(my_callers) == 1:
-			append(sts, synth('__sp += 1;'))  # Discard the return address TODO in this case it shouldn't even be pushed!
+			# Discard the return address, if the caller pushed it
+			append(sts, self._mk_pop_frame(fn, [], 0 if direct else 1))
 			append(sts, S_Comment('Only one caller'))
 			if self.do_inline_one_use_functions:
 				print("\x1b[33mFunction %s should have been inlined! This may be caused by unused functions.\x1b[m" % name)
 			else:
 				if not config.QUIET: print("\x1b[33mFunction %s has only one caller, it should be inlined!\x1b[m" % name)
 		else:
-			append(sts, self._mk_pop('__addr'))  # pop a return address
+			append(sts, self._mk_pop_frame(fn, ['__addr']))  # pop a return address
 
+		targets = []
 		for i in my_callers:
 			origin = self.fn_pool.callindex2origin[i]
 
@@ -1092,16 +1242,88 @@ class M_Grande(Mutator):
 			if len(my_callers) == 1:
 				append(sts, synth("goto %s;" % rp_label))
 			else:
-				append(sts, synth("""
-					if (__addr == %d) goto %s;
-				""" % (i, rp_label)))
+				targets.append((i, rp_label))
 
 		if len(my_callers) > 1:
+			# the return addresses shared with other functions by tail calls
+			# keep their numbers, the dispatch of each of them must agree
+			shared = len(returning) > 1 or any(name in callers for callers in self.fn_pool.tail_callers.values())
+
+			if self._use_dispatch_tree(len(targets)) and not shared:
+				# number the return addresses of the callers densely
+				for (k, (i, rp_label)) in enumerate(targets):
+					self.fn_pool.callindex2push[i].value = E_Literal(T_Number(str(k + 1)))
+					targets[k] = (k + 1, rp_label)
+
+			append(sts, self._mk_dispatch(targets))
+
+		return sts
+
+
+	def _uses_pushpop_trampoline(self, fn):
+		""" Check if a function pushes and pops its used tmp vars using the push-pop trampoline """
+
+		return self.do_use_push_pop_trampolines and len(fn.meta.changed_tmps) >= self.pushpop_trampoline_min_tmp_count
+
+
+	def _use_dispatch_tree(self, count):
+		""" Check if a jump to one of `count` targets should use a decision tree """
+
+		return 0 < self.dispatch_tree_min_targets <= count
+
+
+	def _mk_dispatch(self, targets):
+		""" Jump to a label by the value of __addr
+
+		Few targets are tested one by one. With many, a balanced binary
+		decision tree is used, taking log2(N) comparisons instead of N / 2.
+
+		Args:
+			targets (tuple[]): (value, label) pairs, sorted by value
+
+		Returns:
+			The statements. A value not in targets goes to __err_bad_addr;
+			with a tree, only a value out of the range of the targets does
+			(when stack checks are enabled).
+
+		"""
+
+		sts = []
+
+		if not self._use_dispatch_tree(len(targets)):
+			for (value, label) in targets:
+				append(sts, synth("if (__addr == %d) goto %s;" % (value, label)))
+
 			append(sts, self._mk_goto('__err_bad_addr'))
+			return sts
 
+		if self.do_check_stack_bounds:
+			append(sts, synth("""
+				if (__addr < %d) goto __err_bad_addr;
+				if (__addr > %d) goto __err_bad_addr;
+			""" % (targets[0][0], targets[-1][0])))
+
+		self._mk_dispatch_tree(sts, targets)
 		return sts
 
 
+	def _mk_dispatch_tree(self, sts, targets):
+		""" Add a decision tree for the targets to sts (see _mk_dispatch) """
+
+		if len(targets) == 1:
+			append(sts, self._mk_goto(targets[0][1]))
+			return
+
+		mid = len(targets) // 2
+		upper = self.label_pool.acquire('dispatch')
+
+		append(sts, synth("if (__addr >= %d) goto %s;" % (targets[mid][0], upper)))
+		self._mk_dispatch_tree(sts, targets[:mid])
+
+		append(sts, self._mk_label(upper))
+		self._mk_dispatch_tree(sts, targets[mid:])
+
+
 	def _build_error_handlers(self):
 		""" Build error handlers """
 
@@ -1160,6 +1382,7 @@ class M_Grande(Mutator):
 				""" % fn.name))
 
 			append(out, self._process_block(fn, fn.body_st.children))
+			self._tag(out, fn.name, 'body')
 			return self._compose_func_obj(fn, out)
 
 		body = []
@@ -1214,33 +1437,40 @@ class M_Grande(Mutator):
 		# begin label
 		append(out, self._banner('FUNC %s(%s)' % (fn.name, ','.join(fn.args))))
 
+		# the tail calls are added here when the pushed tmps are known,
+		# the code before the begin label is not reached by fall-through
+		tail_calls_at = len(out)
+
 		label = self._mk_label(self.fn_pool.get_begin(fn.name))
 		append(out, label)
 
-		using_pushpop_trampoline = False
-
 		# push all changed tmp vars
 		if len(fn.meta.changed_tmps) > 0:
 			append(out, S_Comment('Push used tmp vars'))
 			fn.meta.changed_tmps = list(set(fn.meta.changed_tmps))  # get unique names
 			fn.meta.changed_tmps.sort(key=natural_sort_key)  # Sort so we always keep the same order, important for unit tests
 
-			if self.do_use_push_pop_trampolines and len(fn.meta.changed_tmps) >= config.PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT:
+			if self._uses_pushpop_trampoline(fn):
 				# Use the push/pop trampoline
-				using_pushpop_trampoline = True
 				fn_addr = self.fn_pool.get_fn_addr(fn.name)
+				# Check the space for all of them, the trampoline does not
+				push = self._mk_push_check(len(fn.meta.changed_tmps))
 				# Jump to the trampoline
-				append(out, self._mk_assign('__addr', fn_addr))
+				append(push, self._mk_assign('__addr', fn_addr))
 				lbl = '__push_tmps_%d' % len(fn.meta.changed_tmps)
 				fn.meta.gotos.add(lbl)
-				append(out, self._mk_goto(lbl))
+				append(push, self._mk_goto(lbl))
 				# Return label from trampoline
 				lbl = '__fn%d_push_tmps_end' % fn_addr
 				fn.meta.labels.add(lbl)
-				append(out, self._mk_label(lbl))
+				append(push, self._mk_label(lbl))
 			else:
-				for n in fn.meta.changed_tmps:
-					append(out, self._mk_push(n))
+				push = self._mk_push_group(fn.meta.changed_tmps)
+
+			append(out, self._tag(push, fn.name, 'push/pop'))
+
+		if fn.meta.tail_recursive:
+			append(out, self._mk_label(self.fn_pool.get_body(fn.name)))
 
 		append(body, self._mk_assign('__rval', 0))
 		append(out, body)
@@ -1249,43 +1479,50 @@ class M_Grande(Mutator):
 		label = self._mk_label(self.fn_pool.get_end(fn.name))
 		append(out, label)
 
-		if len(fn.meta.changed_tmps) > 0:
-			append(out, S_Comment('Pop used tmp vars'))
-
-			if using_pushpop_trampoline:
-				# This is a bit hacky. To allow reusing one trampoline for multiple push/pop counts,
-				# we can't restore the variables in the reverse order. Instead, we first increment
-				# SP to get back to the beginning, then restore the changed temporaries with a
-				# "reverse pop", and then set SP to the original value AGAIN, so it's correct for the
-				# caller.
-				fn_addr = self.fn_pool.get_fn_addr(fn.name)
-				# Rewind SP + offset
-				append(out, self._mk_assign('__sp', len(fn.meta.changed_tmps), op='+='))
-				# Jump to the trampoline
-				append(out, self._mk_assign('__addr', fn_addr))
-				lbl = '__pop_tmps_%d' % len(fn.meta.changed_tmps)
-				fn.meta.gotos.add(lbl)
-				append(out, self._mk_goto(lbl))
-				# Return label from trampoline
-				lbl = '__fn%d_pop_tmps_end' % fn_addr
-				fn.meta.labels.add(lbl)
-				append(out, self._mk_label(lbl))
-				# Rewind SP *again*
-				append(out, self._mk_assign('__sp', len(fn.meta.changed_tmps), op='+='))
-			else:
-				for n in reversed(fn.meta.changed_tmps):
-					append(out, self._mk_pop(n))
-
 		if self.add_debug_trace_logging:
 			append(out, synth('echo("[TRACE] return from %(name)s, with: ", %(rval)s);' % {
 				'name': fn.name,
 				'rval': '__rval'
 			}))
 
+		# the used tmp vars are popped by the return trampoline,
+		# together with the return address
 		append(out, S_Comment('Return to caller'))
 
+		out[tail_calls_at:tail_calls_at] = self._build_tail_calls(fn)
+
+		self._tag(out, fn.name, 'body')
 		return self._compose_func_obj(fn, out)
 
+	def _build_tail_calls(self, fn):
+		""" Build the exits of a function by tail calls to other functions
+
+		Each pops the used tmp vars and jumps to the called function,
+		which then returns to the caller of fn.
+
+		Args:
+			fn (S_Function): The function, processed already
+
+		Returns:
+			list of statements
+
+		"""
+
+		out = []
+
+		if self._uses_pushpop_trampoline(fn):
+			# the trampoline pushes the first tmp vars, the last one first
+			tmps = list(self.tmp_pool.get_names())[:len(fn.meta.changed_tmps)]
+		else:
+			tmps = list(reversed(fn.meta.changed_tmps))
+
+		for (label, name) in fn.meta.tail_calls:
+			append(out, self._mk_label(label))
+			append(out, self._tag(self._mk_pop_group(tmps), fn.name, 'push/pop'))
+			append(out, self._tag(self._mk_goto(self.fn_pool.get_begin(name)), name, 'call'))
+
+		return out
+
 	def _func_has_non_inlined_inner_calls(self, fn):
 		local_cg = dict()
 		fn.update_callgraph(fn.name, local_cg)
@@ -1379,6 +1616,7 @@ class M_Grande(Mutator):
 		self.inline_return_var = old_inline_return_var
 
 		append(out, S_Comment('End of inlined %s' % name))
+		self._tag(out, name, 'inlined')
 
 		#print(inlined.meta.labels)
 		#print(inlined.meta.gotos)
@@ -1404,14 +1642,7 @@ class M_Grande(Mutator):
 
 	def _compose_func_obj(self, fn, code):
 
-		ret = Obj()
-		ret.name = fn.name
-		ret.code = code
-		ret.labels = fn.meta.labels
-		ret.gotos = fn.meta.gotos
-		ret.calls = fn.meta.calls
-
-		return ret
+		return ProcessedFunc(fn.name, code, fn.meta)
 
 
 	def _process_block(self, fn, sts, own_scope=True):
@@ -1610,6 +1841,10 @@ class M_Grande(Mutator):
 
 
 	def _transform_return(self, fn, s):
+		call = self._get_tail_call(fn, s.value)
+		if call is not None:
+			return self._transform_tail_call(fn, call)
+
 		out = []
 		tmps = []
 
@@ -1628,6 +1863,93 @@ class M_Grande(Mutator):
 		return (out, tmps)
 
 
+	def _get_tail_call(self, fn, e):
+		""" Get the call a function returns the value of, if it can be a tail call
+
+		Args:
+			fn (S_Function): Function wrapping the return
+			e (Expression): The returned value
+
+		Returns:
+			E_Call, or None
+
+		"""
+
+		while isinstance(e, E_Group) and len(e.children) == 1:
+			e = e.children[0]
+
+		if not isinstance(e, E_Call) or not self.do_tail_calls or self.add_debug_trace_logging:
+			return None
+
+		# main() and init() have no caller, inlined code returns in place,
+		# and a function called from one place finds no return address
+		# on the stack to pass on (see _call_user_func)
+		if fn.inline or fn.name in ['main', 'init'] or self.call_sites.get(fn.name) == 1:
+			return None
+
+		called_fn_st = self.fn_pool.get_statement(e.name)
+
+		if called_fn_st is None or called_fn_st.inline or len(e.args) != len(called_fn_st.args):
+			return None
+
+		return e
+
+
+	def _transform_tail_call(self, fn, call):
+		""" Generate statements for returning the value of a call
+
+		The called function is entered without pushing a return address,
+		and returns straight to the caller of fn. A tail call to fn itself
+		jumps to its body, the pushed tmp vars are kept.
+
+		Args:
+			fn (S_Function): Function wrapping the call
+			call (E_Call): The call
+
+		Returns:
+			(statements, tmps)
+
+		"""
+
+		out = []
+		tmps = []
+
+		append(out, S_Comment('TAIL CALL: %s()' % call.name))
+
+		fn.meta.calls.add(call.name)
+		self.functions_called.add(call.name)
+
+		argpool_saved = self.arg_pool.save()
+		self.arg_pool.rewind()
+
+		arg_assignments = []
+
+		for a in call.args:
+			arg_name = self.arg_pool.acquire()
+
+			(_init, _tmps, a_val) = self._process_expr(fn, a)
+			append(out, _init)
+			append(tmps, _tmps)
+
+			append(arg_assignments, self._mk_assign(arg_name, a_val))
+
+		append(out, arg_assignments)
+
+		self.arg_pool.restore(argpool_saved)
+
+		if call.name == fn.name:
+			fn.meta.tail_recursive = True
+			label = self.fn_pool.get_body(fn.name)
+		else:
+			label = self.label_pool.acquire('tail')
+			append(fn.meta.tail_calls, (label, call.name))
+			self.fn_pool.register_tail_call(call.name, fn.name)
+
+		append(out, self._tag(self._mk_goto(label), call.name, 'call'))
+
+		return (out, tmps)
+
+
 	def _transform_if(self, fn, s):
 		out = []
 		tmps = []
@@ -1668,9 +1990,7 @@ class M_Grande(Mutator):
 		l_break = self.label_pool.acquire('wh_break')
 
 		# add meta to the loop
-		s.meta = Obj()
-		s.meta.l_continue = l_continue
-		s.meta.l_break = l_break
+		s.meta = LoopMeta(l_break, l_continue)
 
 		# continue label
 		append(out, self._mk_label(l_continue))
@@ -1707,10 +2027,7 @@ class M_Grande(Mutator):
 		l_break = self.label_pool.acquire('dowh_break')
 
 		# add meta to the loop
-		s.meta = Obj()
-		s.meta.l_continue = l_continue
-		s.meta.l_body = l_body
-		s.meta.l_break = l_break
+		s.meta = LoopMeta(l_break, l_continue)
 
 		# body
 		append(out, self._mk_label(l_body))
@@ -1750,10 +2067,7 @@ class M_Grande(Mutator):
 		l_break = self.label_pool.acquire('for_break')
 
 		# add meta to the loop
-		s.meta = Obj()
-		s.meta.l_continue = l_continue
-		s.meta.l_break = l_break
-		s.meta.l_cond = l_cond
+		s.meta = LoopMeta(l_break, l_continue)
 
 		# the init
 		append(out, self._process_block(fn, s.init, False))
@@ -1843,8 +2157,7 @@ class M_Grande(Mutator):
 		l_break = self.label_pool.acquire('sw_break')
 
 		# add meta to the switch
-		s.meta = Obj()
-		s.meta.l_break = l_break
+		s.meta = LoopMeta(l_break)
 
 		# resolve compared value
 		(_init, _tmps, cond) = self._process_expr(fn, s.value)
@@ -1860,6 +2173,14 @@ class M_Grande(Mutator):
 			tmps.append(compared)
 			append(out, self._mk_assign(compared, cond))
 
+		values = self._switch_case_values(s)
+		if values is not None and self._use_dispatch_tree(len(set(values))):
+			append(out, self._transform_switch_tree(fn, s, compared, values))
+
+			append(out, self._mk_label(l_break))
+			append(out, S_Comment('SWITCH end'))
+			return (out, tmps)
+
 		case_active = False
 		l_next_case = self.label_pool.acquire('case')
 
@@ -1929,6 +2250,141 @@ class M_Grande(Mutator):
 		return (out, tmps)
 
 
+	def _switch_case_values(self, s):
+		""" Get values of the cases of a switch
+
+		Args:
+			s (S_Switch): The switch
+
+		Returns:
+			List of the values (int), None if some are not constant,
+			or there is a case after default (the chain of tests jumps
+			to default before testing it).
+
+		"""
+
+		values = []
+		after_default = False
+
+		for ss in s.body_st.children:
+			if type(ss) is S_Default:
+				after_default = True
+
+			elif type(ss) is S_Case:
+				val = fold_expr(ss.value)
+
+				if val is None or after_default:
+					return None
+
+				values.append(val)
+
+		return values
+
+
+	def _transform_switch_tree(self, fn, s, compared, values):
+		""" Lower a switch with constant cases to a decision tree
+
+		The tree jumps to the case labels, the case bodies follow
+		in their order, so fall-through works as before.
+
+		Args:
+			fn (S_Function): The function
+			s (S_Switch): The switch
+			compared (str): Variable holding the switched value
+			values (int[]): Values of the cases, in order
+
+		Returns:
+			The statements, without the break label
+
+		"""
+
+		out = []
+
+		l_default = s.meta.l_break
+		case_labels = []
+		targets = {}
+
+		for val in values:
+			label = self.label_pool.acquire('case')
+			case_labels.append(label)
+
+			# a repeated value goes to the first case
+			if val not in targets:
+				targets[val] = label
+
+		if any(type(ss) is S_Default for ss in s.body_st.children):
+			l_default = self.label_pool.acquire('case')
+
+		append(out, self._mk_switch_tree(compared, sorted(targets.items()), l_default, None, None))
+
+		branch_ss = []
+		case_labels.reverse()
+
+		for ss in s.body_st.children:
+			if type(ss) is S_Case or type(ss) is S_Default:
+				if len(branch_ss) > 0:
+					append(out, self._process_block(fn, branch_ss))
+					branch_ss = []
+
+				append(out, self._mk_label(case_labels.pop() if type(ss) is S_Case else l_default))
+
+			else:
+				append(branch_ss, ss)
+
+		if len(branch_ss) > 0:
+			append(out, self._process_block(fn, branch_ss))
+
+		return out
+
+
+	def _mk_switch_tree(self, compared, targets, l_default, lo, hi):
+		""" Build a binary decision tree jumping to case labels
+
+		Within a dense range of values, the bounds known from the tests
+		made before are enough to pick the case, without testing it.
+
+		Args:
+			compared (str): Variable holding the switched value
+			targets (tuple[]): (value, label) pairs, sorted by value
+			l_default (str): Where to go if no value matches
+			lo (int): The lowest value possible here, None if unknown
+			hi (int): The highest value possible here, None if unknown
+
+		Returns:
+			The statements
+
+		"""
+
+		sts = []
+
+		if len(targets) == 1:
+			(val, label) = targets[0]
+
+			if lo != val or hi != val:
+				st = S_If()
+				st.cond = E_Group([E_Variable(compared), E_Operator('!='), self._mk_number(val)])
+				st.then_st = self._mk_goto(l_default)
+				append(sts, st)
+
+			append(sts, self._mk_goto(label))
+			return sts
+
+		mid = len(targets) // 2
+		pivot = targets[mid][0]
+		upper = self.label_pool.acquire('case_tree')
+
+		st = S_If()
+		st.cond = E_Group([E_Variable(compared), E_Operator('>='), self._mk_number(pivot)])
+		st.then_st = self._mk_goto(upper)
+		append(sts, st)
+
+		append(sts, self._mk_switch_tree(compared, targets[:mid], l_default, lo, pivot - 1))
+		append(sts, self._mk_label(upper))
+		append(sts, self._mk_switch_tree(compared, targets[mid:], l_default, pivot, hi))
+
+		return sts
+
+
 	def _fn_release_tmps(self, fn, tmps):
 		""" Release tmps used in a function & mark them as dirty in the function """
 
@@ -1954,38 +2410,21 @@ class M_Grande(Mutator):
 			expr.children = self._group_expr_operators(expr.children)
 
 		# try to evaluate it
-		if not hasattr(self, '_erndr'):
-			self._erndr = renderers.CSyntaxRenderer([])
-
 		if type(e) is E_Group and self.do_simplify_expressions:
-			try:
-				as_str = self._erndr._render_expr(e)
-				# print('Trying to simplify: %s' % as_str)
-				val = eval_expr(as_str)
-				val = round(val)
-
-				if val > 0xFFFFFFFF:
-					raise SdscpSyntaxError('Number too large for SDS-C: %s, from simplifying expr "%s"' % (val, as_str))
-
-				if val < -2147483648:
-					raise SdscpSyntaxError('Number too small for SDS-C: %s, from simplifying expr "%s"' % (val, as_str))
-
-				if val < 0 or val >= 0x80000000:
-					# Negative values obtained through simplification will often
-					# be the result of the ~ operator. There is a SDS-C bug
-					# that prevents bitwise ops to work correctly with negative
-					# integers. If we convert it to float, it will be OK.
-					# Likewise, integers with the highest bit set can only be expressed
-					# as hex.
-					val = val & 0xFFFFFFFF
-					e = E_Literal(T_Number(hex(val)))
-				else:
-					e = E_Literal(T_Number(str(val)))
+			val = fold_expr(e)
+
+			if val is not None:
+				# SDS-C wraps the result, but a constant out of its range is most likely a mistake
+				exact = fold_expr(e, wrap=False)
+
+				if exact is not None and (exact > 0xFFFFFFFF or exact < -2147483648):
+					if not hasattr(self, '_erndr'):
+						self._erndr = renderers.CSyntaxRenderer([])
 
-				#print('Expression "%s" simplified to "%s"' % (as_str, val))
+					raise SdscpSyntaxError('Number too %s for SDS-C: %s, from simplifying expr "%s"' % (
+						'large' if exact > 0 else 'small', exact, self._erndr._render_expr(e)))
 
-			except (ValueError, TypeError, SyntaxError, KeyError):
-				pass
+				e = self._mk_number(val)
 
 
 		if isinstance(e, E_Group):
@@ -2281,12 +2720,21 @@ class M_Grande(Mutator):
 			return_idx = self.fn_pool.register_call(addr, fn.name)
 
 			# append(out, self._mk_assign('__addr', addr))
-			append(out, self._mk_push(return_idx))
-			append(out, self._mk_goto(target_fn))
+			if self.call_sites.get(name) == 1:
+				# the only caller, the function returns here directly
+				link = []
+				self.fn_pool.direct_calls.add(return_idx)
+			else:
+				link = self._mk_push(return_idx)
+				self.fn_pool.callindex2push[return_idx] = link[-1]
+
+			append(link, self._mk_goto(target_fn))
 
 			# return label
 			lbl = self.fn_pool.get_call_label(return_idx)
-			append(out, self._mk_label(lbl))
+			append(link, self._mk_label(lbl))
+
+			append(out, self._tag(link, name, 'call'))
 
 			self.arg_pool.restore(argpool_saved)
 
@@ -2399,25 +2847,47 @@ class M_Grande(Mutator):
 
 		fn.bind_parent(None)
 
-		fn.meta = Obj()
+		fn.meta = FunctionMeta()
+		return fn
 
-		# list of labels inside the function
-		fn.meta.labels = set()
 
-		# list of gotos inside the function
-		fn.meta.gotos = set()
+	def _tag(self, sts, name, part):
+		""" Mark statements with the user function they were generated for
 
-		# list of called funcs
-		fn.meta.calls = set()
+		Used by the size report, only done when one is requested (see
+		tag_origins). Statements marked before (e.g. inlined code of
+		another function) keep their mark.
 
-		# list of tmp vars modified within the scope of this function
-		# to be pushed / popped at the beginning / end of the function
-		fn.meta.changed_tmps = []
+		Args:
+			sts: statement or list of statements, including nested ones
+			name (str): Name of the user function
+			part (str): Kind of the code, see size_report.FunctionSize
 
-		# dict of translations of "local" var names to acquired tmp vars used instead
-		# better than making global variable that's used as local.
-		fn.meta.local_tmp_dict = {}
-		return fn
+		Returns:
+			sts
+
+		"""
+
+		if not self.tag_origins:
+			return sts
+
+		stack = list(sts) if type(sts) == list else [sts]
+
+		while len(stack) > 0:
+			s = stack.pop()
+
+			if s is None or hasattr(s, '_origin'):
+				continue
+
+			s._origin = (name, part)
+
+			if isinstance(s, S_Block):
+				stack.extend(s.children)
+			elif isinstance(s, S_If):
+				stack.append(s.then_st)
+				stack.append(s.else_st)
+
+		return sts
 
 
 	def _mk_label(self, name):
@@ -2465,6 +2935,19 @@ class M_Grande(Mutator):
 		return s
 
 
+	def _mk_number(self, val):
+		""" Make a number literal for a value computed at compile time """
+
+		if val < 0:
+			# Negative values obtained through simplification will often
+			# be the result of the ~ operator. There is a SDS-C bug
+			# that prevents bitwise ops to work correctly with negative
+			# integers. If we convert it to hex, it will be OK.
+			return E_Literal(T_Number(hex(val & 0xFFFFFFFF)))
+
+		return E_Literal(T_Number(str(val)))
+
+
 	def _mk_var(self, name):
 		""" Create a var statement """
 		s = S_Var()
@@ -2472,12 +2955,12 @@ class M_Grande(Mutator):
 		return s
 
 
-	def _mk_push(self, what):
+	def _mk_push(self, what, check=True):
 		""" Push a value onto stack """
 		out = []
 		append(out, self._mk_assign('__sp', 1, op='-='))
 
-		if self.do_check_stack_bounds:
+		if check and self.do_check_stack_bounds:
 			append(out, synth("""
 				if(__sp < %d) goto __err_so;
 			""" % self.stack_start))
@@ -2485,30 +2968,138 @@ class M_Grande(Mutator):
 		append(out, self._mk_assign('ram', what, index='__sp'))
 		return out
 
+	def _mk_push_check(self, count):
+		""" Check there is space for pushing count values, before pushing them unchecked """
+		if not self.do_check_stack_bounds:
+			return []
+
+		return synth("""
+			if(__sp < %d) goto __err_so;
+		""" % (self.stack_start + count))
+
+	def _mk_push_group(self, values):
+		""" Push values onto stack, the first one goes deepest
+
+		The stack bounds are checked only once, for all of them.
+		"""
+
+		if len(values) == 1:
+			return self._mk_push(values[0])
+
+		out = self._mk_push_check(len(values))
+		for v in values:
+			append(out, self._mk_push(v, check=False))
+
+		return out
+
 	def _mk_reverse_pop(self, name):
-		""" POP, but advancing SP in the reverse direction beforehand. This is used in pop trampolines. """
+		""" POP, but advancing SP in the reverse direction beforehand. This is used in pop trampolines.
+		The stack bounds are checked by the caller. """
 		out = []
 		append(out, self._mk_assign('__sp', 1, op='-='))
-		if self.do_check_stack_bounds:
-			append(out, synth("""
-				if(__sp < %d) goto __err_so;
-			""" % self.stack_start))
-
 		append(out, self._mk_assign(name, E_Variable('ram', index=E_Variable('__sp'))))
 		return out
 
+	def _mk_pop_check(self, count):
+		""" Check there are count values to pop, before popping them unchecked """
+		if not self.do_check_stack_bounds:
+			return []
+
+		return synth("""
+			if(__sp > %d) goto __err_su;
+		""" % (self.stack_end - count + 1))
+
 	def _mk_pop(self, name):
 		""" Normal POP """
+		return self._mk_pop_group([name])
+
+	def _mk_pop_group(self, names, skip=0, check=True):
+		""" Pop values from stack, in the order of names (the top one first)
+
+		The stack bounds are checked only once, for all of them.
+
+		Args:
+			names: variables to pop to
+			skip (int): Number of values to discard after them
+			check (bool): Check the stack bounds
+
+		Returns:
+			list of statements
+
+		"""
+
 		out = []
-		if self.do_check_stack_bounds:
-			append(out, synth("""
-				if(__sp > %d) goto __err_su;
-			""" % self.stack_end))
 
-		append(out, self._mk_assign(name, E_Variable('ram', index=E_Variable('__sp'))))
-		append(out, self._mk_assign('__sp', 1, op='+='))
+		if check and len(names) > 0:
+			append(out, self._mk_pop_check(len(names)))
+
+		for (i, name) in enumerate(names):
+			append(out, self._mk_assign(name, E_Variable('ram', index=E_Variable('__sp'))))
+
+			if i < len(names) - 1:
+				append(out, self._mk_assign('__sp', 1, op='+='))
+			else:
+				# the last SP increment also discards the skipped values
+				append(out, self._mk_assign('__sp', 1 + skip, op='+='))
+
+		if len(names) == 0 and skip > 0:
+			append(out, self._mk_assign('__sp', skip, op='+='))
+
 		return out
 
+	def _mk_pop_frame(self, fn, names, skip=0):
+		""" Pop the used tmp vars of a function, then the values pushed before them
+
+		Args:
+			fn (S_Function): The function
+			names: variables to pop to, after the tmps (the return address)
+			skip (int): Number of values to discard after them
+
+		Returns:
+			list of statements
+
+		"""
+
+		tmps = fn.meta.changed_tmps
+
+		if len(tmps) == 0:
+			return self._mk_pop_group(names, skip)
+
+		out = [S_Comment('Pop used tmp vars')]
+
+		if not self._uses_pushpop_trampoline(fn):
+			append(out, self._mk_pop_group(list(reversed(tmps)) + names, skip))
+			return self._tag(out, fn.name, 'push/pop')
+
+		# This is a bit hacky. To allow reusing one trampoline for multiple push/pop counts,
+		# we can't restore the variables in the reverse order. Instead, we first increment
+		# SP to get back to the beginning, then restore the changed temporaries with a
+		# "reverse pop", and then set SP to the original value AGAIN, so it's correct for the
+		# caller.
+		fn_addr = self.fn_pool.get_fn_addr(fn.name)
+		# Check the stack bounds once, for the tmps and the other values
+		append(out, self._mk_pop_check(len(tmps) + len(names)))
+		# Rewind SP + offset
+		append(out, self._mk_assign('__sp', len(tmps), op='+='))
+		# Jump to the trampoline
+		append(out, self._mk_assign('__addr', fn_addr))
+		lbl = '__pop_tmps_%d' % len(tmps)
+		fn.meta.gotos.add(lbl)
+		append(out, self._mk_goto(lbl))
+		# Return label from trampoline
+		lbl = '__fn%d_pop_tmps_end' % fn_addr
+		fn.meta.labels.add(lbl)
+		append(out, self._mk_label(lbl))
+
+		if len(names) == 0:
+			# Rewind SP *again*
+			append(out, self._mk_assign('__sp', len(tmps) + skip, op='+='))
+		else:
+			append(out, self._mk_assign('__sp', len(tmps), op='+='))
+			append(out, self._mk_pop_group(names, skip, check=False))
+
+		return self._tag(out, fn.name, 'push/pop')
+
 
 	def _mk_error(self, message):
 
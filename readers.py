@@ -1,32 +1,97 @@
 #!/bin/env python3
 
 import re
+from bisect import bisect_right
 from sdscp_errors import *
 from utils import eval_expr
 
 class BaseReader:
 	""" Utility for scanning through a text
 
+	The reader can also scan just a part (window) of the text,
+	see `sub_reader()`. Positions are always absolute in the text.
+
 	Args:
 		source (str): The text to read
 		filename (str): The file the text came from
 			Used for error reporting.
+		begin (int, optional): Start of the scanned part of the text
+		end (int, optional): End of the scanned part of the text
 
 	Attributes:
 		text (str): The scanned text
 		filename (str): The file the text came from
 		pos (int): Current cursor position in the text
-		length (int): Length of the text
+		begin (int): Start of the scanned part, 0 for the whole text
+		length (int): End of the scanned part, length of the text
+			unless the reader is a window.
+		line_starts (int[]): Positions where the lines begin.
+			Built lazily by `get_line_starts()`, None until then.
 
 	"""
 
-	def __init__(self, source, filename=None):
+	def __init__(self, source, filename=None, begin=0, end=None):
 
 		# Initialize instance varibales
 		self.text = source
 		self.filename = filename
-		self.pos = 0
-		self.length = len(source)
+		self.pos = begin
+		self.begin = begin
+		self.length = len(source) if end is None else end
+		self.line_starts = None
+
+
+	def sub_reader(self, begin, end, strip=False):
+		""" Get a reader for a part of the text
+
+		The text is not copied; the line index (and other
+		caches of subclasses) are shared with this reader.
+
+		The new reader has no filename, so errors found in it
+		are reported without file position.
+
+		Args:
+			begin (int): Start of the part
+			end (int): End of the part
+			strip (bool, optional): Leave out leading and trailing
+				whitespace of the part. Defaults to False.
+
+		Returns:
+			A reader of the same type, scanning only the given part.
+
+		"""
+
+		if strip:
+			(begin, end) = self.strip_span(begin, end)
+
+		rd = type(self)(self.text, None, begin, end)
+		rd.line_starts = self.line_starts
+
+		return rd
+
+
+	def strip_span(self, begin, end):
+		""" Shrink a part of the text to exclude whitespace
+		at the ends (same as str.strip() would)
+
+		Args:
+			begin (int): Start of the part
+			end (int): End of the part
+
+		Returns:
+			Tuple (begin, end) of the stripped part.
+
+		"""
+
+		text = self.text
+
+		while begin < end and text[begin].isspace():
+			begin += 1
+
+		while end > begin and text[end - 1].isspace():
+			end -= 1
+
+		return (begin, end)
 
 
 	def set_pos(self, p):
@@ -46,18 +111,43 @@ class BaseReader:
 		begin = self.pos-20
 		end = self.pos+20
 
-		if begin < 0:
-			begin = 0
+		if begin < self.begin:
+			begin = self.begin
 
 		if end > self.length:
 			end = self.length
 
 		near = re.sub(r'[\n\t ]+', ' ', self.text[begin:end])
-		fwd = re.sub(r'[\n\t ]+', ' ', self.text[self.pos:self.pos+20])
+		fwd = re.sub(r'[\n\t ]+', ' ', self.text[self.pos:min(self.pos+20, self.length)])
 
 		return 'At: >>%s<<\nNear: >>%s<<' % (fwd, near)
 
 
+	def get_line_starts(self):
+		""" Get the line index of the text
+
+		The index is built on first use, so readers that never
+		report a position don't pay for it.
+
+		Returns:
+			Sorted list of positions where the lines begin.
+
+		"""
+
+		if self.line_starts is None:
+			starts = [0]
+			find = self.text.find
+
+			i = find('\n')
+			while i != -1:
+				starts.append(i + 1)
+				i = find('\n', i + 1)
+
+			self.line_starts = starts
+
+		return self.line_starts
+
+
 	def pos2line(self, pos):
 		""" Convert absolute pos to line number
 
@@ -69,8 +159,8 @@ class BaseReader:
 
 		"""
 
-		processed = self.text[:pos]
-		return processed.count('\n') + 1
+		pos = max(0, min(pos, len(self.text)))
+		return bisect_right(self.get_line_starts(), pos)
 
 
 	def pos2col(self, pos):
@@ -84,13 +174,13 @@ class BaseReader:
 
 		"""
 
-		processed = self.text[:pos]
-		lineno = processed.count('\n') + 1
+		pos = max(0, min(pos, len(self.text)))
+		lineno = self.pos2line(pos)
 
 		if lineno == 1:
-			return len(processed)
+			return pos
 		else:
-			return len(processed) - processed.rindex('\n')
+			return pos - self.line_starts[lineno - 1] + 1
 
 
 	def error(self, message):
@@ -135,7 +225,7 @@ class BaseReader:
 
 		self.validate_cursor()
 
-		return self.text[self.pos + offset : self.pos + offset + chars]
+		return self.text[self.pos + offset : min(self.pos + offset + chars, self.length)]
 
 
 	def from_pos(self, pos_begin):
@@ -174,26 +264,34 @@ class BaseReader:
 
 		self.validate_cursor()
 
-		return expected == self.text[ self.pos : self.pos+len(expected) ]
+		end = self.pos + len(expected)
+
+		return end <= self.length and expected == self.text[ self.pos : end ]
 
 
 	def matches(self, regex, flags=0):
 		""" Get if the following text matches the given regex.
 
 		By "following" is meant the portion from the current `pos`.
+		The regex is matched in place (anchored at `pos`), without
+		copying the rest of the text.
 
 		Args:
-			regex (str/regex): The tested regex
-			flags (int): re flags
+			regex (str/regex): The tested regex.
+				String patterns are compiled (and cached by `re`).
+			flags (int): re flags, used only for string patterns
 
 		Returns:
-			True if the following text matches the `regex`
+			The match object if the following text matches the `regex`
 
 		"""
 
 		self.validate_cursor()
 
-		return re.match(regex, self.text[self.pos:], flags)
+		if isinstance(regex, str):
+			regex = re.compile(regex, flags)
+
+		return regex.match(self.text, self.pos, self.length)
 
 
 	def move(self, chars=1):
@@ -225,7 +323,7 @@ class BaseReader:
 		If the assertion is not met, an error is raised.
 		"""
 
-		if self.pos >= self.length or self.pos < 0:
+		if self.pos >= self.length or self.pos < self.begin:
 			self.error('Unexpected end of scope. Maybe something like missing semicolon?')
 
 
@@ -301,24 +399,23 @@ class BaseReader:
 
 		pos_begin = self.pos
 
-		while self.pos+len(end) <= self.length:
+		found = self.text.find(end, self.pos, self.length)
 
-			if self.starts(end):
+		if found != -1:
+			self.pos = found
 
-				if not consume_end:
-					return self.from_pos(pos_begin)
-				else:
-					if keep_end:
-						self.pos += len(end) # advance past the delimiter
-						txt = self.from_pos(pos_begin)
-
-					else:
-						txt = self.from_pos(pos_begin)
-						self.pos += len(end) # advance past the delimiter
+			if not consume_end:
+				return self.from_pos(pos_begin)
+			else:
+				if keep_end:
+					self.pos += len(end) # advance past the delimiter
+					txt = self.from_pos(pos_begin)
 
-					return txt
+				else:
+					txt = self.from_pos(pos_begin)
+					self.pos += len(end) # advance past the delimiter
 
-			self.consume() # advance one character
+				return txt
 
 		if eof:
 			self.pos = self.length
@@ -377,39 +474,60 @@ class CodeReader(BaseReader):
 		filename (str, optional):
 			Name of the file the text came from.
 			Defaults to None.
+		begin (int, optional): Start of the scanned part of the text
+		end (int, optional): End of the scanned part of the text
 
 	Attributes:
+		block_ends (dict): Known ends of blocks, {start: end}.
+			Shared by sub-readers, so a block scanned once
+			can be skipped by a reader of the enclosing block.
 		Various regexes
 
 	"""
 
 
 	RE_IDENTIFIER_START = re.compile(r'[a-z_]', re.I|re.A) # ignorecase | ascii
-	RE_IDENTIFIER_BODY  = re.compile(r'\w', re.I|re.A)
+	RE_IDENTIFIER_BODY  = re.compile(r'\w*', re.I|re.A)
 
 	RE_IDENTIFIER       = re.compile(
 		r''' # identifier
-		^[a-z_]
+		[a-z_]
 		\w*
 		(?:[^\w]|\Z)
 		''', re.I|re.A|re.X
 	)
 
-	RE_STRING_QUOTE = re.compile(r'^"')
-	RE_CHAR_QUOTE   = re.compile(r'^\'')
+	RE_STRING_QUOTE = re.compile(r'"')
+	RE_CHAR_QUOTE   = re.compile(r'\'')
 
-	RE_PAREN_OPEN  = re.compile(r'^[\[({]')
-	RE_PAREN_CLOSE = re.compile(r'^[\])}]')
+	RE_PAREN_OPEN  = re.compile(r'[\[({]')
+	RE_PAREN_CLOSE = re.compile(r'[\])}]')
 
 	COMMENT       = '//'
 	DOC_COMMENT       = '///'
 	COMMENT_OPEN  = '/*'
 	COMMENT_CLOSE = '*/'
 
-	RE_COMMENT_OPEN  = re.compile(r'^/\*')
-	RE_COMMENT_CLOSE = re.compile(r'^\*/')
+	RE_COMMENT_OPEN  = re.compile(r'/\*')
+	RE_COMMENT_CLOSE = re.compile(r'\*/')
+
+	RE_RVALUE_EXTENDED_EQUALS = re.compile(r'[-*+/%&|^]=')
+
+	RE_WHITESPACE        = re.compile(r'\s+')
+	RE_WHITESPACE_CHARS  = re.compile(r'[ \n\t]*')
+	RE_INLINE_WHITESPACE = re.compile(r'[ \t]*')
+
+	RE_HEX_NUMBER  = re.compile(r'0x[0-9A-Fa-f]+')
+	RE_HEX_DIGITS  = re.compile(r'[0-9A-Fa-f_]*')
+	RE_BIN_NUMBER  = re.compile(r'0b[01]+')
+	RE_BIN_DIGITS  = re.compile(r'[01_]*')
+	RE_DEC_NUMBER  = re.compile(r'-?[0-9]+')
+	RE_DEC_DIGITS  = re.compile(r'[0-9_]*')
 
-	RE_RVALUE_EXTENDED_EQUALS = re.compile(r'^[-*+/%&|^]=')
+	RE_OPERATOR_SHORT  = re.compile(r'[*/%~^]')
+	RE_OPERATOR_LONG   = re.compile(r'&&|\|\||<<|>>|>=|<=|==|!=|\+\+|--')
+	RE_OPERATOR_CMP    = re.compile(r'[><!]')
+	RE_OPERATOR_ARITH  = re.compile(r'[-+|&]')
 
 	RE_OPERATOR = re.compile(
 		r''' # operator
@@ -432,7 +550,6 @@ class CodeReader(BaseReader):
 
 	RE_LABEL = re.compile(
 		r''' # label
-		^
 		( label[ \t]+ )?	# optional label keyword
 		[a-z_]	# identifier
 		\w*
@@ -447,14 +564,111 @@ class CodeReader(BaseReader):
 		'{': '}'
 	}
 
+	# whitespace and comments discarded by `sweep()`
+	# (a doc comment is kept, so the match stops there)
+	RE_SWEEP = re.compile(
+		r''' # whitespace and comments
+		(?:
+			\s+
+			| //(?!/)[^\n]*\n?	# line comment, not doc comment
+			| /\*.*?\*/			# block comment
+		)*
+		''', re.S|re.X
+	)
 
-	def __init__(self, source, filename=None):
-		super().__init__(source, filename)
+	# Master regexes for `lex()`. The alternatives are tried in order,
+	# the first one that matches gives the lexeme kind.
+
+	_LEX_NUMBER = r'''
+		(?P<number>
+			0x[0-9A-Fa-f][0-9A-Fa-f_]*
+			| 0b[01][01_]*
+			| -?[0-9][0-9_]*
+		)
+	'''
+
+	_LEX_OPERATOR = r'''
+		(?P<operator>
+			[*/%~^]
+			| &&|\|\||<<|>>|>=|<=|==|!=|\+\+|--
+			| [<>!]
+			| [-+|&]
+		)
+	'''
+
+	RE_LEX_STATEMENT = re.compile(
+		r''' # start of a statement
+		(?P<identifier>[a-zA-Z_]\w*)
+		| (?P<code_block>\{)
+		| (?P<doc_comment>///)
+		| (?P<semicolon>;)
+		''', re.A|re.X
+	)
+
+	RE_LEX_EXPRESSION = re.compile(
+		r''' # expression token
+		(?P<identifier>[a-zA-Z_]\w*)
+		| (?P<paren>\()
+		| ''' + _LEX_NUMBER + '''
+		| ''' + _LEX_OPERATOR + '''
+		| (?P<char>\')
+		| (?P<string>")
+		''', re.A|re.X
+	)
+
+	# Same as RE_LEX_EXPRESSION, but a sign followed by a value is
+	# recognized as unary operator (used where an operand is expected)
+	RE_LEX_OPERAND = re.compile(
+		r''' # expression token in operand position
+		(?P<identifier>[a-zA-Z_]\w*)
+		| (?P<paren>\()
+		| ''' + _LEX_NUMBER + '''
+		| (?P<unary>[-+]\s*[0-9a-z_])
+		| ''' + _LEX_OPERATOR + '''
+		| (?P<char>\')
+		| (?P<string>")
+		''', re.A|re.X
+	)
+
+	# characters `consume_block()` must look at
+	RE_BLOCK_SPECIAL = re.compile(r'[()\[\]{}"\'/]')
+
+	# assoc array of right-to-left parens
+	PARENS_CLOSING = {
+		')': '(',
+		']': '[',
+		'}': '{'
+	}
+
+	# characters `consume_code()` must look at, by the end marks
+	_code_special = {}
+
+
+	def __init__(self, source, filename=None, begin=0, end=None):
+		super().__init__(source, filename, begin, end)
+		self.block_ends = {}
+
+
+	def sub_reader(self, begin, end, strip=False):
+		""" Get a reader for a part of the text
+
+		The known block ends are shared with the new reader.
+
+		See `BaseReader.sub_reader()`.
+
+		"""
+
+		rd = super().sub_reader(begin, end, strip)
+		rd.block_ends = self.block_ends
+
+		return rd
 
 
 	def sweep(self):
 		""" Consume comments and whitespace
 
+		Doc comments are not consumed, they must be kept.
+
 		Returns:
 			The consumed whitespace and comments
 
@@ -462,29 +676,44 @@ class CodeReader(BaseReader):
 
 		pos_begin = self.pos
 
-		while self.pos < self.length:
-			if self.has_inline_doc_comment():
-				# This is a comment, but it must be kept
-				break
-
-			# single-line comment
-			if self.has_inline_comment():
-				self.consume_inline_comment()
-				continue
+		if self.pos < self.length:
+			self.pos = self.matches(self.RE_SWEEP).end()
 
-			# multi-line comment
-			if self.has_block_comment():
+			if self.text.startswith(self.COMMENT_OPEN, self.pos, self.length):
+				# unterminated, let it report the error
 				self.consume_block_comment()
-				continue
 
-			# meaning-less whitespace
-			if self.matches(r'\s+'):
-				self.consume_whitespace()
-				continue
+		return self.from_pos(pos_begin)
 
-			break
 
-		return self.from_pos(pos_begin)
+	def lex(self, regex):
+		""" Classify the next lexeme
+
+		Whitespace and comments before the lexeme are swept.
+		The cursor is left at the start of the lexeme.
+
+		Args:
+			regex (regex): Master regex with a named group for each
+				lexeme kind, eg. `RE_LEX_EXPRESSION`.
+
+		Returns:
+			Tuple (kind, start, end). The kind is the name of the
+			matched group, None at the end of text and False if
+			nothing matched.
+
+		"""
+
+		self.sweep()
+
+		if self.pos >= self.length:
+			return (None, self.pos, self.pos)
+
+		m = regex.match(self.text, self.pos, self.length)
+
+		if m is None:
+			return (False, self.pos, self.pos)
+
+		return (m.lastgroup, m.start(), m.end())
 
 
 	def consume_block(self, keep_parens=True):
@@ -500,7 +729,34 @@ class CodeReader(BaseReader):
 
 		"""
 
+		(pos_begin, pos_end) = self.consume_block_span()
+
+		if keep_parens:
+			return self.text[pos_begin : pos_end]
+		else:
+			return self.text[pos_begin + 1 : pos_end - 1].strip()
+
+
+	def consume_block_span(self):
+		""" Consume until matching close parenthesis,
+		without copying the block.
+
+		Ends of all blocks nested in this block are remembered
+		in `block_ends`, so they don't have to be scanned again.
+
+		Returns:
+			Tuple (start, end) of the consumed block, parens included.
+
+		"""
+
 		pos_begin = self.pos
+
+		# a block found by an earlier scan
+		pos_end = self.block_ends.get(pos_begin)
+		if pos_end is not None and pos_end <= self.length:
+			self.pos = pos_end
+			return (pos_begin, pos_end)
+
 		opening = self.peek()
 
 		self.assert_matches(self.RE_PAREN_OPEN);
@@ -510,36 +766,59 @@ class CodeReader(BaseReader):
 		if closing is None:
 			self.error('Invalid opening paren/bracket: %s' % opening)
 
-		nested = 0
+		# positions of not yet closed parens, for each kind.
+		# Only parens of the same kind are matched with each other.
+		open_parens = {'(': [], '[': [], '{': []}
+
+		open_parens[opening].append(pos_begin)
 		self.consume()
 
 		while self.pos < self.length:
 
-			self.sweep()
+			# skip to the next character that matters
+			m = self.RE_BLOCK_SPECIAL.search(self.text, self.pos, self.length)
+			if m is None:
+				break
 
-			if self.matches( self.RE_STRING_QUOTE ):
+			self.pos = m.start()
+			char = m.group()
+
+			if char == '"':
 				self.consume_string()
 				continue
 
-			if self.matches( self.RE_CHAR_QUOTE ):
+			if char == "'":
 				self.consume_char()
 				continue
 
-			# look ahead
-			char = self.consume()
+			if char == '/':
+				if self.starts(self.COMMENT):
+					# line or doc comment, not significant here
+					self.consume_inline_comment()
+
+				elif self.has_block_comment():
+					self.consume_block_comment()
 
-			if char == opening:
-				# nested paren
-				nested += 1
-
-			elif char == closing:
-				if nested == 0:
-					if keep_parens:
-						return self.from_pos(pos_begin)
-					else:
-						return self.from_pos(pos_begin)[1:-1].strip()
 				else:
-					nested -= 1
+					self.consume()
+
+				continue
+
+			self.consume()
+
+			if char in self.PARENS:
+				# nested paren
+				open_parens[char].append(self.pos - 1)
+
+			else:
+				stack = open_parens[self.PARENS_CLOSING[char]]
+
+				if stack:
+					start = stack.pop()
+					self.block_ends[start] = self.pos
+
+					if start == pos_begin:
+						return (pos_begin, self.pos)
 
 		self.set_pos(pos_begin)
 		self.error( 'Unterminated %s...%s block' % (opening, closing) )
@@ -596,63 +875,131 @@ class CodeReader(BaseReader):
 
 		"""
 
+		(pos_begin, pos_end, code) = self.consume_code_span(end, eof, consume_end, keep_end)
+
+		if code is None:
+			code = self.text[pos_begin : pos_end]
+
+		return code
+
+
+	def consume_code_span(self, end=';', eof=False, consume_end=True, keep_end=True):
+		""" Consume code chunk until the given `end` delimiter,
+		without copying it if possible.
+
+		Arguments are the same as for `consume_code()`.
+
+		Returns:
+			Tuple (start, end, code). The code is None if it's the same
+			as the text between `start` and `end`; if comments had to
+			be removed from it, it's the code string.
+
+		"""
+
 		if type(end) == str:
 			end = [end] # wrap as array
 
+		special = self._code_special.get(tuple(end))
+		if special is None:
+			chars = ''.join(set(ee[0] for ee in end)) + '([\'"/'
+			special = re.compile('[%s]' % re.escape(chars))
+			self._code_special[tuple(end)] = special
+
 		pos_begin = self.pos
-		buffer = ''
+
+		# (start, end) of comments that are not part of the code
+		cuts = []
 
 		while self.pos < self.length:
 
+			# skip to the next character that matters
+			m = special.search(self.text, self.pos, self.length)
+			if m is None:
+				self.pos = self.length
+				break
+
+			self.pos = m.start()
+
 			for ee in end:
 				if self.starts(ee):
-					if not consume_end:
-						return buffer.strip()
-					else:
+					pos_code_end = self.pos
+
+					if consume_end:
+						self.consume_exact(ee)
+
 						if keep_end:
-							# consume end and add it to the value
-							buffer += self.consume_exact(ee)
-							return buffer.strip()
-						else:
-							# consume end, but don't add it to the value
-							self.consume_exact(ee)
-							return buffer.strip()
+							# add the end to the value
+							pos_code_end = self.pos
+
+					return self._code_span(pos_begin, pos_code_end, cuts)
 
 			char = self.peek()
 
 			if char in ['(', '[']:
-				buffer += self.consume_block()
+				self.consume_block_span()
 				continue
 
 			elif self.has_string():
-				buffer += self.consume_string()
+				self.consume_string()
 				continue
 
 			elif self.has_char():
-				buffer += self.consume_char()
+				self.consume_char()
 				continue
 
 			elif self.has_inline_doc_comment():
-				buffer += self.consume_inline_comment()
+				self.consume_inline_comment()
 				continue
 
 			elif self.has_block_comment():
+				pos_comment = self.pos
 				self.consume_block_comment()
+				cuts.append((pos_comment, self.pos))
 				continue
 
 			elif self.has_inline_comment():
+				pos_comment = self.pos
 				self.consume_inline_comment()
+				cuts.append((pos_comment, self.pos))
 				continue
 
-			buffer += self.consume()
+			self.consume()
 
 		if eof:
-			return buffer.strip()
+			return self._code_span(pos_begin, self.pos, cuts)
 		else:
 			self.set_pos(pos_begin)
 			self.error('Expected to find %s, found End Of File.' % end)
 
 
+	def _code_span(self, pos_begin, pos_end, cuts):
+		""" Build the result of `consume_code_span()`
+
+		Args:
+			pos_begin (int): Start of the consumed code
+			pos_end (int): End of the consumed code
+			cuts (tuple[]): Comments to leave out, (start, end)
+
+		Returns:
+			Tuple (start, end, code), see `consume_code_span()`
+
+		"""
+
+		if not cuts:
+			(pos_begin, pos_end) = self.strip_span(pos_begin, pos_end)
+			return (pos_begin, pos_end, None)
+
+		buffer = []
+		pos = pos_begin
+		for (cut_begin, cut_end) in cuts:
+			buffer.append(self.text[pos : cut_begin])
+			pos = cut_end
+
+		buffer.append(self.text[pos : pos_end])
+
+		return (pos_begin, pos_end, ''.join(buffer).strip())
+
+
 	def consume_char(self):
 		""" Consume a char literal
 
@@ -735,15 +1082,10 @@ class CodeReader(BaseReader):
 
 		pos_begin = self.pos
 
-		while self.pos < self.length:
-
-			if self.matches(r'[ \n\t]'):
-				self.consume() # advance
-			else:
-				return self.from_pos(pos_begin) # not whitespace anymore
+		if self.pos < self.length:
+			self.pos = self.matches(self.RE_WHITESPACE_CHARS).end()
 
-		# end reached
-		return self.from_pos(pos_begin) # all till the end
+		return self.from_pos(pos_begin)
 
 
 	def consume_inline_whitespace(self):
@@ -756,14 +1098,10 @@ class CodeReader(BaseReader):
 
 		pos_begin = self.pos
 
-		while self.pos < self.length:
-
-			if self.matches(r'[ \t]'):
-				self.consume() # advance
-			else:
-				return self.from_pos(pos_begin) # not whitespace anymore
+		if self.pos < self.length:
+			self.pos = self.matches(self.RE_INLINE_WHITESPACE).end()
 
-		return self.from_pos(pos_begin) # all the rest
+		return self.from_pos(pos_begin)
 
 
 	def consume_number(self):
@@ -780,34 +1118,25 @@ class CodeReader(BaseReader):
 		is_dec = False
 		is_bin = False
 
-		if self.matches(r'0x[0-9A-Fa-f]+'):
+		if self.matches(self.RE_HEX_NUMBER):
 			is_hex = True
 			self.consume(2)
-			while self.pos < self.length:
-				if self.matches(r'[0-9A-Fa-f_]'):
-					self.consume()
-				else:
-					break
+			if self.pos < self.length:
+				self.pos = self.matches(self.RE_HEX_DIGITS).end()
 
-		elif self.matches(r'0b[01]+'):
+		elif self.matches(self.RE_BIN_NUMBER):
 			is_bin = True
 			self.consume(2)
-			while self.pos < self.length:
-				if self.matches(r'[01_]'):
-					self.consume()
-				else:
-					break
+			if self.pos < self.length:
+				self.pos = self.matches(self.RE_BIN_DIGITS).end()
 
-		elif self.matches(r'-?[0-9]+'):
+		elif self.matches(self.RE_DEC_NUMBER):
 			is_dec = True
 			if self.starts('-'):
 				self.consume()
 
-			while self.pos < self.length:
-				if self.matches(r'[0-9_]'):
-					self.consume()
-				else:
-					break
+			if self.pos < self.length:
+				self.pos = self.matches(self.RE_DEC_DIGITS).end()
 
 		else:
 			self.error('Invalid number literal.')
@@ -851,19 +1180,19 @@ class CodeReader(BaseReader):
 
 		# always single so just consume it
 		# * / % ~ ^
-		if self.matches(r'^[*/%~^]'):
+		if self.matches(self.RE_OPERATOR_SHORT):
 			return self.consume()
 
 		# long ones
-		if self.matches(r'^(&&|\|\||<<|>>|>=|<=|==|!=|\+\+|--)'):
+		if self.matches(self.RE_OPERATOR_LONG):
 			return self.consume(2)
 
 		# < > !
-		if self.matches(r'[><!]'):
+		if self.matches(self.RE_OPERATOR_CMP):
 			return self.consume()
 
 		# - + | &
-		if self.matches(r'^[-+|&]'):
+		if self.matches(self.RE_OPERATOR_ARITH):
 			return self.consume()
 
 		self.error('Expected operator, found something else.')
@@ -880,24 +1209,57 @@ class CodeReader(BaseReader):
 
 		"""
 
-		buffer = ''
+		buffer = self._consume_assign_operator()
+
+		self.sweep()
+		buffer += ' '
+		buffer += self.consume_code(end=[';', ','], consume_end=False)
+
+		return buffer
+
+
+	def consume_rvalue_span(self):
+		""" Consume an rvalue, without copying it if possible.
+
+		Returns:
+			Tuple (start, end, rvalue), like `consume_code_span()`.
+			The rvalue is None if the text between `start` and `end`
+			can be used instead (comments in front of the expression
+			are not removed from it, though).
+
+		"""
+
+		pos_begin = self.pos
+
+		op = self._consume_assign_operator()
+
+		self.sweep()
+		(_, pos_end, code) = self.consume_code_span(end=[';', ','], consume_end=False)
+
+		if code is None:
+			return (pos_begin, pos_end, None)
+
+		return (pos_begin, pos_end, op + ' ' + code)
+
+
+	def _consume_assign_operator(self):
+		""" Consume the equals or extended equals of a rvalue
+
+		Returns:
+			The operator
+
+		"""
 
 		if self.starts('='):
-			buffer += self.consume()
+			return self.consume()
 
 		elif self.matches( self.RE_RVALUE_EXTENDED_EQUALS ):
 			# extended equals
-			buffer += self.consume_until('=') # consume it until the equals
+			return self.consume_until('=') # consume it until the equals
 
 		else:
 			self.error('Expected equals or extended equals, found:'+self.peek(2))
 
-		self.sweep()
-		buffer += ' '
-		buffer += self.consume_code(end=[';', ','], consume_end=False)
-
-		return buffer
-
 
 	def consume_identifier(self):
 		""" Consume next identifier
@@ -915,14 +1277,10 @@ class CodeReader(BaseReader):
 
 		self.consume() # consume first char
 
-		while self.pos < self.length:
-
-			if self.matches(self.RE_IDENTIFIER_BODY):
-				self.consume() # advance
-			else:
-				return self.from_pos(pos_begin) # not identifier char anymore
+		if self.pos < self.length:
+			self.pos = self.matches(self.RE_IDENTIFIER_BODY).end()
 
-		return self.from_pos(pos_begin) # all the rest
+		return self.from_pos(pos_begin)
 
 
 	def has_char(self):
@@ -945,13 +1303,13 @@ class CodeReader(BaseReader):
 		if self.has_end():
 			return False
 
-		if self.matches(r'0x[a-fA-F0-9]+'):
+		if self.matches(self.RE_HEX_NUMBER):
 			return True #hexa
 
-		if self.matches(r'0x[01]+'):
+		if self.matches(self.RE_BIN_NUMBER):
 			return True # bin
 
-		if self.matches(r'-?[0-9]+'):
+		if self.matches(self.RE_DEC_NUMBER):
 			return True # dec
 
 
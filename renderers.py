@@ -2,6 +2,7 @@
 
 import re
 import os
+import contextlib
 from statements import *
 from expressions import *
 from mutators import *
@@ -28,6 +29,10 @@ class Renderer:
 			The used indent
 		pragmas (dict):
 			Pragmas to follow
+		timings (Timings):
+			If set, the rendering steps are measured here
+		size_report (SizeReport):
+			If set, the size of the rendered statements is collected here
 
 	"""
 
@@ -36,6 +41,21 @@ class Renderer:
 		self._prepared = None
 		self.indent = '    '
 		self.pragmas = {}
+		self.timings = None
+		self.size_report = None
+
+
+	def _measure(self, name):
+		""" Measure a rendering step, if timings are enabled
+
+		Returns:
+			context manager giving the Phase, or None
+		"""
+
+		if self.timings is None:
+			return contextlib.nullcontext()
+
+		return self.timings.measure(name)
 
 
 	def _get_name(self):
@@ -126,7 +146,13 @@ class Renderer:
 
 				self._prepared = [banner] + self._prepared
 
-		return self._render(self._prepared)
+		with self._measure('render') as phase:
+			text = self._render(self._prepared)
+
+			if phase is not None:
+				phase.items['lines'] = text.count('\n')
+
+		return text
 
 
 	def _prepare(self, code):
@@ -212,12 +238,12 @@ class CSyntaxRenderer(Renderer):
 	def _render(self, code):
 		""" Overrides render stub from Renderer """
 
-		src = ''
+		src = OutputBuilder()
 
 		for s in code:
-			src += self._render_any(s)
+			src.add(self._render_any(s))
 
-		return src.strip() + '\n'  # One trailing newline
+		return src.get().strip() + '\n'  # One trailing newline
 
 
 	def _render_any(self, s, level=0, indent_first=True, append_newline=True):
@@ -238,8 +264,15 @@ class CSyntaxRenderer(Renderer):
 
 		"""
 
+		if self.size_report is not None:
+			self.size_report.enter(s)
+
 		# remove whitespace at ends
 		src = self._do_render_any(s).strip('\n')
+
+		if self.size_report is not None:
+			self.size_report.leave(s, src)
+
 		if src == '':
 			return src
 
@@ -291,28 +324,30 @@ class CSyntaxRenderer(Renderer):
 
 
 	def _render_block(self, s):  # S_Block
-		src = '{\n'
+		src = OutputBuilder()
+		src.add('{\n')
 
 		for c in s.children:
-			src += self._render_any(c, 1)
+			src.add(self._render_any(c, 1))
 
-		src += '}'
+		src.add('}')
 
-		return src
+		return src.get()
 
 
 	def _render_switch_block(self, s):  # S_Block
-		src = '{\n'
+		src = OutputBuilder()
+		src.add('{\n')
 
 		for c in s.children:
 			if isinstance(c, S_Case) or isinstance(c, S_Default):
-				src += self._render_any(c, 1)
+				src.add(self._render_any(c, 1))
 			else:
-				src += self._render_any(c, 2)
+				src.add(self._render_any(c, 2))
 
-		src += '}'
+		src.add('}')
 
-		return src
+		return src.get()
 
 
 	def _render_empty(self, s):  # S_Empty
@@ -384,15 +419,10 @@ class CSyntaxRenderer(Renderer):
 			#  can be removed as dead code.
 
 			if type(s.cond) is E_Group and self.do_simplify_expressions:
-				try:
-					as_str = self._erndr._render_expr(s.cond, expr_render_mode='eval')
-					val = eval_expr(as_str)
-
-					s.cond = E_Literal( T_Number( str( round(val) ) ) )
+				val = fold_expr(s.cond)
 
-				except (ValueError, TypeError, SyntaxError, KeyError) as e:
-					#print("Error evaluating ", as_str, e)
-					pass
+				if val is not None:
+					s.cond = E_Literal( T_Number( str(val) ) )
 
 			# Optimization for dead branch
 			if type(s.cond) is E_Literal:
@@ -730,6 +760,20 @@ class BaseSdsRenderer(CSyntaxRenderer):
 			if isinstance(s, S_Function):
 				self._userfuncs.append(s.name)
 
+	def _mutate(self, code):
+		""" Apply the mutators (set by subclasses) in order """
+
+		for mut in self.mutators:
+			mut.tag_origins = self.size_report is not None
+
+			with self._measure(type(mut).__name__) as phase:
+				code = mut.transform(code)
+
+				if phase is not None:
+					phase.items['statements'] = len(code)
+
+		return code
+
 	def _render(self, code):
 		rv = super()._render(code)
 		if not config.QUIET:
@@ -866,11 +910,7 @@ class SimpleSdsRenderer(BaseSdsRenderer):
 
 
 	def _prepare(self, code):
-
-		for mut in self.mutators:
-			code = mut.transform(code)
-
-		return code
+		return self._mutate(code)
 
 
 
@@ -906,8 +946,4 @@ class AsmSdsRenderer(BaseSdsRenderer):
 
 
 	def _prepare(self, code):
-
-		for mut in self.mutators:
-			code = mut.transform(code)
-
-		return code
+		return self._mutate(code)
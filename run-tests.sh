@@ -73,3 +73,16 @@ for filename in tests-error/*.in.c; do
 		exit
 	fi
 done
+
+echo "API tests..."
+# programs compiled in one process, through the compiler API or the compile server
+for filename in tests-api/*.py; do
+    python3 "$filename"
+
+    if [[ $? != 0 ]]; then
+		echo -e "\x1b[31mTest \"$filename\" failed!\x1b[m"
+		exit
+	fi
+
+	echo -e "\x1b[32mTEST \"$filename\" OK\x1b[m"
+done
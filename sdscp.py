@@ -7,17 +7,30 @@ import math
 import re
 import traceback
 
-import getpass
-
-from directives import DirectiveProcessor, D_Pragma
-from tokens import Tokenizer
-from renderers import *
+import io
+import os
+import json
+import contextlib
+import time
+import signal
+import socket
+import itertools
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+
+from directives import D_Pragma
+from build_cache import BuildCache
+from timings import Timings
+from size_report import SizeReport
+from tokens import Tokenizer, show_tokenlist
+from renderers import CSyntaxRenderer
 from sdscp_errors import *
 import statements
+import compiler
 
 import config
 
-VERSION = '1.8.11'
+VERSION = compiler.VERSION
 
 # ==================== Command Line Arguments processing =======================
 
@@ -39,7 +52,8 @@ parser = argparse.ArgumentParser(
 
 parser.add_argument(
 		'source',
-		help='The source file to process'
+		nargs='*',
+		help='The source file(s) to process'
 )
 
 parser.add_argument(
@@ -51,11 +65,22 @@ parser.add_argument(
 
 parser.add_argument(
 		'-o', '--output',
-		help='The output file; %%v in the name will be replaced with the \
-		      program\'s version. To just print the output, use -d instead.',
+		help='The output file; %%V in the name will be replaced with the \
+		      program\'s version, %%N with the source file name (without \
+		      extension), which is required with more source files. \
+		      To just print the output, use -d instead.',
 		action='store',
 )
 
+parser.add_argument(
+		'-m', '--manifest',
+		action='store',
+		help='JSON file with a list of programs to compile, each like \
+		      {"source": "a.c", "output": "out/a.c", "pragmas": {"name": "value"}}; \
+		      the pragmas are added to those given by -p. Paths are relative \
+		      to the manifest.'
+)
+
 parser.add_argument(
 		'-p', '--pragma',
 		help='Set a pragma value (syntax like #pragma). All pragmas are \
@@ -149,190 +174,345 @@ parser.add_argument(
 		help='Show stack trace for SDSCP syntax errors (for debugging)'
 )
 
-args = parser.parse_args()
+parser.add_argument(
+		'--cache-dir',
+		action='store',
+		help='Directory for caching the rendered outputs. A program that \
+		      resolves to the same code with the same pragmas is not \
+		      compiled again (the cached output keeps its build time).'
+)
 
+parser.add_argument(
+		'--cache-size',
+		action='store',
+		type=int,
+		default=64,
+		help='Size limit of the cache in MB; the least recently used \
+		      outputs are removed when it is exceeded. (default: 64)'
+)
 
-SRC		= args.source
-DEST	= args.output
+parser.add_argument(
+		'--cache-stats',
+		action='store_true',
+		default=False,
+		help='Show cache statistics (can be used without a source file)'
+)
 
+parser.add_argument(
+		'-j', '--jobs',
+		action='store',
+		type=int,
+		default=1,
+		help='Number of programs compiled in parallel; 0 to use all CPU \
+		      cores. Their messages are shown in the original order. (default: 1)'
+)
 
-SHOW_ORIGINAL	= args.verbose or args.show_original
+parser.add_argument(
+		'-w', '--watch',
+		action='store_true',
+		default=False,
+		help='After compiling, watch the sources and the files they include, \
+		      and compile again the programs affected by a change.'
+)
 
-SHOW_RESOLVED	= args.verbose or args.show_resolved
-SHOW_MACROS		= args.verbose or args.show_macros
-SHOW_PROCESSED	= args.verbose or args.show_processed
-SHOW_TOKENS		= args.verbose or args.show_tokens
-SHOW_STATEMENTS	= args.verbose or args.show_statements
-SHOW_GENERATED	= args.verbose or args.show_generated
-SHOW_OUTPUT		= args.verbose or args.display
-config.SHOW_CALLGRAPH = args.verbose or args.show_callgraph
+parser.add_argument(
+		'--watch-interval',
+		action='store',
+		type=float,
+		default=0.5,
+		help='Seconds between checks of the watched files. (default: 0.5)'
+)
 
-config.QUIET	= not args.verbose and args.quiet
-SHOW_STRACE     = args.error_trace
+parser.add_argument(
+		'--timings',
+		action='store_true',
+		default=False,
+		help='Show the time, CPU time, peak memory and size of the output \
+		      of each compilation phase (and each optimization pass). \
+		      Tracing the memory makes the compilation a few times slower.'
+)
 
-pragmas_args = {}
+parser.add_argument(
+		'--timings-json',
+		action='store',
+		metavar='FILE',
+		help='Write the measurements of --timings of all the programs \
+		      to a JSON file'
+)
 
-for p in args.pragma:
-	pr = D_Pragma('#pragma ' + ' '.join(p))
-	pragmas_args[pr.name] = pr.value
+parser.add_argument(
+		'--size-report',
+		action='store_true',
+		default=False,
+		help='Show the size of the generated code (statements, estimated \
+		      bytecode and string bytes, labels) of each user function, \
+		      including its inlined copies and call / push-pop overhead.'
+)
+
+parser.add_argument(
+		'--size-report-json',
+		action='store',
+		metavar='FILE',
+		help='Write the --size-report of all the programs to a JSON file'
+)
+
+parser.add_argument(
+		'--serve',
+		action='store',
+		metavar='SOCKET',
+		help='Run a compile server listening on this Unix socket, \
+		      for use with sdscp_client.py'
+)
+
+
+# Settings of the current job, see apply_settings()
+
+CACHE			= None
+
+SHOW_ORIGINAL	= False
+SHOW_RESOLVED	= False
+SHOW_MACROS		= False
+SHOW_PROCESSED	= False
+SHOW_TOKENS		= False
+SHOW_STATEMENTS	= False
+SHOW_GENERATED	= False
+SHOW_OUTPUT		= False
+SHOW_STRACE		= False
+SHOW_TIMINGS	= False
+MEASURE			= False
+SHOW_SIZES		= False
+COLLECT_SIZES	= False
 
 
 # ==================== Utils =======================
 
 
-def banner(text, fill='-', length=80):
-	""" Show a banner line """
-	blob = (fill*length + ' ' + text + ' ' + fill*length)
-	overlap = len(blob)-80
-	print('\n' + blob[ math.floor(overlap/2) : math.floor(-overlap/2)] + '\n')
+def parse_pragma(name, value):
+	""" Parse a pragma given outside of the source
 
+	Args:
+		name (str): Name of the pragma
+		value: Value, as written in a #pragma
 
-def prep4disp(code):
-	c = '  ' + re.sub(r'\n', '\n  ', code)
-	c = re.sub(r'\t', '    ', c)
-	return c
+	Returns:
+		(name, value) with the value converted like in a #pragma
 
+	"""
 
-# ==================== MAIN TASK =======================
+	if isinstance(value, bool):
+		value = 'true' if value else 'false'
 
-try:
-	if not config.QUIET: banner('SDS-C Preprocessor', ':')
-	if not config.QUIET: print('Reading file:', SRC)
+	pr = D_Pragma('#pragma %s %s' % (name, value))
+	return (pr.name, pr.value)
 
-	# read the file
-	dproc = DirectiveProcessor(SRC, pragmas_args)
 
-	if SHOW_ORIGINAL:
-		banner('SOURCE', '-')
-		print(prep4disp( dproc.source ) + '\n')
+def load_manifest(path):
+	""" Load a list of programs to compile
 
-	# ---------------- Resolve directives ------------------
+	Args:
+		path (str): The JSON manifest file
 
-	if not config.QUIET: print('Resolving directives...')
-	# include files, resolve branching, find macros...
-	dproc.process()
+	Returns:
+		List of (source, output, pragmas dict)
 
+	"""
 
-	# -------------------- Apply macros --------------------
+	with open(path, 'r', encoding='utf-8') as f:
+		programs = json.load(f)
 
-	pragmas = dproc.get_pragmas()
+	base = os.path.dirname(path)
+	jobs = []
 
-	pragmas['main_file'] = SRC
-	pragmas['sdscp_version'] = VERSION
+	for p in programs:
+		src = os.path.join(base, p['source'])
 
-	if 'name' not in pragmas.keys():
-		pragmas['name'] = SRC
+		dest = p.get('output')
+		if dest is not None:
+			dest = os.path.join(base, dest)
 
-	if 'author' not in pragmas.keys():
-		try:
-			pragmas['author'] = getpass.getuser()
-		except Exception:
-			pass
+		pragmas = dict(parse_pragma(n, v) for (n, v) in p.get('pragmas', {}).items())
 
+		jobs.append((src, dest, pragmas))
 
-	if SHOW_MACROS:
-		banner('MACROS', '-')
-		print('List of all found macros, in definition order:\n')
-		for d in dproc.get_defines().values():
-			for m in d:
-				print('  ' + str(m))
-		print()
+	return jobs
 
-		banner('PRAGMAS', '-')
-		print('List of all #pragma config key-value pairs\n')
-		for (k, v) in dproc.get_pragmas().items():
-			print('%s = %s' % (k, v))
 
-		print()
+def apply_settings(settings):
+	""" Set the options of the job about to be compiled
 
+	A worker compiles jobs one after another, so every job sets
+	all its options, including the globals in the config module.
 
-	if SHOW_RESOLVED:
-		banner('RESOLVED', '-')
-		print('Code after resolving includes, # branching, and extracting macros:\n')
-		print(prep4disp( dproc.get_output() ) + '\n')
+	Args:
+		settings (dict): {global name -> value}, names starting
+			with 'config.' are set in the config module.
 
-	if not config.QUIET: print('Applying macros...')
-	# perform macro replacements
-	dproc.apply_macros()
-	# get output code
-	processed = dproc.get_output()
+	"""
 
+	for (name, value) in settings.items():
+		if name.startswith('config.'):
+			setattr(config, name[len('config.'):], value)
+		else:
+			globals()[name] = value
 
-	if SHOW_PROCESSED:
-		banner('PROCESSED', '-')
-		print('Code after replacing macros:\n')
 
-		print(prep4disp(processed) + '\n')
+def banner(text, fill='-', length=80):
+	""" Show a banner line """
+	blob = (fill*length + ' ' + text + ' ' + fill*length)
+	overlap = len(blob)-80
+	print('\n' + blob[ math.floor(overlap/2) : math.floor(-overlap/2)] + '\n')
 
 
-	if not config.QUIET: print('Tokenizing code...')
-	tk = Tokenizer(processed)
-	tokens = tk.tokenize()
-	sts = statements.parse(tokens)
+def prep4disp(code):
+	c = '  ' + re.sub(r'\n', '\n  ', code)
+	c = re.sub(r'\t', '    ', c)
+	return c
+
 
+def show_cache_stats(cache):
+	""" Print statistics of the build cache """
 
-	if SHOW_TOKENS:
-		banner('TOKENIZED', '-')
-		print('Tokenization of the processed code:\n')
-		tk.show()
-		print('')
+	st = cache.stats()
 
+	banner('CACHE', '-')
+	print('Cache directory: %s\n' % cache.directory)
+	print('  entries ..... %d' % st['entries'])
+	print('  size ........ %d KB (limit %d KB)' % (st['size'] // 1024, st['max_size'] // 1024))
+	print('  hits ........ %d' % st['hits'])
+	print('  misses ...... %d' % st['misses'])
+	print('  evictions ... %d' % st['evictions'])
+	print()
+
+
+# ==================== MAIN TASK =======================
 
-	if SHOW_STATEMENTS:
-		banner('STATEMENTS', '-')
-		print('Source code abstraction:\n')
 
-		for s in sts:
-			print(str(s))
+def show_phase(phase, result):
+	""" Show the results of a compilation phase, as requested by the options """
 
+	if phase == 'read':
+		if SHOW_ORIGINAL:
+			banner('SOURCE', '-')
+			print(prep4disp( result.source ) + '\n')
 
-	if SHOW_GENERATED:
-		banner('GENERATED', '-')
-		print('Code generated from statements:\n')
+	elif phase == 'resolved':
+		if SHOW_MACROS:
+			banner('MACROS', '-')
+			print('List of all found macros, in definition order:\n')
+			for d in result.defines.values():
+				for m in d:
+					print('  ' + str(m))
+			print()
 
-		rndr = CSyntaxRenderer(sts)
-		print(prep4disp(rndr.render()))
+			banner('PRAGMAS', '-')
+			print('List of all #pragma config key-value pairs\n')
+			for (k, v) in result.pragmas.items():
+				print('%s = %s' % (k, v))
 
+			print()
 
-	if DEST != None or SHOW_OUTPUT:
+		if SHOW_RESOLVED:
+			banner('RESOLVED', '-')
+			print('Code after resolving includes, # branching, and extracting macros:\n')
+			print(prep4disp( result.resolved ) + '\n')
 
-		# perform tweaks to match some of SDS-C's broken syntax
+	elif phase == 'processed':
+		if SHOW_PROCESSED:
+			banner('PROCESSED', '-')
+			print('Code after replacing macros:\n')
 
-		rtype = pragmas.get('renderer', 'asm')
+			print(prep4disp(result.processed) + '\n')
 
-		if rtype in ['sds', 'simple']:
-			rtype = 'simple'
-			rndr = SimpleSdsRenderer(sts)
-		elif rtype in ['sds2', 'asm']:
-			rtype = 'asm'
-			rndr = AsmSdsRenderer(sts)
-		elif rtype in ['debug']:
+	elif phase == 'parsed':
+		if SHOW_TOKENS:
+			banner('TOKENIZED', '-')
+			print('Tokenization of the processed code:\n')
+			show_tokenlist(result.tokens)
+			print('')
+
+		if SHOW_STATEMENTS:
+			banner('STATEMENTS', '-')
+			print('Source code abstraction:\n')
+
+			for s in result.statements:
+				print(str(s))
+
+		if SHOW_GENERATED:
+			banner('GENERATED', '-')
+			print('Code generated from statements:\n')
+
+			# the statements are changed by rendering, use a copy
+			sts = statements.parse(Tokenizer(result.processed).tokenize())
 			rndr = CSyntaxRenderer(sts)
-		else:
-			raise Exception('Unknown renderer: "%s"' % rtype)
+			print(prep4disp(rndr.render()))
+
 
-		rndr.set_pragmas(pragmas)
+def compile_file(src, dest, pragmas_args):
+	""" Compile one program
 
-		if not config.QUIET: print('Rendering to SDS-C using "%s" renderer...' % rtype)
-		for_sds = rndr.render()
+	Args:
+		src (str): The source file
+		dest (str): The output file, None to only display it
+		pragmas_args (dict): Pragmas given from outside the source
+
+	Returns:
+		The CompileResult, check its error
+
+	"""
+
+	if not config.QUIET: banner('SDS-C Preprocessor', ':')
+
+	# the debug views and the size report need the statements, which a cached output skips
+	use_cache = not (SHOW_TOKENS or SHOW_STATEMENTS or SHOW_GENERATED or COLLECT_SIZES)
+
+	result = compiler.compile(
+		src,
+		pragmas_args,
+		cache=CACHE if use_cache else None,
+		render=dest != None or SHOW_OUTPUT,
+		quiet=config.QUIET,
+		show_callgraph=config.SHOW_CALLGRAPH,
+		capture=False,
+		on_phase=show_phase,
+		timings=Timings() if MEASURE else None,
+		size_report=SizeReport() if COLLECT_SIZES else None
+	)
+
+	if SHOW_TIMINGS:
+		banner('TIMINGS: %s' % src, '-')
+		print(result.timings.table() + '\n')
+
+	if not result.ok:
+		return result
+
+	if SHOW_SIZES and result.output is not None:
+		banner('SIZE REPORT: %s' % src, '-')
+		print(result.size_report.table() + '\n')
+
+	if dest != None or SHOW_OUTPUT:
 
 		if SHOW_OUTPUT:
 			banner('OUTPUT SDS-C CODE', '-')
-			print(prep4disp(for_sds) + '\n')
-
-		if DEST != None:
-			if 'version' in pragmas:
-				DEST = DEST.replace("%V", pragmas.get('version'))
-			if not config.QUIET: print('Writing to file: %s' % DEST)
-			f = open(DEST, 'w')
-			f.write(for_sds)
+			print(prep4disp(result.output) + '\n')
+
+		if dest != None:
+			if 'version' in result.pragmas:
+				dest = dest.replace("%V", result.pragmas.get('version'))
+			if not config.QUIET: print('Writing to file: %s' % dest)
+			f = open(dest, 'w')
+			f.write(result.output)
 			f.close()
 		else:
 			print('No output file specified.')
 
 	if not config.QUIET: print('\nDone.\n')
 
-except Exception as e:
+	return result
+
+
+def report_error(e):
+	""" Show an error that stopped the compilation """
+
 	errname = type(e).__name__
 	disp_errname = errname
 
@@ -361,8 +541,7 @@ except Exception as e:
 
 	# Extra debug info requested
 	if SHOW_STRACE or not is_custom:
-		type_, value_, traceback_ = sys.exc_info()
-		ex = traceback.format_exception(type_, value_, traceback_)
+		ex = traceback.format_exception(type(e), e, e.__traceback__)
 		for line in ex:
 			# discard useless junk
 			if (('raise %s' % errname) in line) or ('File "<string>", line None' in line):
@@ -371,5 +550,434 @@ except Exception as e:
 	else:
 		print(str(e) + '\n')
 		print('To see debug info, please use the -x flag.\n')
-	
-	sys.exit(1)
+
+
+def run_job(job, settings, announce_failure):
+	""" Compile a program in a worker process
+
+	Args:
+		job (tuple): (source, output, pragmas)
+		settings (dict): Options of the job, see apply_settings()
+		announce_failure (bool): Show which file failed before the error
+
+	Returns:
+		(succeeded, included files, reports, the messages it printed)
+
+	"""
+
+	apply_settings(settings)
+
+	buf = io.StringIO()
+	with contextlib.redirect_stdout(buf):
+		(ok, includes, reports) = compile_job(job, announce_failure)
+
+	return (ok, includes, reports, buf.getvalue())
+
+
+def compile_job(job, announce_failure):
+	""" Compile a program, report its errors
+
+	Args:
+		job (tuple): (source, output, pragmas)
+		announce_failure (bool): Show which file failed before the error
+
+	Returns:
+		(True if it succeeded, files it included or looked for, reports) where reports
+		is a dict with the JSON-serializable "phases" (--timings) and
+		"functions" (--size-report), if they were collected.
+
+	"""
+
+	(src, dest, pragmas) = job
+	reports = {}
+
+	try:
+		result = compile_file(src, dest, pragmas)
+		(error, includes) = (result.error, result.includes + result.missing_includes)
+
+		if result.timings is not None:
+			reports['phases'] = result.timings.to_json()
+
+		if result.size_report is not None and result.output is not None:
+			reports['functions'] = result.size_report.to_json()
+
+	except Exception as e:
+		# e.g. the output could not be written
+		(error, includes) = (e, [])
+
+	if error is None:
+		return (True, includes, reports)
+
+	if announce_failure:
+		print('Failed to compile: %s' % src)
+
+	report_error(error)
+	return (False, includes, reports)
+
+
+def build(jobs, settings, executor, announce_failure):
+	""" Compile programs
+
+	Args:
+		jobs (tuple[]): The programs, (source, output, pragmas)
+		settings (dict): Options of the jobs, see apply_settings()
+		executor (ProcessPoolExecutor): Workers to compile the programs
+			in parallel, None to compile them here, one by one.
+		announce_failure (bool): Show which file failed before the error
+
+	Returns:
+		List of results of compile_job(), in the order of the jobs
+
+	"""
+
+	if executor is None or len(jobs) < 2:
+		return [compile_job(job, announce_failure) for job in jobs]
+
+	# messages of each job are printed together, in the order of the jobs
+	results = []
+	for (ok, includes, reports, messages) in executor.map(run_job, jobs, itertools.repeat(settings), itertools.repeat(announce_failure)):
+		sys.stdout.write(messages)
+		results.append((ok, includes, reports))
+
+	return results
+
+
+def write_report(path, key, jobs, results):
+	""" Write a report of the programs to a JSON file
+
+	Args:
+		path (str): The JSON file
+		key (str): The report, "phases" or "functions"
+		jobs (tuple[]): The programs
+		results (tuple[]): Their results, from build()
+
+	"""
+
+	report = []
+	for ((src, dest, pragmas), (ok, includes, reports)) in zip(jobs, results):
+		report.append({
+			'source': src,
+			'ok': ok,
+			key: reports.get(key, []),
+		})
+
+	with open(path, 'w') as f:
+		json.dump(report, f, indent=2)
+		f.write('\n')
+
+
+def show_summary(jobs, results):
+	""" Show status of the compiled programs """
+
+	banner('SUMMARY', '=')
+	for ((src, dest, pragmas), (ok, includes, reports)) in zip(jobs, results):
+		print('  %-8s%s' % ('OK' if ok else 'FAILED', src))
+
+	failed = [r for r in results if not r[0]]
+	print('\n%d compiled, %d failed.\n' % (len(results) - len(failed), len(failed)))
+
+
+def _stamp(path):
+	""" Modification time and size of a file, None if it's missing """
+
+	try:
+		st = os.stat(path)
+		return (st.st_mtime_ns, st.st_size)
+	except OSError:
+		return None
+
+
+def watch(jobs, results, settings, interval):
+	""" Rebuild the programs affected by changes of their files, until interrupted
+
+	The rebuilds run in this process, one by one, so they reuse the
+	cached includes of the previous builds (the workers of -j each
+	have their own cache). Paths where an include was looked for but
+	not found are watched too, a header created there shadows the one
+	used before.
+
+	Args:
+		jobs (tuple[]): The programs, (source, output, pragmas)
+		results (tuple[]): Results of their first build, from build()
+		settings (dict): Options of the jobs, see apply_settings()
+		interval (float): Seconds between checks of the files
+
+	"""
+
+	# file -> indices of the jobs using it
+	users = {}
+	stamps = {}
+
+	def track(i, includes):
+		for f in set([os.path.abspath(jobs[i][0])] + includes):
+			users.setdefault(f, set()).add(i)
+			if f not in stamps:
+				stamps[f] = _stamp(f)
+
+	for (i, (ok, includes, reports)) in enumerate(results):
+		track(i, includes)
+
+	print('Watching %d files of %d programs, press Ctrl+C to stop.' % (len(stamps), len(jobs)))
+
+	try:
+		while True:
+			time.sleep(interval)
+
+			changed = [f for (f, st) in stamps.items() if _stamp(f) != st]
+			if len(changed) == 0:
+				continue
+
+			for f in changed:
+				stamps[f] = _stamp(f)
+
+			affected = sorted(set.union(*[users[f] for f in changed]))
+
+			t0 = time.perf_counter()
+			rebuilt = build([jobs[i] for i in affected], settings, None, len(jobs) > 1)
+			t = time.perf_counter() - t0
+
+			# the includes may have changed
+			for i in affected:
+				for f in users.keys():
+					users[f].discard(i)
+
+			for (i, (ok, includes, reports)) in zip(affected, rebuilt):
+				track(i, includes)
+
+			failed = len([r for r in rebuilt if not r[0]])
+
+			print('Changed %s: rebuilt %d of %d programs in %.0f ms%s' % (
+				', '.join(os.path.relpath(f) for f in changed),
+				len(affected),
+				len(jobs),
+				t * 1000,
+				(', %d failed' % failed) if failed else ''
+			))
+
+	except KeyboardInterrupt:
+		print()
+
+
+def serve_request(request):
+	""" Compile a program requested from a client
+
+	The program is compiled in the working directory of the client,
+	so the paths (and their resolution) are the same as with sdscp.
+	The cached includes remember the directory they were resolved in,
+	clients in other directories don't get them.
+
+	Args:
+		request (dict): {"source": path, "cwd": directory of the client,
+			"pragmas": [[name, value], ...], "renderer": name or null,
+			"quiet": bool}
+
+	Returns:
+		Response dict: {"ok": bool, "output": code or null,
+			"messages": str, "error": str or null,
+			"version": the program version pragma or null}
+
+	"""
+
+	pragmas = dict(parse_pragma(n, v) for (n, v) in request.get('pragmas', []))
+
+	cwd = os.getcwd()
+	os.chdir(request.get('cwd', cwd))
+
+	try:
+		result = compiler.compile(
+			request['source'],
+			pragmas,
+			renderer=request.get('renderer'),
+			cache=CACHE,
+			quiet=request.get('quiet', True)
+		)
+
+		error = None
+		if not result.ok:
+			buf = io.StringIO()
+			with contextlib.redirect_stdout(buf):
+				report_error(result.error)
+
+			error = buf.getvalue()
+	finally:
+		os.chdir(cwd)
+
+	return {
+		'ok': result.ok,
+		'output': result.output,
+		'messages': result.messages,
+		'error': error,
+		'version': (result.pragmas or {}).get('version'),
+	}
+
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+	""" Handles a connection to the compile server: one JSON request
+	line is answered by one JSON response line """
+
+	def handle(self):
+		t0 = time.perf_counter()
+
+		try:
+			request = json.loads(self.rfile.readline().decode('utf-8'))
+			response = serve_request(request)
+		except Exception as e:
+			request = {}
+			response = {'ok': False, 'output': None, 'messages': '', 'version': None,
+						'error': 'Request failed: %s\n' % e}
+
+		self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+
+		if not config.QUIET:
+			print('%s %s (%.1f ms)' % (
+				'Compiled' if response['ok'] else 'Failed',
+				request.get('source'),
+				(time.perf_counter() - t0) * 1000
+			))
+
+
+def serve(path):
+	""" Run the compile server until interrupted
+
+	The server stays loaded, with the include and build caches warm,
+	so a request is answered without starting Python and importing
+	everything again. Requests are handled one by one.
+
+	Args:
+		path (str): Path of the Unix socket
+
+	"""
+
+	if os.path.exists(path):
+		# a leftover of a server that was killed?
+		s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			s.connect(path)
+			raise Exception('A server is already running at %s' % path)
+		except ConnectionRefusedError:
+			os.remove(path)
+		finally:
+			s.close()
+
+	def terminate(signum, frame):
+		raise KeyboardInterrupt()
+
+	# stop cleanly also when killed
+	signal.signal(signal.SIGTERM, terminate)
+
+	with socketserver.UnixStreamServer(path, CompileRequestHandler) as server:
+		print('Compile server listening at %s, press Ctrl+C to stop.' % path)
+
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			print()
+		finally:
+			os.remove(path)
+
+
+def main():
+	args = parser.parse_args()
+
+	if args.serve is not None:
+		if args.cache_dir is not None:
+			apply_settings({'CACHE': BuildCache(args.cache_dir, args.cache_size * 1024 * 1024)})
+
+		config.QUIET = not args.verbose and args.quiet
+		serve(args.serve)
+		return
+
+	if not args.source and args.manifest is None and not args.cache_stats:
+		parser.error('the following arguments are required: source')
+
+	if len(args.source) > 1 and args.output is not None and '%N' not in args.output:
+		parser.error('with more source files, the output name must contain %N')
+
+	if args.cache_stats and args.cache_dir is None:
+		parser.error('--cache-stats requires --cache-dir')
+
+	cache = None
+	if args.cache_dir is not None:
+		cache = BuildCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+	settings = {
+		'CACHE':			cache,
+		'SHOW_ORIGINAL':	args.verbose or args.show_original,
+		'SHOW_RESOLVED':	args.verbose or args.show_resolved,
+		'SHOW_MACROS':		args.verbose or args.show_macros,
+		'SHOW_PROCESSED':	args.verbose or args.show_processed,
+		'SHOW_TOKENS':		args.verbose or args.show_tokens,
+		'SHOW_STATEMENTS':	args.verbose or args.show_statements,
+		'SHOW_GENERATED':	args.verbose or args.show_generated,
+		'SHOW_OUTPUT':		args.verbose or args.display,
+		'SHOW_STRACE':		args.error_trace,
+		'SHOW_TIMINGS':		args.timings,
+		'MEASURE':			args.timings or args.timings_json is not None,
+		'SHOW_SIZES':		args.size_report,
+		'COLLECT_SIZES':	args.size_report or args.size_report_json is not None,
+		'config.SHOW_CALLGRAPH':	args.verbose or args.show_callgraph,
+		'config.QUIET':				not args.verbose and args.quiet,
+		'config.PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT':	config.PUSHPOP_TRAMPOLINE_MIN_TMP_COUNT,
+	}
+
+	apply_settings(settings)
+
+	pragmas_args = {}
+
+	for p in args.pragma:
+		(name, value) = parse_pragma(p[0], ' '.join(p[1:]))
+		pragmas_args[name] = value
+
+	jobs = []
+
+	for src in args.source:
+		dest = args.output
+		if dest is not None:
+			dest = dest.replace('%N', os.path.splitext(os.path.basename(src))[0])
+
+		jobs.append((src, dest, {}))
+
+	if args.manifest is not None:
+		jobs.extend(load_manifest(args.manifest))
+
+	# add the pragmas given by -p
+	for (i, (src, dest, pragmas)) in enumerate(jobs):
+		job_pragmas = dict(pragmas_args)
+		job_pragmas.update(pragmas)
+		jobs[i] = (src, dest, job_pragmas)
+
+	announce = len(jobs) > 1
+	workers = args.jobs if args.jobs > 0 else os.cpu_count()
+
+	executor = None
+	if workers > 1 and len(jobs) > 1:
+		executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+
+	try:
+		results = build(jobs, settings, executor, announce)
+
+		if len(jobs) > 1:
+			show_summary(jobs, results)
+
+		if args.timings_json is not None:
+			write_report(args.timings_json, 'phases', jobs, results)
+
+		if args.size_report_json is not None:
+			write_report(args.size_report_json, 'functions', jobs, results)
+
+		if args.watch:
+			watch(jobs, results, settings, args.watch_interval)
+
+	finally:
+		if executor is not None:
+			executor.shutdown()
+
+	if args.cache_stats:
+		show_cache_stats(cache)
+
+	if not args.watch and not all(r[0] for r in results):
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,118 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Thin client of the SDSCP compile server (sdscp --serve SOCKET)
+
+Sends a program to compile to the server and shows the result,
+without loading SDSCP itself.
+
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+
+
+parser = argparse.ArgumentParser(
+	description='Client of the SDSCP compile server (started with sdscp --serve SOCKET)'
+	)
+
+parser.add_argument(
+		'socket',
+		help='The Unix socket the server listens on'
+)
+
+parser.add_argument(
+		'source',
+		help='The source file to process'
+)
+
+parser.add_argument(
+		'-o', '--output',
+		help='The output file; %%V in the name will be replaced with the \
+		      program\'s version. To just print the output, use -d instead.',
+		action='store',
+)
+
+parser.add_argument(
+		'-p', '--pragma',
+		help='Set a pragma value (syntax like #pragma)',
+		action='append',
+		nargs='+',
+		default=[]
+)
+
+parser.add_argument(
+		'-r', '--renderer',
+		help='The renderer to use (overrides the renderer pragma)',
+		action='store',
+)
+
+parser.add_argument(
+		'-d', '--display',
+		action='store_true',
+		default=False,
+		help='Show the final source (Works together with -o)'
+)
+
+parser.add_argument(
+		'-q', '--quiet',
+		action='store_true',
+		default=False,
+		help='Quiet mode, suppress non-error logging'
+)
+
+
+def request(path, req):
+	""" Send a request to the server, wait for the response
+
+	Args:
+		path (str): The server socket
+		req (dict): The request
+
+	Returns:
+		The response dict
+
+	"""
+
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+		s.connect(path)
+		s.sendall((json.dumps(req) + '\n').encode('utf-8'))
+
+		with s.makefile('rb') as f:
+			return json.loads(f.readline().decode('utf-8'))
+
+
+def main():
+	args = parser.parse_args()
+
+	resp = request(args.socket, {
+		'source': args.source,
+		'cwd': os.getcwd(),
+		'pragmas': [[p[0], ' '.join(p[1:])] for p in args.pragma],
+		'renderer': args.renderer,
+		'quiet': args.quiet,
+	})
+
+	sys.stdout.write(resp['messages'])
+
+	if not resp['ok']:
+		sys.stdout.write(resp['error'])
+		sys.exit(1)
+
+	if args.display:
+		print(resp['output'])
+
+	if args.output is not None:
+		dest = args.output
+		if resp['version'] is not None:
+			dest = dest.replace('%V', str(resp['version']))
+
+		with open(dest, 'w') as f:
+			f.write(resp['output'])
+
+
+if __name__ == '__main__':
+	main()
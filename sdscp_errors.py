@@ -15,3 +15,7 @@ class CompatibilityError(SyntaxError):
 	supported by the compiler.
 	"""
 	pass
+
+class SdsRuntimeError(Exception):
+	""" Error while executing SDS-C code in the interpreter """
+	pass
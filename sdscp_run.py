@@ -0,0 +1,131 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Run a SDS-C program in the interpreter
+
+Runs a program generated by SDSCP (or, with -c, compiles a source
+first), shows what it printed and the statistics of the execution:
+executed statements, label hits, stack depth.
+
+"""
+
+import sys
+import json
+import argparse
+
+import compiler
+from directives import D_Pragma
+from interpreter import Interpreter
+from sdscp_errors import SdsRuntimeError
+
+
+parser = argparse.ArgumentParser(
+	description='Run a SDS-C program generated by SDSCP in the interpreter'
+	)
+
+parser.add_argument(
+		'source',
+		help='The SDS-C program (the output of sdscp), or the source with -c'
+)
+
+parser.add_argument(
+		'-c', '--compile',
+		action='store_true',
+		default=False,
+		help='Compile the source with SDSCP first'
+)
+
+parser.add_argument(
+		'-p', '--pragma',
+		help='Set a pragma value for -c (syntax like #pragma)',
+		action='append',
+		nargs='+',
+		default=[]
+)
+
+parser.add_argument(
+		'-l', '--loops',
+		action='store',
+		type=int,
+		default=1,
+		help='Passes of the main loop to run (default: 1)'
+)
+
+parser.add_argument(
+		'--max-steps',
+		action='store',
+		type=int,
+		default=10000000,
+		help='Limit of executed statements (default: 10000000)'
+)
+
+parser.add_argument(
+		'--labels',
+		action='store_true',
+		default=False,
+		help='Show how many times each label was reached'
+)
+
+parser.add_argument(
+		'--json',
+		metavar='FILE',
+		help='Write the statistics to a JSON file'
+)
+
+parser.add_argument(
+		'-q', '--quiet',
+		action='store_true',
+		default=False,
+		help='Do not show the output of the program'
+)
+
+
+def main():
+	args = parser.parse_args()
+
+	if args.compile:
+		pragmas = {}
+		for p in args.pragma:
+			pr = D_Pragma('#pragma %s %s' % (p[0], ' '.join(p[1:])))
+			pragmas[pr.name] = pr.value
+
+		result = compiler.compile(args.source, pragmas)
+		if not result.ok:
+			print(result.messages, end='')
+			print('Compilation failed: %s' % result.error)
+			sys.exit(1)
+
+		code = result.output
+	else:
+		with open(args.source, 'r') as f:
+			code = f.read()
+
+	it = Interpreter(code)
+
+	try:
+		it.run(loops=args.loops, max_steps=args.max_steps)
+		error = None
+	except SdsRuntimeError as e:
+		error = e
+
+	if not args.quiet:
+		for line in it.output:
+			print(line)
+		print()
+
+	print(it.report(labels=args.labels))
+
+	if error is not None:
+		print('\nRuntime error: %s' % error)
+
+	if args.json is not None:
+		with open(args.json, 'w') as f:
+			json.dump(it.stats(), f, indent=2)
+			f.write('\n')
+
+	if error is not None:
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
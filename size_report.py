@@ -0,0 +1,268 @@
+#!/bin/env python3
+
+from statements import *
+from expressions import *
+
+
+# Estimated bytecode sizes. SDS-C does not document its bytecode, these
+# are rough costs meant for comparing functions with each other.
+
+OPCODE_BYTES	= 1  # each statement / operator / call
+VARIABLE_BYTES	= 2  # reference to a variable or array
+ADDRESS_BYTES	= 2  # jump target of goto / if
+STRING_BYTES	= 2  # reference to a string (the text is counted separately)
+
+# origin of the code not generated for a user function
+RUNTIME = '<runtime>'
+
+
+def _number_bytes(text):
+	""" Size of a number literal: the opcode and the smallest fitting width """
+
+	try:
+		value = int(text.replace('_', ''), 0)
+	except ValueError:
+		return OPCODE_BYTES + 4
+
+	if -128 <= value <= 127:
+		return OPCODE_BYTES + 1
+	if -32768 <= value <= 32767:
+		return OPCODE_BYTES + 2
+
+	return OPCODE_BYTES + 4
+
+
+def expr_size(e):
+	""" Estimate the size of an expression
+
+	Returns:
+		(bytecode bytes, string bytes)
+
+	"""
+
+	if e is None:
+		return (0, 0)
+
+	if isinstance(e, E_Group):
+		code = 0
+		strings = 0
+		for c in e.children:
+			(c_code, c_strings) = expr_size(c)
+			code += c_code
+			strings += c_strings
+
+		return (code, strings)
+
+	if isinstance(e, E_Literal):
+		if e.is_string():
+			return (STRING_BYTES, len(e.value) - 2 + 1)  # text without quotes, zero terminated
+
+		return (_number_bytes(e.value), 0)
+
+	if isinstance(e, E_Operator):
+		return (OPCODE_BYTES, 0)
+
+	if isinstance(e, E_Variable):
+		if e.index is None:
+			return (VARIABLE_BYTES, 0)
+
+		(code, strings) = expr_size(e.index)
+		return (VARIABLE_BYTES + OPCODE_BYTES + code, strings)
+
+	if isinstance(e, E_Call):
+		code = OPCODE_BYTES + VARIABLE_BYTES
+		strings = 0
+		for a in e.args:
+			(a_code, a_strings) = expr_size(a)
+			code += a_code
+			strings += a_strings
+
+		return (code, strings)
+
+	return (0, 0)
+
+
+def statement_size(s):
+	""" Estimate the size of a statement, without the nested statements
+
+	Returns:
+		(bytecode bytes, string bytes), None if it's not a statement
+		of the program (a comment, a block, ...)
+
+	"""
+
+	if isinstance(s, S_Assign):
+		(var_code, var_strings) = expr_size(s.var)
+		(code, strings) = expr_size(s.value)
+
+		op = OPCODE_BYTES if s.op.value != '=' else 0
+		return (OPCODE_BYTES + op + var_code + code, var_strings + strings)
+
+	if isinstance(s, S_Call):
+		code = OPCODE_BYTES + VARIABLE_BYTES
+		strings = 0
+		for a in s.args:
+			(a_code, a_strings) = expr_size(a)
+			code += a_code
+			strings += a_strings
+
+		return (code, strings)
+
+	if isinstance(s, S_If):
+		(code, strings) = expr_size(s.cond)
+		return (OPCODE_BYTES + ADDRESS_BYTES + code, strings)
+
+	if isinstance(s, S_Goto):
+		return (OPCODE_BYTES + ADDRESS_BYTES, 0)
+
+	if isinstance(s, S_Return):
+		return (OPCODE_BYTES, 0)
+
+	return None
+
+
+
+class FunctionSize:
+	""" Generated code attributed to one user function
+
+	Attributes:
+		name (str): Name of the user function
+		statements (int): Emitted statements
+		bytes (int): Estimated bytecode size
+		string_bytes (int): Size of the string literals
+		labels (int): Emitted labels
+		parts (dict): Bytes by the kind of code: "body" (the function
+			itself), "inlined" (its inlined copies), "call" (jumps to the
+			function and return labels at the call sites), "push/pop"
+			(saving the temporaries) and "return" (the return trampoline)
+
+	"""
+
+	def __init__(self, name):
+		self.name = name
+		self.statements = 0
+		self.bytes = 0
+		self.string_bytes = 0
+		self.labels = 0
+		self.parts = {}
+
+
+	def to_json(self):
+		return {
+			'name': self.name,
+			'statements': self.statements,
+			'bytes': self.bytes,
+			'string_bytes': self.string_bytes,
+			'labels': self.labels,
+			'parts': self.parts,
+		}
+
+
+
+class SizeReport:
+	""" Size of the generated code, by the user function it came from
+
+	Filled by the renderer: it calls `enter()` and `leave()` around
+	rendering of each statement. The statements generated for a user
+	function are marked by M_Grande with `_origin` = (function, part),
+	the nested statements inherit the mark.
+
+	Attributes:
+		functions (dict): {name -> FunctionSize}
+
+	"""
+
+	PARTS = ('body', 'inlined', 'call', 'push/pop', 'return')
+
+	def __init__(self):
+		self.functions = {}
+		self._stack = [(RUNTIME, 'body')]
+
+
+	def enter(self, s):
+		""" A statement is about to be rendered """
+
+		origin = getattr(s, '_origin', None)
+		if origin is not None:
+			self._stack.append(origin)
+
+
+	def leave(self, s, src):
+		""" A statement was rendered
+
+		Args:
+			s (Statement): The statement
+			src (str): What it was rendered to
+
+		"""
+
+		(name, part) = self._stack[-1]
+
+		if getattr(s, '_origin', None) is not None:
+			self._stack.pop()
+
+		if isinstance(s, S_Label):
+			self._get(name).labels += 1
+			return
+
+		# an if with a constant condition is rendered as just one branch
+		if isinstance(s, S_If) and not src.startswith('if'):
+			return
+
+		size = statement_size(s)
+		if size is None:
+			return
+
+		f = self._get(name)
+		f.statements += 1
+		f.bytes += size[0]
+		f.string_bytes += size[1]
+		f.parts[part] = f.parts.get(part, 0) + size[0]
+
+
+	def _get(self, name):
+		if name not in self.functions:
+			self.functions[name] = FunctionSize(name)
+
+		return self.functions[name]
+
+
+	def sorted(self):
+		""" Get the functions, largest first """
+
+		return sorted(self.functions.values(), key=lambda f: (-(f.bytes + f.string_bytes), f.name))
+
+
+	def table(self):
+		""" Format the report as a table
+
+		Returns:
+			The table, as string
+
+		"""
+
+		header = '%-24s %6s %7s %7s %6s' % ('function', 'stmts', 'bytes', 'strings', 'labels')
+		header += ''.join(' %8s' % p for p in self.PARTS)
+
+		lines = [header]
+		total = FunctionSize('total')
+
+		for f in self.sorted():
+			line = '%-24s %6d %7d %7d %6d' % (f.name, f.statements, f.bytes, f.string_bytes, f.labels)
+			line += ''.join(' %8d' % f.parts.get(p, 0) for p in self.PARTS)
+			lines.append(line)
+
+			total.statements += f.statements
+			total.bytes += f.bytes
+			total.string_bytes += f.string_bytes
+			total.labels += f.labels
+
+		lines.append('%-24s %6d %7d %7d %6d' % ('total', total.statements, total.bytes, total.string_bytes, total.labels))
+
+		return '\n'.join(lines)
+
+
+	def to_json(self):
+		""" Get the report as a JSON-serializable list, largest first """
+
+		return [f.to_json() for f in self.sorted()]
@@ -132,6 +132,8 @@ class Statement(SyntaxNode):
 
 	"""
 
+	__slots__ = ('_origin',)
+
 	def __str__(self):
 		return type(self).__name__
 
@@ -148,6 +150,8 @@ class S_Empty(Statement):
 
 	"""
 
+	__slots__ = ()
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -172,6 +176,8 @@ class S_Comment(Statement):
 
 	"""
 
+	__slots__ = ('text', '_header_comment')
+
 	def __init__(self, text):
 		super().__init__()
 
@@ -186,6 +192,8 @@ class S_Comment(Statement):
 class S_DocComment(Statement):
 	""" A doc comment """
 
+	__slots__ = ('text',)
+
 	def __init__(self, tw):
 		super().__init__()
 
@@ -210,6 +218,8 @@ class S_Goto(Statement):
 
 	"""
 
+	__slots__ = ('name',)
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -247,6 +257,8 @@ class S_Label(Statement):
 
 	"""
 
+	__slots__ = ('name',)
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -284,6 +296,8 @@ class S_Call(Statement):
 
 	"""
 
+	__slots__ = ('name', 'args')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -346,9 +360,13 @@ class S_Function(Statement):
 		name (str): function name
 		args (str[]): list of argument names
 		body_st (S_Block): a function body
+		inline (bool): the function is inlined where it's called
+		meta (FunctionMeta): added by M_Grande
 
 	"""
 
+	__slots__ = ('name', 'args', 'body_st', 'inline', 'meta')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -414,6 +432,8 @@ class S_Return(Statement):
 
 	"""
 
+	__slots__ = ('value',)
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -462,6 +482,8 @@ class S_Case(Statement):
 
 	"""
 
+	__slots__ = ('value',)
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -498,6 +520,8 @@ class S_Case(Statement):
 class S_Default(Statement):
 	""" A Default in switch. """
 
+	__slots__ = ()
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -521,6 +545,8 @@ class S_Break(Statement):
 
 	"""
 
+	__slots__ = ()
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -544,6 +570,8 @@ class S_Continue(Statement):
 
 	"""
 
+	__slots__ = ()
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -573,6 +601,8 @@ class S_Block(Statement):
 
 	"""
 
+	__slots__ = ('children',)
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -623,6 +653,8 @@ class S_Var(Statement):
 
 	"""
 
+	__slots__ = ('var', 'value')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -697,6 +729,8 @@ class S_Assign(Statement):
 
 	"""
 
+	__slots__ = ('var', 'op', 'value')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -759,6 +793,8 @@ class S_If(Statement):
 
 	"""
 
+	__slots__ = ('cond', 'then_st', 'else_st')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -822,6 +858,8 @@ class S_While(Statement):
 
 	"""
 
+	__slots__ = ('cond', 'body_st', 'meta')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -874,6 +912,8 @@ class S_DoWhile(Statement):
 
 	"""
 
+	__slots__ = ('cond', 'body_st', 'meta')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -935,6 +975,8 @@ class S_For(Statement):
 
 	"""
 
+	__slots__ = ('init', 'cond', 'iter', 'body_st', 'meta')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -1028,6 +1070,8 @@ class S_Switch(Statement):
 
 	"""
 
+	__slots__ = ('value', 'body_st', 'meta')
+
 	def __init__(self, tw=None):
 		super().__init__()
 
@@ -0,0 +1,50 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" One program compiled with two renderers, using one build cache
+
+The renderer given to compile() overrides the "renderer" pragma, the
+cached output of one renderer must not be returned for the other.
+
+"""
+
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import compiler
+from build_cache import BuildCache
+
+
+SOURCE = os.path.join(HERE, '..', 'tests-unit', 'expr_grouping3.in.c')
+PRAGMAS = {'header': False}
+
+
+def main():
+	asm = compiler.compile(SOURCE, PRAGMAS, renderer='asm')
+	simple = compiler.compile(SOURCE, PRAGMAS, renderer='simple')
+	assert asm.ok and simple.ok
+	assert asm.output != simple.output
+
+	with tempfile.TemporaryDirectory() as tmp:
+		cache = BuildCache(tmp, 64 * 1024 * 1024)
+
+		first = compiler.compile(SOURCE, PRAGMAS, renderer='asm', cache=cache)
+		second = compiler.compile(SOURCE, PRAGMAS, renderer='simple', cache=cache)
+		again = compiler.compile(SOURCE, PRAGMAS, renderer='simple', cache=cache)
+
+	assert not first.cached and first.output == asm.output
+	assert not second.cached, 'the simple renderer got the cached asm output'
+	assert second.output == simple.output
+	assert again.cached and again.output == simple.output
+
+	# a hit reports the renderer as well as a miss
+	assert first.renderer == 'asm'
+	assert second.renderer == again.renderer == 'simple', again.renderer
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,71 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Counters and eviction of the build cache
+
+Programs compiled in parallel (-j) count their hits and misses in
+separate processes, none of the counts may be lost. Stores under the
+size limit don't list the cache directory.
+
+"""
+
+import os
+import sys
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path.insert(0, ROOT)
+
+from build_cache import BuildCache
+
+
+COUNT = 12
+
+
+def build(tmp, cache_dir):
+	sources = ['p%d.c' % i for i in range(COUNT)]
+	subprocess.run(
+		[sys.executable, os.path.join(ROOT, 'sdscp.py'), '-q', '-j', '4', '--cache-dir', cache_dir] + sources + ['-o', '%N.sc'],
+		cwd=tmp,
+		stdout=subprocess.DEVNULL,
+		check=True
+	)
+
+
+def main():
+	with tempfile.TemporaryDirectory() as tmp:
+		for i in range(COUNT):
+			with open(os.path.join(tmp, 'p%d.c' % i), 'w') as f:
+				f.write('main() { echo(%d); }\n' % i)
+
+		cache_dir = os.path.join(tmp, 'cache')
+
+		build(tmp, cache_dir)
+		build(tmp, cache_dir)
+
+		st = BuildCache(cache_dir, 64 * 1024 * 1024).stats()
+		assert (st['entries'], st['misses'], st['hits']) == (COUNT, COUNT, COUNT), st
+
+	with tempfile.TemporaryDirectory() as tmp:
+		cache = BuildCache(tmp, 1000)
+
+		listed = []
+		entries = cache.entries
+		cache.entries = lambda: listed.append(1) or entries()
+
+		for i in range(9):
+			cache.put('k%d' % i, 'x' * 100)
+
+		assert len(listed) == 1, 'the directory was listed %d times' % len(listed)
+
+		for i in range(9, 20):
+			cache.put('k%d' % i, 'x' * 100)
+
+		st = cache.stats()
+		assert st['size'] <= 1000 and st['evictions'] == 10, st
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,71 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" A nested include resolved against the current directory
+
+lib/a.h includes "b.h", which is looked up in the current directory
+first, then next to a.h. Programs in p1 and p2 (each with its own b.h)
+compiled in one process must each get their own b.h, and a b.h created
+in p3 must shadow lib/b.h used before.
+
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import compiler
+import directives
+
+
+def write(path, text):
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path, 'w') as f:
+		f.write(text)
+
+
+def value(directory):
+	""" Compile m.c in the directory, get the echoed value """
+
+	os.chdir(directory)
+
+	result = compiler.compile('m.c', {'header': False}, render=False)
+	if not result.ok:
+		raise Exception('%s failed to compile: %s' % (directory, result.error))
+
+	return result.processed.split('echo(')[1].split(')')[0].strip()
+
+
+def main():
+	cwd = os.getcwd()
+	tmp = tempfile.mkdtemp()
+
+	try:
+		write(os.path.join(tmp, 'lib', 'a.h'), '#include "b.h"\n')
+		write(os.path.join(tmp, 'lib', 'b.h'), '#define VAL 3\n')
+
+		for (name, val) in [('p1', '1'), ('p2', '2'), ('p3', None)]:
+			write(os.path.join(tmp, name, 'm.c'), '#include "../lib/a.h"\n\nmain() { echo(VAL); }\n')
+			if val is not None:
+				write(os.path.join(tmp, name, 'b.h'), '#define VAL %s\n' % val)
+
+		directives.include_cache.clear()
+
+		assert value(os.path.join(tmp, 'p1')) == '1'
+		assert value(os.path.join(tmp, 'p2')) == '2', 'p2 got the b.h of p1'
+
+		assert value(os.path.join(tmp, 'p3')) == '3'
+		write(os.path.join(tmp, 'p3', 'b.h'), '#define VAL 4\n')
+		assert value(os.path.join(tmp, 'p3')) == '4', 'the new b.h in p3 was not used'
+
+	finally:
+		os.chdir(cwd)
+		shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+	main()
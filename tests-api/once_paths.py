@@ -0,0 +1,43 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" A #pragma once header reached by different relative paths
+
+p1.c includes A/lib.h, p2.c includes it twice as A/../A/lib.h.
+Compiled in one process, p2 must reuse the cached include of p1
+and still include the header only once.
+
+"""
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import compiler
+import directives
+
+
+def resolve(name):
+	result = compiler.compile(os.path.join(HERE, 'once_paths', name), {'header': False})
+	if not result.ok:
+		raise Exception('%s failed to compile: %s' % (name, result.error))
+
+	return result.resolved
+
+
+def main():
+	directives.include_cache.clear()
+	cold = resolve('p2.c')
+
+	directives.include_cache.clear()
+	resolve('p1.c')
+	warm = resolve('p2.c')
+
+	assert cold.count('var lib_counter;') == 1, cold
+	assert warm == cold, 'p2.c resolved differently with the include cached:\n' + warm
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,3 @@
+#pragma once
+
+var lib_counter;
@@ -0,0 +1,5 @@
+#include "A/lib.h"
+
+main() {
+    lib_counter = 1;
+}
@@ -0,0 +1,6 @@
+#include "A/../A/lib.h"
+#include "A/../A/lib.h"
+
+main() {
+    lib_counter = 2;
+}
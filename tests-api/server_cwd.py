@@ -0,0 +1,68 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Compile server with clients in different directories
+
+p1/m.c and p2/m.c include lib/a.h, which includes "b.h" - found in the
+directory of the client first. Each client must get the output built
+with its own b.h, not the include cached for the other one.
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path.insert(0, ROOT)
+
+from sdscp_client import request
+
+
+def write(path, text):
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path, 'w') as f:
+		f.write(text)
+
+
+def main():
+	with tempfile.TemporaryDirectory() as tmp:
+		write(os.path.join(tmp, 'lib', 'a.h'), '#include "b.h"\n')
+
+		for val in ['1', '2']:
+			write(os.path.join(tmp, 'p' + val, 'm.c'), '#include "../lib/a.h"\n\nmain() { echo(VAL); }\n')
+			write(os.path.join(tmp, 'p' + val, 'b.h'), '#define VAL %s\n' % val)
+
+		sock = os.path.join(tmp, 'sdscp.sock')
+
+		server = subprocess.Popen(
+			[sys.executable, os.path.join(ROOT, 'sdscp.py'), '-q', '--serve', sock, '--cache-dir', os.path.join(tmp, 'cache')],
+			stdout=subprocess.DEVNULL
+		)
+
+		try:
+			for i in range(100):
+				if os.path.exists(sock):
+					break
+				time.sleep(0.05)
+
+			for val in ['1', '2']:
+				resp = request(sock, {
+					'source': 'm.c',
+					'cwd': os.path.join(tmp, 'p' + val),
+					'pragmas': [['header', 'false']],
+					'quiet': True,
+				})
+
+				assert resp['ok'], resp['error']
+				assert 'echo(%s)' % val in resp['output'].replace(' ', ''), 'p%s got a wrong b.h:\n%s' % (val, resp['output'])
+		finally:
+			server.terminate()
+			server.wait()
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,64 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Compile server with a build cache, requests with different renderers
+
+Each request must get the output of its own renderer, not the one
+cached for the same program by an earlier request.
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path.insert(0, ROOT)
+
+import compiler
+from sdscp_client import request
+
+
+SOURCE = os.path.join(ROOT, 'tests-unit', 'expr_grouping3.in.c')
+
+
+def main():
+	expected = {}
+	for renderer in ['asm', 'simple']:
+		expected[renderer] = compiler.compile(SOURCE, {'header': False}, renderer=renderer).output
+
+	with tempfile.TemporaryDirectory() as tmp:
+		sock = os.path.join(tmp, 'sdscp.sock')
+
+		server = subprocess.Popen(
+			[sys.executable, os.path.join(ROOT, 'sdscp.py'), '-q', '--serve', sock, '--cache-dir', os.path.join(tmp, 'cache')],
+			stdout=subprocess.DEVNULL
+		)
+
+		try:
+			for i in range(100):
+				if os.path.exists(sock):
+					break
+				time.sleep(0.05)
+
+			for renderer in ['asm', 'simple']:
+				resp = request(sock, {
+					'source': SOURCE,
+					'cwd': os.getcwd(),
+					'pragmas': [['header', 'false']],
+					'renderer': renderer,
+					'quiet': True,
+				})
+
+				assert resp['ok'], resp['error']
+				assert resp['output'] == expected[renderer], 'wrong output for the %s renderer' % renderer
+		finally:
+			server.terminate()
+			server.wait()
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,81 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Watch mode rebuilding programs after changes of their includes
+
+m1.c and m2.c (compiled with -j 2) include lib/a.h, which includes
+"b.h" - lib/b.h at first. A b.h created in the directory of the
+programs must shadow it, and a change of that b.h must be seen too.
+
+"""
+
+import os
+import sys
+import time
+import signal
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+
+
+def write(path, text):
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path, 'w') as f:
+		f.write(text)
+
+
+def wait_for(paths, text):
+	""" Wait until all the files contain the text """
+
+	for i in range(200):
+		try:
+			if all(text in open(p).read().replace(' ', '') for p in paths):
+				return
+		except OSError:
+			pass
+
+		time.sleep(0.05)
+
+	raise AssertionError('%s not found in the outputs' % text)
+
+
+def main():
+	with tempfile.TemporaryDirectory() as tmp:
+		write(os.path.join(tmp, 'lib', 'a.h'), '#include "b.h"\n')
+		write(os.path.join(tmp, 'lib', 'b.h'), '#define VAL 3\n')
+
+		prog = os.path.join(tmp, 'p')
+		for name in ['m1', 'm2']:
+			write(os.path.join(prog, name + '.c'), '#include "../lib/a.h"\n\nmain() { echo(VAL); }\n')
+
+		outputs = [os.path.join(prog, 'm1.sc'), os.path.join(prog, 'm2.sc')]
+
+		watcher = subprocess.Popen(
+			[sys.executable, os.path.join(ROOT, 'sdscp.py'), '-q', '-j', '2', '--watch', '--watch-interval', '0.05',
+				'm1.c', 'm2.c', '-o', '%N.sc'],
+			cwd=prog,
+			stdout=subprocess.DEVNULL,
+			start_new_session=True
+		)
+
+		try:
+			wait_for(outputs, 'echo(3)')
+
+			# the watcher checks the stamps, make sure they differ
+			time.sleep(0.1)
+			write(os.path.join(prog, 'b.h'), '#define VAL 4\n')
+			wait_for(outputs, 'echo(4)')
+
+			time.sleep(0.1)
+			write(os.path.join(prog, 'b.h'), '#define VAL 55\n')
+			wait_for(outputs, 'echo(55)')
+		finally:
+			# stop the workers of -j too
+			os.killpg(watcher.pid, signal.SIGTERM)
+			watcher.wait()
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,4 @@
+main() {
+	var x = 0x10000 * 0x10000;
+	echo(x);
+}
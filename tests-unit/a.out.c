@@ -14,8 +14,6 @@ main
   __t2 = 0;
   label __for_test_1:
   if (! (__t2 < 100)) goto __for_break_1;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_do_stuff;
   label __rp1:
   __t2 += 1;
@@ -26,8 +24,6 @@ main
   echo('7');
   goto __sw_break_1;
   label __case_2:
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_get_magic_number;
   label __rp2:
   __t2 = __rval;
@@ -49,8 +45,6 @@ main
   echo('yo or 16');
   goto __sw_break_1;
   label __case_6:
-  __sp -= 1;
-  ram[__sp] = 3;
   goto __fn3_one;
   label __rp3:
   __t2 = __rval;
@@ -64,14 +58,11 @@ main
   label __fn1_do_stuff:
   echoinline('Stuff');
   __rval = 0;
-  __sp += 1;
   goto __rp1;
   label __fn2_get_magic_number:
   __rval = 123456;
-  __sp += 1;
   goto __rp2;
   label __fn3_one:
   __rval = 1;
-  __sp += 1;
   goto __rp3;
 }
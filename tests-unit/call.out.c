@@ -18,16 +18,12 @@ main
   __a0 = 12;
   __a1 = 84;
   __a2 = ram[17] + sys[__t1];
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_three_args;
   label __rp1:
   /// Three args pure
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn3_three_args_with_no_inner_calls;
   label __rp2:
   /// recurs
@@ -53,8 +49,6 @@ main
   __t2 = __a2;
   __t3 = __t0 + __t1;
   echo('a + b =', __t3, ', c = ', __t2);
-  __sp -= 1;
-  ram[__sp] = 4;
   goto __fn2_foo;
   label __rp4:
   __rval = 0;
@@ -66,11 +60,9 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp1;
   label __fn2_foo:
   __rval = 0;
-  __sp += 1;
   goto __rp4;
   label __fn3_three_args_with_no_inner_calls:
   __sp -= 1;
@@ -80,7 +72,6 @@ main
   __rval = 0;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp2;
   label __fn4_recurs:
   __sp -= 1;
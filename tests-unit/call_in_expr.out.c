@@ -11,8 +11,6 @@ main
   label __main_loop:
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_add;
   label __rp1:
   __t0 = __rval;
@@ -21,6 +19,5 @@ main
   label __fn1_add:
   /// Add
   __rval = __a0 + __a1;
-  __sp += 1;
   goto __rp1;
 }
@@ -0,0 +1,16 @@
+#pragma push_pop_trampolines true
+#pragma push_pop_trampoline_limit 1
+#pragma dispatch_tree_limit 3
+#pragma tail_calls false
+
+main() {
+    echo(one(1) + one(2) + one(3));
+    echo(two(1, 2) + two(3, 4));
+    echo(three(1, 2, 3));
+}
+
+one(a) { return nop(a); }
+two(a, b) { return nop(a) + nop(b); }
+three(a, b, c) { return nop(a) + nop(b) + nop(c); }
+
+nop(x) { return x; }
@@ -0,0 +1,214 @@
+var __a0;
+var __a1;
+var __a2;
+var __addr;
+var __rval;
+var __sp;
+var __t0;
+var __t1;
+var __t2;
+var __t3;
+var __t4;
+var __t5;
+
+main
+{
+  __sp = 512;
+  label __main_loop:
+  __a0 = 1;
+  __sp -= 1;
+  ram[__sp] = 1;
+  goto __fn1_one;
+  label __rp1:
+  __t0 = __rval;
+  __a0 = 2;
+  __sp -= 1;
+  ram[__sp] = 2;
+  goto __fn1_one;
+  label __rp2:
+  __t1 = __rval;
+  __a0 = 3;
+  __sp -= 1;
+  ram[__sp] = 3;
+  goto __fn1_one;
+  label __rp3:
+  __t2 = __rval;
+  __t3 = (__t0 + __t1) + __t2;
+  echo(__t3);
+  __a0 = 1;
+  __a1 = 2;
+  __sp -= 1;
+  ram[__sp] = 4;
+  goto __fn2_two;
+  label __rp4:
+  __t0 = __rval;
+  __a0 = 3;
+  __a1 = 4;
+  __sp -= 1;
+  ram[__sp] = 5;
+  goto __fn2_two;
+  label __rp5:
+  __t1 = __rval;
+  __t2 = __t0 + __t1;
+  echo(__t2);
+  __a0 = 1;
+  __a1 = 2;
+  __a2 = 3;
+  goto __fn3_three;
+  label __rp6:
+  __t0 = __rval;
+  echo(__t0);
+  goto __main_loop;
+  label __fn1_one:
+  __addr = 1;
+  goto __push_tmps_2;
+  label __fn1_push_tmps_end:
+  __t0 = __a0;
+  __a0 = __t0;
+  __sp -= 1;
+  ram[__sp] = 1;
+  goto __fn4_nop;
+  label __rp7:
+  __t1 = __rval;
+  __rval = __t1;
+  __sp += 2;
+  __addr = 1;
+  goto __pop_tmps_2;
+  label __fn1_pop_tmps_end:
+  __sp += 2;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr >= 2) goto __dispatch_1;
+  goto __rp1;
+  label __dispatch_1:
+  if (__addr >= 3) goto __dispatch_2;
+  goto __rp2;
+  label __dispatch_2:
+  goto __rp3;
+  label __fn2_two:
+  __addr = 2;
+  goto __push_tmps_4;
+  label __fn2_push_tmps_end:
+  __t0 = __a0;
+  __t1 = __a1;
+  __a0 = __t0;
+  __sp -= 1;
+  ram[__sp] = 2;
+  goto __fn4_nop;
+  label __rp8:
+  __t2 = __rval;
+  __a0 = __t1;
+  __sp -= 1;
+  ram[__sp] = 3;
+  goto __fn4_nop;
+  label __rp9:
+  __t3 = __rval;
+  __rval = __t2 + __t3;
+  __sp += 4;
+  __addr = 2;
+  goto __pop_tmps_4;
+  label __fn2_pop_tmps_end:
+  __sp += 4;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr == 4) goto __rp4;
+  if (__addr == 5) goto __rp5;
+  goto __err_bad_addr;
+  label __fn3_three:
+  __addr = 3;
+  goto __push_tmps_6;
+  label __fn3_push_tmps_end:
+  __t0 = __a0;
+  __t1 = __a1;
+  __t2 = __a2;
+  __a0 = __t0;
+  __sp -= 1;
+  ram[__sp] = 4;
+  goto __fn4_nop;
+  label __rp10:
+  __t3 = __rval;
+  __a0 = __t1;
+  __sp -= 1;
+  ram[__sp] = 5;
+  goto __fn4_nop;
+  label __rp11:
+  __t4 = __rval;
+  __a0 = __t2;
+  __sp -= 1;
+  ram[__sp] = 6;
+  goto __fn4_nop;
+  label __rp12:
+  __t5 = __rval;
+  __rval = (__t3 + __t4) + __t5;
+  __sp += 6;
+  __addr = 3;
+  goto __pop_tmps_6;
+  label __fn3_pop_tmps_end:
+  __sp += 6;
+  goto __rp6;
+  label __fn4_nop:
+  __rval = __a0;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr >= 4) goto __dispatch_3;
+  if (__addr >= 2) goto __dispatch_4;
+  goto __rp7;
+  label __dispatch_4:
+  if (__addr >= 3) goto __dispatch_5;
+  goto __rp8;
+  label __dispatch_5:
+  goto __rp9;
+  label __dispatch_3:
+  if (__addr >= 5) goto __dispatch_6;
+  goto __rp10;
+  label __dispatch_6:
+  if (__addr >= 6) goto __dispatch_7;
+  goto __rp11;
+  label __dispatch_7:
+  goto __rp12;
+  label __err_bad_addr:
+  label __push_tmps_6:
+  __sp -= 1;
+  ram[__sp] = __t5;
+  __sp -= 1;
+  ram[__sp] = __t4;
+  label __push_tmps_4:
+  __sp -= 1;
+  ram[__sp] = __t3;
+  __sp -= 1;
+  ram[__sp] = __t2;
+  label __push_tmps_2:
+  __sp -= 1;
+  ram[__sp] = __t1;
+  __sp -= 1;
+  ram[__sp] = __t0;
+  if (__addr >= 2) goto __dispatch_8;
+  goto __fn1_push_tmps_end;
+  label __dispatch_8:
+  if (__addr >= 3) goto __dispatch_9;
+  goto __fn2_push_tmps_end;
+  label __dispatch_9:
+  goto __fn3_push_tmps_end;
+  label __pop_tmps_6:
+  __sp -= 1;
+  __t5 = ram[__sp];
+  __sp -= 1;
+  __t4 = ram[__sp];
+  label __pop_tmps_4:
+  __sp -= 1;
+  __t3 = ram[__sp];
+  __sp -= 1;
+  __t2 = ram[__sp];
+  label __pop_tmps_2:
+  __sp -= 1;
+  __t1 = ram[__sp];
+  __sp -= 1;
+  __t0 = ram[__sp];
+  if (__addr >= 2) goto __dispatch_10;
+  goto __fn1_pop_tmps_end;
+  label __dispatch_10:
+  if (__addr >= 3) goto __dispatch_11;
+  goto __fn2_pop_tmps_end;
+  label __dispatch_11:
+  goto __fn3_pop_tmps_end;
+}
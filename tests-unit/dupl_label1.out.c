@@ -6,8 +6,6 @@ main
 {
   __sp = 512;
   /// Normal func
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_fuu;
   label __rp1:
   /// Main loop
@@ -21,6 +19,5 @@ main
     goto __fn1L_omg;
   }
   __rval = 0;
-  __sp += 1;
   goto __rp1;
 }
@@ -6,8 +6,6 @@ main
 {
   __sp = 512;
   /// Noreturn
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn2_fuu2;
   label __fnmainL_omg:
   echo('yo');
@@ -20,8 +20,6 @@ main
   echo(-1);
   /// Call with negative
   __a0 = -1;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_foo;
   label __rp1:
   /// Assign negative
@@ -40,6 +38,5 @@ main
   goto __main_loop;
   label __fn1_foo:
   __rval = 0;
-  __sp += 1;
   goto __rp1;
 }
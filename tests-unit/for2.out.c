@@ -10,8 +10,6 @@ main
   __t0 = 0;
   label __for_test_1:
   if (! (__t0 < 10)) goto __for_break_1;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_bar;
   label __rp1:
   if (0) {
@@ -29,6 +27,5 @@ main
   label __fn1_bar:
   echo('foo');
   __rval = 0;
-  __sp += 1;
   goto __rp1;
 }
@@ -20,8 +20,6 @@ main
   goto __fn1_before;
   label __rp1:
   /// Call after
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_after;
   label __rp2:
   /// Store output to a variable
@@ -37,8 +35,6 @@ main
   /// Call "variables"
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 4;
   goto __fn5_variables;
   label __rp4:
   __t2 = __rval;
@@ -80,7 +76,6 @@ main
   /// After
   echo('Hello');
   __rval = 0;
-  __sp += 1;
   goto __rp2;
   label __fn4_add:
   __sp -= 1;
@@ -150,7 +145,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp4;
   label __err_bad_addr:
 }
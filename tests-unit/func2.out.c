@@ -25,8 +25,6 @@ main
   __a0 = 4;
   __a1 = 5;
   __a2 = 6;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_func_with_args;
   label __rp1:
   goto __main_loop;
@@ -43,8 +41,6 @@ main
   echo('func_with_args');
   echo(__t0, ' is ', __t1, ' under ', __t2);
   __a0 = 77777;
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_other_func;
   label __rp2:
   __rval = 0;
@@ -54,11 +50,9 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp1;
   label __fn2_other_func:
   echo('other_func', __a0);
   __rval = 0;
-  __sp += 1;
   goto __rp2;
 }
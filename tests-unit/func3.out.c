@@ -8,8 +8,6 @@ main
 {
   __sp = 512;
   label __main_loop:
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_return_zero;
   label __rp1:
   __t1 = __rval;
@@ -19,16 +17,12 @@ main
   }
   goto __main_loop;
   label __fn1_return_zero:
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_return_42;
   label __rp2:
   echo('cau');
   __rval = 0;
-  __sp += 1;
   goto __rp1;
   label __fn2_return_42:
   __rval = 42;
-  __sp += 1;
   goto __rp2;
 }
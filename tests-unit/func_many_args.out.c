@@ -58,14 +58,11 @@ main
   __a23 = 24;
   __a24 = 25;
   __a25 = 26;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_many_args;
   label __rp1:
   goto __main_loop;
   label __fn1_many_args:
   echo(__a0, __a1, __a2, __a3, __a4, __a5, __a6, __a7, __a8, __a9, __a10, __a11, __a12, __a13, __a14, __a15, __a16, __a17, __a18, __a19, __a20, __a21, __a22, __a23, __a24, __a25);
   __rval = 0;
-  __sp += 1;
   goto __rp1;
 }
@@ -30,8 +30,6 @@ main
   uu__sp = 99;
   __a0 = u__sp;
   __a1 = u__fuck;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_moo;
   label __rp1:
   echo('u__sp', uu__sp);
@@ -39,6 +37,5 @@ main
   goto __main_loop;
   label __fn1_moo:
   __rval = __a0 + __a1;
-  __sp += 1;
   goto __rp1;
 }
@@ -10,6 +10,7 @@ main
   echo('one2');
   echo('one is one');
   echo('complex math');
+  echo('ONE is defined');
   echo('XXXX is not defined');
   echo('BLUHG is not defined');
   goto __main_loop;
@@ -0,0 +1,27 @@
+// #if arithmetic is 32-bit like in SDS-C (and C):
+// division and modulo truncate towards zero, overflow wraps
+
+#define NEG(x) (-(x))
+#define MINUS_SEVEN (-7)
+
+main () {
+#if -7/2 == -3
+	echo("division truncates");
+#endif
+
+#if -7/2 == -4
+	#error Division rounds down
+#endif
+
+#if MINUS_SEVEN % 2 == -1
+	echo("modulo has the sign of the dividend");
+#endif
+
+#if NEG(7) / 2 == -3
+	echo("division truncates after expanding");
+#endif
+
+#if 0x7FFFFFFF + 1 == -2147483648
+	echo("overflow wraps");
+#endif
+}
@@ -0,0 +1,14 @@
+var __addr;
+var __rval;
+var __sp;
+
+main
+{
+  __sp = 512;
+  label __main_loop:
+  echo('division truncates');
+  echo('modulo has the sign of the dividend');
+  echo('division truncates after expanding');
+  echo('overflow wraps');
+  goto __main_loop;
+}
@@ -0,0 +1,38 @@
+#define ONE 1
+#define NEG -1
+#define SUM 1+1
+#define TWICE(x) ((x)*2)
+#define VERSION 0x0102
+#define MAJOR (VERSION >> 8)
+
+main () {
+#if SUM * 2 == 3
+	echo("macro body pasted as text");
+#endif
+
+#if TWICE(ONE) == 2
+	echo("function-like macro");
+#endif
+
+#if defined(TWICE) && !defined(THREE)
+	echo("defined without expanding");
+#endif
+
+#if NEG * 7 / 2 == -3
+	echo("integer math");
+#endif
+
+#if MAJOR == 1 && (VERSION & 0xFF) >= 2
+	echo("version check");
+#endif
+
+#if defined ONE && ONE
+	echo("defined without parens");
+#endif
+
+#define THREE 3
+
+#if defined(TWICE) && !defined(THREE)
+	#error THREE is defined now
+#endif
+}
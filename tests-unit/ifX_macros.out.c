@@ -0,0 +1,16 @@
+var __addr;
+var __rval;
+var __sp;
+
+main
+{
+  __sp = 512;
+  label __main_loop:
+  echo('macro body pasted as text');
+  echo('function-like macro');
+  echo('defined without expanding');
+  echo('integer math');
+  echo('version check');
+  echo('defined without parens');
+  goto __main_loop;
+}
@@ -0,0 +1,16 @@
+// The same file included in different states of the macros
+// it tests, and again in a state seen before (reused from cache)
+
+main()
+{
+#include "include_cache_lib.c"
+
+#define VERBOSE
+#include "include_cache_lib.c"
+
+#define LIB_LEVEL 2
+#include "include_cache_lib.c"
+#include "include_cache_lib.c"
+
+	echo(LIB_MODE);
+}
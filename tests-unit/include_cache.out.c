@@ -0,0 +1,17 @@
+var __addr;
+var __rval;
+var __sp;
+
+main
+{
+  __sp = 512;
+  label __main_loop:
+  echo('quiet');
+  echo('verbose');
+  echo('verbose');
+  echo('level', 2);
+  echo('verbose');
+  echo('level', 2);
+  echo(2);
+  goto __main_loop;
+}
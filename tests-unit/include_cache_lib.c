@@ -0,0 +1,12 @@
+#ifdef VERBOSE
+	echo("verbose");
+#define LIB_MODE 2
+#else
+	echo("quiet");
+#endif
+
+#ifdef LIB_LEVEL
+#if LIB_LEVEL > 1
+	echo("level", LIB_LEVEL);
+#endif
+#endif
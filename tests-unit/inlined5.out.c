@@ -62,6 +62,7 @@ main
   /// Bug: __a0 used while clobbered in 'inlined1'
   echo(__t0, __t1, __t2);
   __rval = 0;
+  // Return to caller
   // Pop used tmp vars
   __t5 = ram[__sp];
   __sp += 1;
@@ -74,9 +75,7 @@ main
   __t1 = ram[__sp];
   __sp += 1;
   __t0 = ram[__sp];
-  __sp += 1;
-  // Return to caller
-  __sp += 1;
+  __sp += 2;
   // Only one caller
   goto __rp1;
   // --------------------------- FUNC should_inline2(len) ---------------------------
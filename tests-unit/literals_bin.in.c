@@ -0,0 +1,14 @@
+/// Binary literals in expressions, macros and #if
+
+#define MASK 0b1111
+
+var flags = 0b1010;
+
+main() {
+	echo(flags & MASK, 0b1 + 0b10, MASK << 0b1);
+	flags = flags | 0b0101;
+
+#if MASK == 15
+	echo("MASK is 15");
+#endif
+}
@@ -0,0 +1,17 @@
+var __addr;
+var __rval;
+var __sp;
+var __t0;
+var flags;
+
+main
+{
+  __sp = 512;
+  flags = 0b1010;
+  label __main_loop:
+  __t0 = flags & 0b1111;
+  echo(__t0, 3, 30);
+  flags = flags | 0b0101;
+  echo('MASK is 15');
+  goto __main_loop;
+}
@@ -0,0 +1,27 @@
+// Macros expanded in macros, deeper than a few levels
+
+#define L0 1
+#define L1 (L0 + 1)
+#define L2 (L1 + 1)
+#define L3 (L2 + 1)
+#define L4 (L3 + 1)
+#define L5 (L4 + 1)
+#define L6 (L5 + 1)
+#define L7 (L6 + 1)
+#define L8 (L7 + 1)
+#define L9 (L8 + 1)
+#define L10 (L9 + 1)
+#define L11 (L10 + 1)
+#define L12 (L11 + 1)
+
+#define TWICE(x) ((x) * 2)
+#define GREETING "Hello" NAME
+#define NAME " World"
+#define CALL(fn) fn
+
+main() {
+	var a = L12;
+	var b = TWICE(TWICE(L3));
+	echo(GREETING "!");
+	echo(CALL(TWICE)(5));
+}
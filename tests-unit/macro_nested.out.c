@@ -0,0 +1,16 @@
+var __addr;
+var __rval;
+var __sp;
+var __t0;
+var __t1;
+
+main
+{
+  __sp = 512;
+  label __main_loop:
+  __t0 = 13;
+  __t1 = 16;
+  echo('Hello World!');
+  echo(10);
+  goto __main_loop;
+}
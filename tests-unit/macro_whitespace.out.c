@@ -15,8 +15,6 @@ main
   __t2 = 0;
   __t3 = 10;
   http_get(__t0, __t1, __t2, __t3, 'localhost', 'HELLO?id=', 111222, '&such=', 'route', '&much=', 'awesome');
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_wait_for_http_get;
   label __rp1:
   if (sys[123] == 456) {
@@ -28,6 +26,5 @@ main
   label __fn1_wait_for_http_get:
   wait(2000);
   __rval = 0;
-  __sp += 1;
   goto __rp1;
 }
@@ -42,8 +42,6 @@ main
   __a3 = 5;
   __a4 = __t2;
   __a5 = 9;
-  __sp -= 1;
-  ram[__sp] = 4;
   goto __fn1_add6;
   label __rp4:
   __t1 = __rval;
@@ -56,7 +54,6 @@ main
   goto __main_loop;
   label __fn1_add6:
   __rval = ((((__a0 + __a1) + __a2) + __a3) + __a4) + __a5;
-  __sp += 1;
   goto __rp4;
   label __fn2_add2:
   __rval = __a0 + __a1;
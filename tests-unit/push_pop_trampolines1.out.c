@@ -22,8 +22,6 @@ main
   __a1 = 8;
   __a2 = 9;
   __a3 = 0;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_four;
   label __rp1:
   if (! (__t0 == 1)) {
@@ -70,8 +68,6 @@ main
   __a0 = 11;
   __a1 = 22;
   __a2 = 33;
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_three;
   label __rp2:
   if (! (__t0 == 10)) {
@@ -108,7 +104,6 @@ main
   goto __pop_tmps_4;
   label __fn1_pop_tmps_end:
   __sp += 4;
-  __sp += 1;
   goto __rp1;
   label __fn2_three:
   __addr = 2;
@@ -120,8 +115,6 @@ main
   __t0 = 100;
   __t1 = 200;
   __t2 = 300;
-  __sp -= 1;
-  ram[__sp] = 3;
   goto __fn3_nop;
   label __rp3:
   __rval = 0;
@@ -130,11 +123,9 @@ main
   goto __pop_tmps_3;
   label __fn2_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp2;
   label __fn3_nop:
   __rval = 0;
-  __sp += 1;
   goto __rp3;
   label __err_bad_addr:
   label __push_tmps_4:
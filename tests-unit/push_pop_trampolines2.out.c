@@ -15,55 +15,39 @@ main
   __sp = 512;
   label __main_loop:
   __a0 = 1;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_one1;
   label __rp1:
   __a0 = 2;
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_one2;
   label __rp2:
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 3;
   goto __fn3_two1;
   label __rp3:
   __a0 = 3;
   __a1 = 4;
-  __sp -= 1;
-  ram[__sp] = 4;
   goto __fn4_two2;
   label __rp4:
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
-  __sp -= 1;
-  ram[__sp] = 5;
   goto __fn5_three1;
   label __rp5:
   __a0 = 4;
   __a1 = 5;
   __a2 = 6;
-  __sp -= 1;
-  ram[__sp] = 6;
   goto __fn6_three2;
   label __rp6:
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
   __a3 = 4;
-  __sp -= 1;
-  ram[__sp] = 7;
   goto __fn7_four1;
   label __rp7:
   __a0 = 5;
   __a1 = 6;
   __a2 = 7;
   __a3 = 8;
-  __sp -= 1;
-  ram[__sp] = 8;
   goto __fn8_four2;
   label __rp8:
   goto __main_loop;
@@ -78,7 +62,6 @@ main
   __rval = 0;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp1;
   label __fn2_one2:
   __sp -= 1;
@@ -91,7 +74,6 @@ main
   __rval = 0;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp2;
   label __fn3_two1:
   __sp -= 1;
@@ -109,7 +91,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp3;
   label __fn4_two2:
   __sp -= 1;
@@ -127,7 +108,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp4;
   label __fn5_three1:
   __addr = 5;
@@ -146,7 +126,6 @@ main
   goto __pop_tmps_3;
   label __fn5_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp5;
   label __fn6_three2:
   __addr = 6;
@@ -165,7 +144,6 @@ main
   goto __pop_tmps_3;
   label __fn6_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp6;
   label __fn7_four1:
   __addr = 7;
@@ -185,7 +163,6 @@ main
   goto __pop_tmps_4;
   label __fn7_pop_tmps_end:
   __sp += 4;
-  __sp += 1;
   goto __rp7;
   label __fn8_four2:
   __addr = 8;
@@ -205,7 +182,6 @@ main
   goto __pop_tmps_4;
   label __fn8_pop_tmps_end:
   __sp += 4;
-  __sp += 1;
   goto __rp8;
   label __fn9_nop:
   __rval = 0;
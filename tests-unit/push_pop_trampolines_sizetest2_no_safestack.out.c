@@ -12,32 +12,22 @@ main
   label __main_loop:
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_two1;
   label __rp1:
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_two2;
   label __rp2:
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 3;
   goto __fn3_two3;
   label __rp3:
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 4;
   goto __fn4_two4;
   label __rp4:
   __a0 = 1;
   __a1 = 2;
-  __sp -= 1;
-  ram[__sp] = 5;
   goto __fn5_two5;
   label __rp5:
   goto __main_loop;
@@ -57,7 +47,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp1;
   label __fn2_two2:
   __sp -= 1;
@@ -75,7 +64,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp2;
   label __fn3_two3:
   __sp -= 1;
@@ -93,7 +81,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp3;
   label __fn4_two4:
   __sp -= 1;
@@ -111,7 +98,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp4;
   label __fn5_two5:
   __sp -= 1;
@@ -129,7 +115,6 @@ main
   __sp += 1;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp5;
   label __fn6_nop:
   __rval = 0;
@@ -15,36 +15,26 @@ main
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_three1;
   label __rp1:
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_three2;
   label __rp2:
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
-  __sp -= 1;
-  ram[__sp] = 3;
   goto __fn3_three3;
   label __rp3:
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
-  __sp -= 1;
-  ram[__sp] = 4;
   goto __fn4_three4;
   label __rp4:
   __a0 = 1;
   __a1 = 2;
   __a2 = 3;
-  __sp -= 1;
-  ram[__sp] = 5;
   goto __fn5_three5;
   label __rp5:
   goto __main_loop;
@@ -65,7 +55,6 @@ main
   goto __pop_tmps_3;
   label __fn1_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp1;
   label __fn2_three2:
   __addr = 2;
@@ -84,7 +73,6 @@ main
   goto __pop_tmps_3;
   label __fn2_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp2;
   label __fn3_three3:
   __addr = 3;
@@ -103,7 +91,6 @@ main
   goto __pop_tmps_3;
   label __fn3_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp3;
   label __fn4_three4:
   __addr = 4;
@@ -122,7 +109,6 @@ main
   goto __pop_tmps_3;
   label __fn4_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp4;
   label __fn5_three5:
   __addr = 5;
@@ -141,7 +127,6 @@ main
   goto __pop_tmps_3;
   label __fn5_pop_tmps_end:
   __sp += 3;
-  __sp += 1;
   goto __rp5;
   label __fn6_nop:
   __rval = 0;
@@ -21,14 +21,12 @@ main
   echo('*** ', __t0);
   goto __main_loop;
   label __fn1_sum:
+  if (__sp < 103) goto __err_so;
   __sp -= 1;
-  if (__sp < 100) goto __err_so;
   ram[__sp] = __t0;
   __sp -= 1;
-  if (__sp < 100) goto __err_so;
   ram[__sp] = __t1;
   __sp -= 1;
-  if (__sp < 100) goto __err_so;
   ram[__sp] = __t2;
   __t0 = __a0;
   /// SUM func
@@ -46,16 +44,13 @@ main
   __t1 = __t0 + __t2;
   __rval = __t1;
   label __fn1_end:
-  if (__sp > 511) goto __err_su;
+  if (__sp > 508) goto __err_su;
   __t2 = ram[__sp];
   __sp += 1;
-  if (__sp > 511) goto __err_su;
   __t1 = ram[__sp];
   __sp += 1;
-  if (__sp > 511) goto __err_su;
   __t0 = ram[__sp];
   __sp += 1;
-  if (__sp > 511) goto __err_su;
   __addr = ram[__sp];
   __sp += 1;
   if (__addr == 1) goto __rp1;
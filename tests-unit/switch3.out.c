@@ -9,8 +9,6 @@ main
   __sp = 512;
   label __main_loop:
   __a0 = 15;
-  __sp -= 1;
-  ram[__sp] = 1;
   goto __fn1_a_func;
   label __rp1:
   goto __main_loop;
@@ -18,8 +16,6 @@ main
   __sp -= 1;
   ram[__sp] = __t0;
   __t0 = __a0;
-  __sp -= 1;
-  ram[__sp] = 2;
   goto __fn2_other_func;
   label __rp2:
   if (__t0 != 10) goto __case_2;
@@ -33,10 +29,8 @@ main
   __rval = 0;
   __t0 = ram[__sp];
   __sp += 1;
-  __sp += 1;
   goto __rp1;
   label __fn2_other_func:
   __rval = 0;
-  __sp += 1;
   goto __rp2;
 }
@@ -0,0 +1,36 @@
+#pragma dispatch_tree_limit 4
+
+var i;
+
+dense(x) {
+	switch (x) {
+		case 0: return 10;
+		case 1:
+		case 2: return 12;
+		case 3: echo("three");
+		case 4: return 14;
+		case 5: return 15;
+	}
+	return -1;
+}
+
+sparse(x) {
+	var r = 0;
+	switch (x) {
+		case -100: r = 1; break;
+		case 7: r = 2; break;
+		case 1 << 4: r = 3;
+		case 300: r += 4; break;
+		case 1000: r = 5; break;
+		default: r = 6;
+	}
+	return r;
+}
+
+main() {
+	for (i = -2; i < 8; i++) {
+		echo(dense(i));
+	}
+
+	echo(sparse(-100), sparse(7), sparse(16), sparse(300), sparse(1000), sparse(8));
+}
@@ -0,0 +1,164 @@
+var __a0;
+var __addr;
+var __rval;
+var __sp;
+var __t0;
+var __t1;
+var __t2;
+var __t3;
+var __t4;
+var __t5;
+var i;
+
+main
+{
+  __sp = 512;
+  label __main_loop:
+  i = -2;
+  label __for_test_1:
+  if (! (i < 8)) goto __for_break_1;
+  __a0 = i;
+  goto __fn1_dense;
+  label __rp1:
+  __t0 = __rval;
+  echo(__t0);
+  i += 1;
+  goto __for_test_1;
+  label __for_break_1:
+  __a0 = -100;
+  __sp -= 1;
+  ram[__sp] = 1;
+  goto __fn2_sparse;
+  label __rp2:
+  __t0 = __rval;
+  __a0 = 7;
+  __sp -= 1;
+  ram[__sp] = 2;
+  goto __fn2_sparse;
+  label __rp3:
+  __t1 = __rval;
+  __a0 = 16;
+  __sp -= 1;
+  ram[__sp] = 3;
+  goto __fn2_sparse;
+  label __rp4:
+  __t2 = __rval;
+  __a0 = 300;
+  __sp -= 1;
+  ram[__sp] = 4;
+  goto __fn2_sparse;
+  label __rp5:
+  __t3 = __rval;
+  __a0 = 1000;
+  __sp -= 1;
+  ram[__sp] = 5;
+  goto __fn2_sparse;
+  label __rp6:
+  __t4 = __rval;
+  __a0 = 8;
+  __sp -= 1;
+  ram[__sp] = 6;
+  goto __fn2_sparse;
+  label __rp7:
+  __t5 = __rval;
+  echo(__t0, __t1, __t2, __t3, __t4, __t5);
+  goto __main_loop;
+  label __fn1_dense:
+  if (__a0 >= 3) goto __case_tree_1;
+  if (__a0 >= 1) goto __case_tree_2;
+  if (__a0 != 0) goto __sw_break_1;
+  goto __case_1;
+  label __case_tree_2:
+  if (__a0 >= 2) goto __case_tree_3;
+  goto __case_2;
+  label __case_tree_3:
+  goto __case_3;
+  label __case_tree_1:
+  if (__a0 >= 4) goto __case_tree_4;
+  goto __case_4;
+  label __case_tree_4:
+  if (__a0 >= 5) goto __case_tree_5;
+  goto __case_5;
+  label __case_tree_5:
+  if (__a0 != 5) goto __sw_break_1;
+  goto __case_6;
+  label __case_1:
+  __rval = 10;
+  goto __fn1_end;
+  label __case_2:
+  label __case_3:
+  __rval = 12;
+  goto __fn1_end;
+  label __case_4:
+  echo('three');
+  label __case_5:
+  __rval = 14;
+  goto __fn1_end;
+  label __case_6:
+  __rval = 15;
+  goto __fn1_end;
+  label __sw_break_1:
+  __rval = -1;
+  label __fn1_end:
+  goto __rp1;
+  label __fn2_sparse:
+  __sp -= 1;
+  ram[__sp] = __t0;
+  __t0 = 0;
+  if (__a0 >= 16) goto __case_tree_6;
+  if (__a0 >= 7) goto __case_tree_7;
+  if (__a0 != 0xffffff9c) goto __case_12;
+  goto __case_7;
+  label __case_tree_7:
+  if (__a0 != 7) goto __case_12;
+  goto __case_8;
+  label __case_tree_6:
+  if (__a0 >= 300) goto __case_tree_8;
+  if (__a0 != 16) goto __case_12;
+  goto __case_9;
+  label __case_tree_8:
+  if (__a0 >= 1000) goto __case_tree_9;
+  if (__a0 != 300) goto __case_12;
+  goto __case_10;
+  label __case_tree_9:
+  if (__a0 != 1000) goto __case_12;
+  goto __case_11;
+  label __case_7:
+  __t0 = 1;
+  goto __sw_break_2;
+  label __case_8:
+  __t0 = 2;
+  goto __sw_break_2;
+  label __case_9:
+  __t0 = 3;
+  label __case_10:
+  __t0 += 4;
+  goto __sw_break_2;
+  label __case_11:
+  __t0 = 5;
+  goto __sw_break_2;
+  label __case_12:
+  __t0 = 6;
+  label __sw_break_2:
+  __rval = __t0;
+  __t0 = ram[__sp];
+  __sp += 1;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr >= 4) goto __dispatch_1;
+  if (__addr >= 2) goto __dispatch_2;
+  goto __rp2;
+  label __dispatch_2:
+  if (__addr >= 3) goto __dispatch_3;
+  goto __rp3;
+  label __dispatch_3:
+  goto __rp4;
+  label __dispatch_1:
+  if (__addr >= 5) goto __dispatch_4;
+  goto __rp5;
+  label __dispatch_4:
+  if (__addr >= 6) goto __dispatch_5;
+  goto __rp6;
+  label __dispatch_5:
+  goto __rp7;
+}
@@ -0,0 +1,29 @@
+#pragma inline_one_use_functions false
+#pragma safe_stack false
+#pragma header false
+
+main() {
+    echo(sum(10, 0) + sum(20, 0));
+    echo(is_even(7) + is_even(40) + is_odd(5));
+    echo(twice(3) + twice(4));
+}
+
+// tail-calls itself
+sum(n, acc) {
+    if (n == 0) return acc;
+    return sum(n - 1, acc + n);
+}
+
+// tail-call each other
+is_even(n) {
+    if (n == 0) return 1;
+    return is_odd(n - 1);
+}
+
+is_odd(n) {
+    if (n == 0) return 0;
+    return is_even(n - 1);
+}
+
+twice(x) { return double(x); }
+double(x) { return x * 2; }
@@ -0,0 +1,154 @@
+var __a0;
+var __a1;
+var __addr;
+var __rval;
+var __sp;
+var __t0;
+var __t1;
+var __t2;
+var __t3;
+
+main
+{
+  __sp = 512;
+  label __main_loop:
+  __a0 = 10;
+  __a1 = 0;
+  __sp -= 1;
+  ram[__sp] = 1;
+  goto __fn1_sum;
+  label __rp1:
+  __t0 = __rval;
+  __a0 = 20;
+  __a1 = 0;
+  __sp -= 1;
+  ram[__sp] = 2;
+  goto __fn1_sum;
+  label __rp2:
+  __t1 = __rval;
+  __t2 = __t0 + __t1;
+  echo(__t2);
+  __a0 = 7;
+  __sp -= 1;
+  ram[__sp] = 3;
+  goto __fn2_is_even;
+  label __rp3:
+  __t0 = __rval;
+  __a0 = 40;
+  __sp -= 1;
+  ram[__sp] = 4;
+  goto __fn2_is_even;
+  label __rp4:
+  __t1 = __rval;
+  __a0 = 5;
+  __sp -= 1;
+  ram[__sp] = 5;
+  goto __fn3_is_odd;
+  label __rp5:
+  __t2 = __rval;
+  __t3 = (__t0 + __t1) + __t2;
+  echo(__t3);
+  __a0 = 3;
+  __sp -= 1;
+  ram[__sp] = 6;
+  goto __fn4_twice;
+  label __rp6:
+  __t0 = __rval;
+  __a0 = 4;
+  __sp -= 1;
+  ram[__sp] = 7;
+  goto __fn4_twice;
+  label __rp7:
+  __t1 = __rval;
+  __t2 = __t0 + __t1;
+  echo(__t2);
+  goto __main_loop;
+  label __fn1_sum:
+  __sp -= 1;
+  ram[__sp] = __t0;
+  __sp -= 1;
+  ram[__sp] = __t1;
+  label __fn1_body:
+  __t0 = __a0;
+  __t1 = __a1;
+  if (__t0 == 0) {
+    __rval = __t1;
+    goto __fn1_end;
+  }
+  __a0 = __t0 - 1;
+  __a1 = __t1 + __t0;
+  goto __fn1_body;
+  label __fn1_end:
+  __t1 = ram[__sp];
+  __sp += 1;
+  __t0 = ram[__sp];
+  __sp += 1;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr == 1) goto __rp1;
+  if (__addr == 2) goto __rp2;
+  goto __err_bad_addr;
+  label __tail_1:
+  __t0 = ram[__sp];
+  __sp += 1;
+  goto __fn3_is_odd;
+  label __fn2_is_even:
+  __sp -= 1;
+  ram[__sp] = __t0;
+  __t0 = __a0;
+  if (__t0 == 0) {
+    __rval = 1;
+    goto __fn2_end;
+  }
+  __a0 = __t0 - 1;
+  goto __tail_1;
+  label __fn2_end:
+  __t0 = ram[__sp];
+  __sp += 1;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr == 3) goto __rp3;
+  if (__addr == 4) goto __rp4;
+  if (__addr == 5) goto __rp5;
+  goto __err_bad_addr;
+  label __tail_2:
+  __t0 = ram[__sp];
+  __sp += 1;
+  goto __fn2_is_even;
+  label __fn3_is_odd:
+  __sp -= 1;
+  ram[__sp] = __t0;
+  __t0 = __a0;
+  if (__t0 == 0) {
+    __rval = 0;
+    goto __fn3_end;
+  }
+  __a0 = __t0 - 1;
+  goto __tail_2;
+  label __fn3_end:
+  __t0 = ram[__sp];
+  __sp += 1;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr == 3) goto __rp3;
+  if (__addr == 4) goto __rp4;
+  if (__addr == 5) goto __rp5;
+  goto __err_bad_addr;
+  label __tail_3:
+  __t0 = ram[__sp];
+  __sp += 1;
+  goto __fn5_double;
+  label __fn4_twice:
+  __sp -= 1;
+  ram[__sp] = __t0;
+  __t0 = __a0;
+  __a0 = __t0;
+  goto __tail_3;
+  label __fn5_double:
+  __rval = __a0 * 2;
+  __addr = ram[__sp];
+  __sp += 1;
+  if (__addr == 6) goto __rp6;
+  if (__addr == 7) goto __rp7;
+  label __err_bad_addr:
+}
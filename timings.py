@@ -0,0 +1,144 @@
+#!/bin/env python3
+
+import time
+import tracemalloc
+import contextlib
+
+
+class Phase:
+	""" Measurement of one phase of the compilation
+
+	Attributes:
+		name (str): Name of the phase
+		wall (float): Elapsed time in seconds
+		cpu (float): CPU time of the process in seconds
+		peak (int): Peak of memory allocated during the phase, above
+			the amount allocated when it started, in bytes; None if
+			the memory is not traced.
+		items (dict): Sizes of the phase's product, e.g. {"chars": 1234}
+
+	"""
+
+	def __init__(self, name):
+		self.name = name
+		self.wall = 0.0
+		self.cpu = 0.0
+		self.peak = None
+		self.items = {}
+
+
+	def to_json(self):
+		return {
+			'name': self.name,
+			'wall': self.wall,
+			'cpu': self.cpu,
+			'peak': self.peak,
+			'items': self.items,
+		}
+
+
+
+class Timings:
+	""" Time, CPU and memory used by the compilation phases
+
+	Pass to `compiler.compile()` to have the phases measured.
+	The phases must not be nested.
+
+	Args:
+		trace_memory (bool): Measure the memory with tracemalloc;
+			this makes everything run a few times slower.
+
+	Attributes:
+		phases (Phase[]): The measured phases, in order
+		trace_memory (bool): Whether the memory is measured
+
+	"""
+
+	def __init__(self, trace_memory=True):
+		self.phases = []
+		self.trace_memory = trace_memory
+
+		self._started_tracing = False
+
+
+	def start(self):
+		""" Start tracing the memory, if needed """
+
+		if self.trace_memory and not tracemalloc.is_tracing():
+			tracemalloc.start()
+			self._started_tracing = True
+
+
+	def stop(self):
+		""" Stop tracing the memory, if started by `start()` """
+
+		if self._started_tracing:
+			tracemalloc.stop()
+			self._started_tracing = False
+
+
+	@contextlib.contextmanager
+	def measure(self, name):
+		""" Measure a phase
+
+		Used as `with timings.measure('name') as phase:`;
+		the block can add to `phase.items`.
+
+		Args:
+			name (str): Name of the phase
+
+		"""
+
+		phase = Phase(name)
+		self.phases.append(phase)
+
+		tracing = tracemalloc.is_tracing()
+		if tracing:
+			tracemalloc.reset_peak()
+			base = tracemalloc.get_traced_memory()[0]
+
+		wall = time.perf_counter()
+		cpu = time.process_time()
+
+		try:
+			yield phase
+		finally:
+			phase.wall = time.perf_counter() - wall
+			phase.cpu = time.process_time() - cpu
+
+			if tracing:
+				phase.peak = max(0, tracemalloc.get_traced_memory()[1] - base)
+
+
+	def table(self):
+		""" Format the measurements as a table
+
+		Returns:
+			The table, as string
+
+		"""
+
+		lines = ['%-28s %10s %10s %10s   %s' % ('phase', 'wall ms', 'cpu ms', 'peak KB', 'items')]
+
+		for p in self.phases:
+			lines.append('%-28s %10.2f %10.2f %10s   %s' % (
+				p.name,
+				p.wall * 1000,
+				p.cpu * 1000,
+				'-' if p.peak is None else '%d' % (p.peak // 1024),
+				', '.join('%d %s' % (n, what) for (what, n) in p.items.items())
+			))
+
+		lines.append('%-28s %10.2f %10.2f' % (
+			'total',
+			sum(p.wall for p in self.phases) * 1000,
+			sum(p.cpu for p in self.phases) * 1000
+		))
+
+		return '\n'.join(lines)
+
+
+	def to_json(self):
+		""" Get the measurements as a JSON-serializable list """
+
+		return [p.to_json() for p in self.phases]
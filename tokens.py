@@ -24,6 +24,8 @@ class Token:
 
 	"""
 
+	__slots__ = ('value',)
+
 	def __init__(self, value):
 		self.value = value.strip()
 
@@ -77,19 +79,118 @@ class Token:
 class CompositeToken(Token):
 	""" Token that has sub-tokens
 
+	The token is created either from a source string, or from
+	a span of a reader's text. With a span, the source is not copied,
+	and the sub-tokens are read from the shared text, so blocks
+	already scanned by the parent are not scanned again.
+
+	Args:
+		value (str, optional): source, same as Token
+		span (tuple, optional): (reader, start, end) of the source
+			in the reader's text; used instead of the `value`.
+
 	Attributes:
-		value (str): source, same as Token
+		value (str): source, same as Token. With a span, it's
+			taken from the text only when needed.
+		span (tuple): The span given in constructor, or None.
 		tokens (list of Token): the sub-tokens are stored here.
 			Defaults to None.
 
 	"""
 
+	__slots__ = ('span', '_value', 'tokens')
+
+
+	def __init__(self, value=None, span=None):
+		self.span = span
+
+		if span is None:
+			super().__init__(value)
+		else:
+			self._value = None
 
-	def __init__(self, value):
-		super().__init__(value)
 		self.tokens = None  # None = not yet tokenized
 
 
+	@classmethod
+	def from_block(cls, rd):
+		""" Consume a block from the reader, and create a token for it
+
+		Args:
+			rd (CodeReader): the reader, at the opening paren
+
+		Returns:
+			The token
+
+		"""
+
+		(start, end) = rd.consume_block_span()
+		return cls(span=(rd, start, end))
+
+
+	@classmethod
+	def from_code(cls, rd, code_span):
+		""" Create a token from a consumed chunk of code
+
+		Args:
+			rd (CodeReader): the reader
+			code_span (tuple): result of `rd.consume_code_span()`
+				(or other method with the same result format)
+
+		Returns:
+			The token
+
+		"""
+
+		(start, end, code) = code_span
+
+		if code is None:
+			return cls(span=(rd, start, end))
+		else:
+			return cls(code)
+
+
+	@property
+	def value(self):
+		if self._value is None:
+			(rd, start, end) = self.span
+			self._value = rd.text[start:end].strip()
+
+		return self._value
+
+
+	@value.setter
+	def value(self, value):
+		self._value = value
+
+
+	def _reader(self, inner=False, strip=True):
+		""" Get a reader of the token source
+
+		Args:
+			inner (bool, optional): Leave out the enclosing parens.
+				Defaults to False.
+			strip (bool, optional): Leave out whitespace at the ends.
+				Defaults to True.
+
+		Returns:
+			The reader (CodeReader)
+
+		"""
+
+		if self.span is None:
+			src = self.value[1:-1] if inner else self.value
+			return CodeReader(src.strip() if strip else src)
+
+		(rd, start, end) = self.span
+
+		if inner:
+			start += 1
+			end -= 1
+
+		return rd.sub_reader(start, end, strip)
+
+
 	def is_composite(self):
 		""" Returns true, because this token is composite """
 
@@ -120,6 +221,8 @@ class TokenKeyword(Token):
 
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__(type(self).__name__[2:].lower())
 
@@ -160,6 +263,8 @@ class T_IF(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_ELSE(TokenKeyword):
@@ -172,6 +277,8 @@ class T_ELSE(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_FOR(TokenKeyword):
@@ -192,6 +299,8 @@ class T_FOR(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_WHILE(TokenKeyword):
@@ -207,6 +316,8 @@ class T_WHILE(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_SWITCH(TokenKeyword):
@@ -225,6 +336,8 @@ class T_SWITCH(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_CASE(TokenKeyword):
@@ -241,6 +354,8 @@ class T_CASE(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_DEFAULT(TokenKeyword):
@@ -253,6 +368,8 @@ class T_DEFAULT(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_DO(TokenKeyword):
@@ -269,6 +386,8 @@ class T_DO(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_VAR(TokenKeyword):
@@ -288,6 +407,8 @@ class T_VAR(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_GOTO(TokenKeyword):
@@ -308,6 +429,8 @@ class T_GOTO(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_BREAK(TokenKeyword):
@@ -318,6 +441,8 @@ class T_BREAK(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_RETURN(TokenKeyword):
@@ -337,6 +462,8 @@ class T_RETURN(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_CONTINUE(TokenKeyword):
@@ -347,6 +474,8 @@ class T_CONTINUE(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_SET(TokenKeyword):
@@ -366,6 +495,8 @@ class T_SET(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_LABEL(TokenKeyword):
@@ -380,6 +511,8 @@ class T_LABEL(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_CALL(TokenKeyword):
@@ -398,6 +531,8 @@ class T_CALL(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_FUNCTION(TokenKeyword):
@@ -421,11 +556,15 @@ class T_FUNCTION(TokenKeyword):
 
 	"""
 
+	__slots__ = ()
+
 
 
 class T_Name(Token):
 	""" Any identifier not recognized as a keyword """
 
+	__slots__ = ()
+
 	def equals(self, other):
 		""" Check for value equality
 
@@ -444,6 +583,8 @@ class T_Name(Token):
 class T_DocComment(Token):
 	""" Comment that is preserved in the output """
 
+	__slots__ = ()
+
 	def equals(self, other):
 		return self.value == other.value
 
@@ -455,6 +596,8 @@ class T_Semicolon(Token):
 
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__(';')
 
@@ -467,6 +610,8 @@ class T_Colon(Token):
 
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__(':')
 
@@ -475,26 +620,36 @@ class T_Colon(Token):
 class T_String(Token):
 	""" String literal """
 
+	__slots__ = ()
+
 
 
 class T_Char(Token):
 	""" Char literal """
 
+	__slots__ = ()
+
 
 
 class T_Number(Token):
 	""" Dec, hex or bin number literal """
 
+	__slots__ = ()
+
 
 
 class T_Operator(Token):
 	""" Any operator in an expression """
 
+	__slots__ = ()
+
 
 
 class T_AssignOperator(Token):
 	""" Assignment operator at the beginning of a Rvalue """
 
+	__slots__ = ()
+
 
 
 class T_Expression(CompositeToken):
@@ -516,21 +671,29 @@ class T_Expression(CompositeToken):
 
 	"""
 
+	__slots__ = ()
+
 	def _tokenize(self):
 		""" Parse expression sub-tokens """
 
-		rd = CodeReader(self.value)
+		rd = self._reader()
 
-		while not rd.has_end():
-			rd.sweep()
-			if rd.has_end():
+		while True:
+			# unary operator is possible only where an operand is expected
+			if len(self.tokens) == 0 or type(self.tokens[-1]) is T_Operator:
+				(kind, start, end) = rd.lex(rd.RE_LEX_OPERAND)
+			else:
+				(kind, start, end) = rd.lex(rd.RE_LEX_EXPRESSION)
+
+			if kind is None:
 				break
 
-			if rd.has_identifier():
+			if kind == 'identifier':
 				# an identifier
 				# can be variable or a function call
 
-				s = rd.consume_identifier()
+				rd.pos = end
+				s = rd.text[start:end]
 				t = T_Name(s)
 				self.tokens.append(t)
 
@@ -538,36 +701,30 @@ class T_Expression(CompositeToken):
 
 				if rd.has_bracket():
 					# array index
-					s = rd.consume_block()
-					t = T_Bracket(s)
+					t = T_Bracket.from_block(rd)
 					self.tokens.append(t)
 
 				elif rd.has_paren():
 					# paren with arguments for the function
-					s = rd.consume_block()
-					t = T_Paren(s)
+					t = T_Paren.from_block(rd)
 
 					t.set_type(ParenType.ARGVALS)
 
 					self.tokens.append(t)
 
-			elif rd.has_paren():
+			elif kind == 'paren':
 				# Parenthesised sub-expression
-				s = rd.consume_block()
-				t = T_Paren(s)
+				t = T_Paren.from_block(rd)
 				t.set_type(ParenType.EXPR)
 				self.tokens.append(t)
 
-			elif rd.has_number():
+			elif kind == 'number':
 				# Number literal
 				s = rd.consume_number()
 				t = T_Number(s)
 				self.tokens.append(t)
 
-			elif (((len(self.tokens) > 0 and
-				type(self.tokens[-1:][0]) is T_Operator) or len(self.tokens) == 0)
-				and rd.matches(r'[-+]\s*[0-9a-z_]+')):
-
+			elif kind == 'unary':
 				# Unary operator
 				sign = rd.consume()
 				if sign == '+':
@@ -578,19 +735,19 @@ class T_Expression(CompositeToken):
 				if sign == '-':
 					self.tokens.append(T_Operator('@-'))
 
-			elif rd.has_operator():
+			elif kind == 'operator':
 				# Operator
-				s = rd.consume_operator()
-				t = T_Operator(s)
+				rd.pos = end
+				t = T_Operator(rd.text[start:end])
 				self.tokens.append(t)
 
-			elif rd.has_char():
+			elif kind == 'char':
 				# Char literal
 				s = rd.consume_char()
 				t = T_Char(s)
 				self.tokens.append(t)
 
-			elif rd.has_string():
+			elif kind == 'string':
 				# String literal
 				s = rd.consume_string()
 				t = T_String(s)
@@ -619,15 +776,17 @@ class T_Rvalue(CompositeToken):
 
 	"""
 
+	__slots__ = ()
+
 	def _tokenize(self):
-		rd = CodeReader(self.value)
+		rd = self._reader()
 
 		s = rd.consume_until(end='=')
 		t = T_AssignOperator(s)
 		self.tokens.append(t)
 
-		s = rd.consume_all()
-		t = T_Expression(s)
+		rd.sweep()
+		t = T_Expression(span=(rd, rd.pos, rd.length))
 		self.tokens.append(t)
 
 
@@ -692,8 +851,10 @@ class T_Paren(CompositeToken):
 
 	"""
 
-	def __init__(self, value):
-		super().__init__(value)
+	__slots__ = ('ptype', 'expression', 'for_init', 'for_init_s', 'for_cond', 'for_cond_s', 'for_iter', 'for_iter_s')
+
+	def __init__(self, value=None, span=None):
+		super().__init__(value, span)
 
 		self.ptype = ParenType.UNKNOWN
 
@@ -718,8 +879,7 @@ class T_Paren(CompositeToken):
 		if rd.has_end():
 			rd.error('Unexpected end of string (expected expression)')
 
-		s = rd.consume_all()
-		t = T_Expression(s)
+		t = T_Expression(span=(rd, rd.pos, rd.length))
 		self.tokens.append(t)
 		self.expression = t
 
@@ -733,8 +893,9 @@ class T_Paren(CompositeToken):
 			if rd.has_end():
 				break  # end of args after some junk
 
-			s = rd.consume_code(end=',', eof=True, keep_end=False)
-			t = T_Expression(s)
+			t = T_Expression.from_code(
+				rd, rd.consume_code_span(end=',', eof=True, keep_end=False)
+			)
 			self.tokens.append(t)
 
 
@@ -789,7 +950,7 @@ class T_Paren(CompositeToken):
 			print('Paren has no type, cannot tokenize: ' + str(self))
 			return
 
-		rd = CodeReader(self.value[1:-1].strip())
+		rd = self._reader(inner=True)
 
 		if self.ptype == ParenType.EXPR:
 			# single expression
@@ -845,14 +1006,17 @@ class T_Bracket(CompositeToken):
 
 	"""
 
+	__slots__ = ('index',)
+
 	def _tokenize(self):
 
-		rd = CodeReader(self.value[1:-1].strip())
+		rd = self._reader(inner=True)
 
 		rd.sweep()
 
-		s = rd.consume_code(end=',', eof=True, keep_end=False)
-		t = T_Expression(s)
+		t = T_Expression.from_code(
+			rd, rd.consume_code_span(end=',', eof=True, keep_end=False)
+		)
 		self.tokens.append(t)
 		self.index = t
 
@@ -878,15 +1042,17 @@ class T_CodeBlock(CompositeToken):
 
 	"""
 
-	def __init__(self, value):
+	__slots__ = ()
+
+	def __init__(self, value=None, span=None):
 
-		super().__init__(value)
+		super().__init__(value, span)
 
 
 	def _tokenize(self):
 
-		rd = Tokenizer(self.value[1:-1])
-		self.tokens = rd.tokenize()
+		tk = Tokenizer(reader=self._reader(inner=True, strip=False))
+		self.tokens = tk.tokenize()
 
 
 	def __str__(self):
@@ -904,19 +1070,23 @@ class Tokenizer:
 		source (str): Source code to tokenize
 		filename (str, optional): The file this source came from.
 			Used mainly for error reporting.
+		reader (CodeReader, optional): Reader to tokenize instead
+			of the `source`, eg. a window in a bigger source.
 
 	Attributes:
 		filename (str): The filename provided in constructor
 		source (str): The source provided in constructor
+		reader (CodeReader): The reader provided in constructor
 		tokens (Token[]): List of tokens, created by
 			calling `tokenize()`. Used for caching.
 
 	"""
 
-	def __init__(self, source, filename=None):
+	def __init__(self, source=None, filename=None, reader=None):
 
 		self.filename = filename
 		self.source = source
+		self.reader = reader
 		self.tokens = None
 
 
@@ -944,35 +1114,36 @@ class Tokenizer:
 
 		self.tokens = []
 
-		rd = CodeReader(self.source, self.filename)
+		rd = self.reader
+		if rd is None:
+			rd = CodeReader(self.source, self.filename)
 
-		while not rd.has_end():
+		while True:
 
-			# discard garbage
-			rd.sweep()
+			# discard garbage, see what follows
+			(kind, start, end) = rd.lex(rd.RE_LEX_STATEMENT)
 
 			# End of string.
-			if rd.has_end():
+			if kind is None:
 				break
 
 			# <identifier>
-			elif rd.has_identifier():
+			elif kind == 'identifier':
 
 				self._tokenize_identifier(rd)
 
 			# {...stuff...}
-			elif rd.has_code_block():
+			elif kind == 'code_block':
 
-				s = rd.consume_block()
-				self._add( T_CodeBlock(s) )
+				self._add( T_CodeBlock.from_block(rd) )
 			
-			elif rd.has_inline_doc_comment():
+			elif kind == 'doc_comment':
 
 				s = rd.consume_line()
 				self._add( T_DocComment(s) )
 
 			# ;
-			elif rd.starts(';'):
+			elif kind == 'semicolon':
 
 				self._collect_semicolon(rd)
 
@@ -1008,8 +1179,7 @@ class Tokenizer:
 
 		# array index bracket
 		if rd.has_bracket():
-			s = rd.consume_block()
-			self._add(T_Bracket(s))
+			self._add( T_Bracket.from_block(rd) )
 			rd.sweep()
 
 		# increment or decrement statement
@@ -1020,7 +1190,7 @@ class Tokenizer:
 
 		elif rd.has_rvalue():
 			self._add(
-				T_Rvalue(rd.consume_rvalue())
+				T_Rvalue.from_code(rd, rd.consume_rvalue_span())
 			)
 
 		else:
@@ -1101,9 +1271,7 @@ class Tokenizer:
 		if not rd.has_paren():
 			rd.error('Expected parenthesis.')
 
-		paren = rd.consume_block()
-
-		t = T_Paren(paren)
+		t = T_Paren.from_block(rd)
 		t.set_type(paren_type)
 		self._add(t)
 
@@ -1184,8 +1352,9 @@ class Tokenizer:
 		elif kwd == 'case':
 			self._add( T_CASE() )
 
-			expr = rd.consume_code(end=':', consume_end=False)
-			t = T_Expression(expr)
+			t = T_Expression.from_code(
+				rd, rd.consume_code_span(end=':', consume_end=False)
+			)
 			self._add(t)
 
 			self._collect_colon(rd)
@@ -1211,8 +1380,8 @@ class Tokenizer:
 
 				# initial value assignment
 				if rd.has_rvalue():
-					v = rd.consume_rvalue()
-					self._add( T_Rvalue(v) )
+					t = T_Rvalue.from_code(rd, rd.consume_rvalue_span())
+					self._add(t)
 
 				rd.sweep()
 
@@ -1257,8 +1426,9 @@ class Tokenizer:
 
 			if not rd.starts(';'):
 				# return with no value
-				expr = rd.consume_code(end=';', consume_end=False)
-				t = T_Expression(expr)
+				t = T_Expression.from_code(
+					rd, rd.consume_code_span(end=';', consume_end=False)
+				)
 				self._add(t)
 
 			# the semicolon
@@ -1268,7 +1438,7 @@ class Tokenizer:
 		elif rd.has_paren():
 			# function call or declaration
 
-			paren = rd.consume_block()  # consume the paren
+			(paren_start, paren_end) = rd.consume_block_span()  # consume the paren
 
 			rd.sweep()
 
@@ -1277,7 +1447,7 @@ class Tokenizer:
 				self._add( T_CALL() )
 				self._add( T_Name(s) )
 
-				t = T_Paren(paren)
+				t = T_Paren(span=(rd, paren_start, paren_end))
 				t.set_type(ParenType.ARGVALS)
 				self._add(t)
 
@@ -1289,14 +1459,13 @@ class Tokenizer:
 				self._add( T_FUNCTION() )
 				self._add( T_Name(s) )
 
-				t = T_Paren(paren)
+				t = T_Paren(span=(rd, paren_start, paren_end))
 				t.set_type(ParenType.ARGNAMES)
 				self._add(t)
 
 				rd.sweep()
 
-				cbl = rd.consume_block()
-				self._add( T_CodeBlock(cbl) )
+				self._add( T_CodeBlock.from_block(rd) )
 				return
 
 		elif (
@@ -18,11 +18,58 @@ def append(arr, added):
 		arr.append(added)
 
 
-class Obj(object):
-	""" Anonymous attribute bundle """
+class OutputBuilder:
+	""" Collects output text
 
-	def __init__(self, **kwargs):
-		self.__dict__.update(kwargs)
+	The text is kept as a list of chunks and joined only once,
+	when it's retrieved. Appending to a string instead copies
+	everything collected so far, each time.
+
+	Small chunks are merged into larger blocks every now and then,
+	so the per-chunk overhead doesn't outgrow the text itself.
+
+	Attributes:
+		blocks (str[]): Merged chunks
+		chunks (str[]): Chunks added since the last merge
+
+	"""
+
+	# number of chunks merged into one block
+	BLOCK_CHUNKS = 1024
+
+
+	def __init__(self):
+		self.blocks = []
+		self.chunks = []
+
+
+	def add(self, text):
+		""" Append text to the output
+
+		Args:
+			text (str): The appended text
+
+		"""
+
+		self.chunks.append(text)
+
+		if len(self.chunks) >= self.BLOCK_CHUNKS:
+			self.blocks.append(''.join(self.chunks))
+			self.chunks = []
+
+
+	def get(self):
+		""" Get the collected text
+
+		Returns:
+			All the chunks joined
+
+		"""
+
+		text = ''.join(self.blocks) + ''.join(self.chunks)
+		self.blocks = [text]
+		self.chunks = []
+		return text
 
 
 class SyntaxNode:
@@ -34,6 +81,8 @@ class SyntaxNode:
 
 	"""
 
+	__slots__ = ('parent',)
+
 	def __init__(self):
 		self.parent = None
 